@@ -0,0 +1,118 @@
+"""
+Company Entity Resolution Index
+Normalizes company names from grantees, applicants and drug companies,
+clusters their variants into canonical company IDs and builds
+company -> patents/drugs posting lists
+"""
+import os
+import re
+import sys
+import unicodedata
+from collections import Counter
+
+from pipeline_records import PatentRecord, DrugRecord, load_records, write_json
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# Trailing legal forms dropped from company names. Only legal forms belong here:
+# descriptors such as "and", "co", "pharma" or "group" tell companies apart
+# ("Merck & Co" vs "Merck KGaA", "Sun Pharma"). Keep in sync with server.js.
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'ltd', 'limited',
+    'llc', 'llp', 'lp', 'plc', 'ag', 'sa', 'sas', 'se', 'gmbh', 'kg', 'kgaa', 'nv',
+    'bv', 'spa', 'srl', 'kk', 'ab', 'as', 'asa', 'oy', 'oyj', 'pty', 'pte', 'pvt',
+    'bhd', 'sl', 'ulc'
+}
+
+# Spelled-out words folded to their abbreviation ("and Company" == "& Co")
+COMPANY_ABBREVIATIONS = {'company': 'co'}
+
+# Dotted or slashed initials ("A/S", "S.A.", "S. p. A.") collapse into one token
+INITIALS = re.compile(r'(?<![a-z0-9])(?:[a-z][./] ?)+[a-z](?![a-z0-9])\.?')
+
+
+def normalize_company(name):
+    """Lowercase, strip accents, punctuation and trailing legal forms"""
+    text = unicodedata.normalize('NFKD', name)
+    text = re.sub(r'[\u0300-\u036f]', '', text).lower()
+    text = INITIALS.sub(lambda m: re.sub(r'[^a-z]', '', m.group()), text)
+    text = text.replace('&', ' and ').replace('.', '')
+    tokens = [COMPANY_ABBREVIATIONS.get(t, t) for t in re.sub(r'[^a-z0-9]+', ' ', text).split()]
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def company_key(name):
+    """Canonical company ID; spacing variants ("Glaxo Smith Kline") collapse together"""
+    return normalize_company(name).replace(' ', '')
+
+
+def build_company_index(patents, drugs):
+    """Cluster company name variants and build posting lists per company"""
+    companies = {}
+    variant_counts = {}
+
+    def company(name):
+        key = company_key(name)
+        if not key:
+            return None
+        if key not in companies:
+            companies[key] = {'name': None, 'variants': [], 'patents': [], 'drugs': []}
+            variant_counts[key] = Counter()
+        variant_counts[key][name] += 1
+        return companies[key]
+
+    for patent in patents:
+        seen = set()
+        for name in (patent.grantees or ()) + (patent.original_applicants or ()):
+            entry = company(name)
+            if entry is not None and id(entry) not in seen:
+                seen.add(id(entry))
+                entry['patents'].append(patent.id)
+
+    for drug in drugs:
+        seen = set()
+        for name in drug.active_companies or ():
+            entry = company(name)
+            if entry is not None and id(entry) not in seen:
+                seen.add(id(entry))
+                entry['drugs'].append(drug.id)
+
+    variants = {}
+    for key, entry in companies.items():
+        # The most frequent spelling becomes the canonical name
+        ranked = variant_counts[key].most_common()
+        entry['name'] = ranked[0][0]
+        entry['variants'] = [name for name, _ in ranked]
+        for name, _ in ranked:
+            variants[name.lower()] = key
+
+    return {
+        'total_companies': len(companies),
+        'companies': companies,
+        'variants': variants
+    }
+
+
+def create_company_index(patents, drugs, output_dir='processed_data'):
+    """Resolve company entities and save the company index"""
+    print("\n🏢 RESOLVING COMPANIES...")
+    print("-" * 50)
+
+    index = build_company_index(patents, drugs)
+
+    index_file = os.path.join(output_dir, 'company_index.json')
+    write_json(index, index_file, indent=None)
+
+    print(f"✅ Resolved {len(index['variants'])} name variants into {index['total_companies']} companies")
+    print(f"   Saved to: {index_file}")
+
+    return index
+
+
+if __name__ == "__main__":
+    create_company_index(
+        load_records(PatentRecord, 'processed_data/patents_processed.json'),
+        load_records(DrugRecord, 'processed_data/drugs_processed.json')
+    )
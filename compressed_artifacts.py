@@ -0,0 +1,143 @@
+"""
+Pre-compressed Pipeline Artifacts
+Writes gzip and zstd variants of pipeline output files and records
+their content hashes for the master index
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 19
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_gzip(src, dst):
+    # mtime=0 keeps the output deterministic for identical input
+    with open(src, 'rb') as f_in, open(dst, 'wb') as raw_out:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw_out, compresslevel=GZIP_LEVEL, mtime=0) as f_out:
+            for chunk in iter(lambda: f_in.read(CHUNK_SIZE), b''):
+                f_out.write(chunk)
+
+
+def _write_zstd(src, dst):
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    with open(src, 'rb') as f_in, open(dst, 'wb') as f_out:
+        compressor.copy_stream(f_in, f_out, size=os.path.getsize(src))
+
+
+COMPRESSORS = {
+    'gzip': ('.gz', _write_gzip),
+    'zstd': ('.zst', _write_zstd)
+}
+
+
+def available_encodings():
+    return [name for name in COMPRESSORS if name != 'zstd' or zstandard is not None]
+
+
+def compress_artifact(output_dir, filename, previous=None):
+    """
+    Hash one output file and write its compressed variants
+
+    Variants are reused when the previous manifest entry has the same
+    hash and the variant files are still on disk.
+    """
+    file_path = os.path.join(output_dir, filename)
+    entry = {
+        'sha256': file_sha256(file_path),
+        'size': os.path.getsize(file_path)
+    }
+    unchanged = previous is not None and previous.get('sha256') == entry['sha256']
+
+    for encoding in available_encodings():
+        suffix, write = COMPRESSORS[encoding]
+        variant = filename + suffix
+        variant_path = os.path.join(output_dir, variant)
+        if not (unchanged and encoding in previous and os.path.exists(variant_path)):
+            tmp_path = f"{variant_path}.tmp"
+            write(file_path, tmp_path)
+            os.replace(tmp_path, variant_path)
+        entry[encoding] = {
+            'file': variant,
+            'size': os.path.getsize(variant_path)
+        }
+
+    return entry
+
+
+def publish_artifacts(output_dir, filenames, previous_index=None):
+    """
+    Compress every existing output file and return the artifact manifest
+
+    previous_index is the master index from the last run. Its artifact
+    hashes let unchanged files skip recompression.
+    """
+    print("\n🗜️  COMPRESSING ARTIFACTS...")
+    print("-" * 50)
+
+    previous = (previous_index or {}).get('artifacts', {})
+    artifacts = {}
+    for filename in filenames:
+        if not os.path.exists(os.path.join(output_dir, filename)):
+            continue
+        artifacts[filename] = compress_artifact(output_dir, filename, previous.get(filename))
+        encoded = ', '.join(
+            f"{enc} {artifacts[filename][enc]['size']:,} B" for enc in available_encodings()
+        )
+        print(f"   {filename}: {artifacts[filename]['size']:,} B -> {encoded}")
+
+    if zstandard is None:
+        print("   ⚠️ zstandard not installed, skipped zstd variants")
+
+    return artifacts
+
+
+def load_index(index_file):
+    """Load a master index, or None when it does not exist yet"""
+    if not os.path.exists(index_file):
+        return None
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def changed_artifacts(old_index, new_index):
+    """Artifact files (with variants) whose hash differs between two master indexes"""
+    old = (old_index or {}).get('artifacts', {})
+    changed = []
+    for filename, entry in (new_index or {}).get('artifacts', {}).items():
+        if old.get(filename, {}).get('sha256') != entry['sha256']:
+            changed.append(filename)
+            changed.extend(entry[enc]['file'] for enc in COMPRESSORS if enc in entry)
+    return changed
+
+
+if __name__ == "__main__":
+    # Usage: python compressed_artifacts.py DEPLOYED_MASTER_INDEX [LOCAL_MASTER_INDEX]
+    # Lists the files a deploy sync needs to upload
+    if len(sys.argv) < 2:
+        print("Usage: python compressed_artifacts.py DEPLOYED_MASTER_INDEX [LOCAL_MASTER_INDEX]")
+        sys.exit(1)
+
+    # A missing index (first deploy, or no local run yet) counts as empty
+    deployed = load_index(sys.argv[1]) or {}
+    local_file = sys.argv[2] if len(sys.argv) > 2 else 'processed_data/master_index.json'
+    for filename in changed_artifacts(deployed, load_index(local_file) or {}):
+        print(filename)
@@ -0,0 +1,394 @@
+"""
+Columnar Corpus File
+Read-only, offset-indexed file holding every patent and drug field as a
+column, for serving from a memory-mapped file instead of parsed JSON
+
+Layout (little-endian):
+    magic 'PATCORP1', uint64 header length, JSON header padded to 8 bytes,
+    then the body. Header positions are relative to the start of the body.
+
+Per table the header lists its row count and, per column, the position of
+an offsets array (uint64, rows + 1 entries) and of the column data. Row r
+of a column is data[offsets[r]:offsets[r + 1]]: compact UTF-8 JSON and a
+comma, so a run of rows parses as one JSON array. A uint32 layout number
+per row selects, from the header, the record's fields in their original
+order; the value of a field the record does not have is stored as null.
+Each table also holds an id index (the ids in sorted order as offsets and
+UTF-8 data, with their uint32 rows) and uint32 sort orders (row numbers).
+
+Usage:
+    python corpus_file.py                        rebuild processed_data/corpus.bin
+    python corpus_file.py CORPUS                 table and column summary
+    python corpus_file.py CORPUS TABLE ID        one record as JSON
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+
+from pipeline_records import PatentRecord, DrugRecord, RelationshipRecord, load_records
+from sort_orders import build_sort_orders
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+CORPUS_FILE = 'corpus.bin'
+MAGIC = b'PATCORP1'
+VERSION = 1
+_FLUSH_ROWS = 65536
+_MISSING = b'null,'
+
+
+def _pad(size):
+    return -size % 8
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _id_key(value):
+    # UTF-16 code unit order, as JavaScript compares strings
+    return value.encode('utf-16-be')
+
+
+def resolve_orders(section, ids):
+    """
+    Sort orders of build_sort_orders as row numbers of the records in `ids`
+
+    A record id appearing more than once resolves to its last row. Rows
+    missing from an order are appended at its end, as the API server does
+    for the resident data.
+    """
+    if not section:
+        return {}
+    by_id = {record_id: row for row, record_id in enumerate(ids) if record_id is not None}
+    orders = {}
+    for name, rows in section['orders'].items():
+        seen = bytearray(len(ids))
+        order = array('I')
+        for position in rows:
+            row = by_id.get(section['ids'][position])
+            if row is not None and not seen[row]:
+                seen[row] = 1
+                order.append(row)
+        order.extend(row for row in range(len(ids)) if not seen[row])
+        orders[name] = order
+    return orders
+
+
+class _ColumnWriter:
+    """Column data and offsets, spilled to temporary files as rows arrive"""
+
+    def __init__(self, work_dir, name, rows, index):
+        self.name = name
+        self.index = index
+        self.data = tempfile.TemporaryFile(dir=work_dir)
+        self.offsets = tempfile.TemporaryFile(dir=work_dir)
+        # Rows added before the column first appeared have no value
+        self.data.write(_MISSING * rows)
+        self.size = len(_MISSING) * rows
+        self.pending = array('Q', range(0, self.size + 1, len(_MISSING)))
+
+    def append(self, value):
+        self.data.write(value)
+        self.size += len(value)
+        self.pending.append(self.size)
+        if len(self.pending) >= _FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        _little_endian(self.pending).tofile(self.offsets)
+        self.pending = array('Q')
+
+
+class CorpusTableWriter:
+    """Appends records (dicts) to one table of a corpus file"""
+
+    def __init__(self, work_dir, columns=()):
+        self.work_dir = work_dir
+        self.rows = 0
+        self.columns = {}
+        self.ids = []
+        self.layouts = {}
+        self.row_layouts = array('I')
+        self.orders = {}
+        for name in columns:
+            self._add_column(name)
+
+    def _add_column(self, name):
+        self.columns[name] = _ColumnWriter(self.work_dir, name, self.rows, len(self.columns))
+
+    def append(self, record):
+        for name in record:
+            if name not in self.columns:
+                self._add_column(name)
+        for name, column in self.columns.items():
+            if name in record:
+                column.append(json.dumps(record[name], ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b',')
+            else:
+                column.append(_MISSING)
+        layout = tuple(self.columns[name].index for name in record)
+        self.row_layouts.append(self.layouts.setdefault(layout, len(self.layouts)))
+        record_id = record.get('id')
+        self.ids.append(record_id if isinstance(record_id, str) else None)
+        self.rows += 1
+
+    def set_orders(self, orders):
+        """Row-number sort orders, e.g. from resolve_orders"""
+        self.orders = orders
+
+
+class CorpusWriter:
+    """
+    Writes a corpus file from tables filled row by row
+
+    Columns are spilled to temporary files next to the target, so only the
+    record ids are kept in memory. close() assembles the file and moves it
+    into place atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.work_dir = tempfile.mkdtemp(prefix='.corpus-', dir=os.path.dirname(path) or '.')
+        self.tables = {}
+
+    def table(self, name, columns=()):
+        """Writer for a table; `columns` fixes the order of known columns"""
+        if name not in self.tables:
+            self.tables[name] = CorpusTableWriter(self.work_dir, columns)
+        return self.tables[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def close(self):
+        try:
+            self._assemble()
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _assemble(self):
+        # Lay out the body: offsets and data per column, then the id index and orders
+        header = {'version': VERSION, 'tables': {}}
+        sections = []
+        position = 0
+
+        def place(size, write):
+            nonlocal position
+            start = position
+            sections.append((write, _pad(size)))
+            position += size + _pad(size)
+            return start
+
+        for name, table in self.tables.items():
+            columns = []
+            for column in table.columns.values():
+                column.flush()
+                columns.append({
+                    'name': column.name,
+                    'offsets': place(8 * (table.rows + 1), self._copier(column.offsets)),
+                    'data': place(column.size, self._copier(column.data))
+                })
+
+            indexed = [row for row, record_id in enumerate(table.ids) if record_id is not None]
+            indexed.sort(key=lambda row: _id_key(table.ids[row]))
+            id_rows = _little_endian(array('I', indexed))
+            id_data = b''.join(table.ids[row].encode('utf-8') for row in indexed)
+            id_offsets = array('Q', [0])
+            for row in indexed:
+                id_offsets.append(id_offsets[-1] + len(table.ids[row].encode('utf-8')))
+            id_offsets = _little_endian(id_offsets)
+
+            header['tables'][name] = {
+                'rows': table.rows,
+                'columns': columns,
+                'layouts': [list(layout) for layout in table.layouts],
+                'row_layouts': place(4 * table.rows, _little_endian(table.row_layouts).tofile),
+                'id_index': {
+                    'count': len(indexed),
+                    'rows': place(4 * len(id_rows), id_rows.tofile),
+                    'offsets': place(8 * len(id_offsets), id_offsets.tofile),
+                    'data': place(len(id_data), lambda f, data=id_data: f.write(data))
+                },
+                'orders': {
+                    order_name: place(4 * len(order), _little_endian(order).tofile)
+                    for order_name, order in table.orders.items()
+                }
+            }
+
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        header_bytes += b' ' * _pad(len(header_bytes))
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            for write, padding in sections:
+                write(f)
+                f.write(b'\0' * padding)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _copier(source):
+        def copy(f):
+            source.seek(0)
+            shutil.copyfileobj(source, f)
+            source.close()
+        return copy
+
+
+class CorpusTable:
+    """One table of a memory-mapped corpus file"""
+
+    def __init__(self, buffer, base, spec):
+        self.buffer = buffer
+        self.base = base
+        self.rows = spec['rows']
+        self.columns = {c['name']: (base + c['offsets'], base + c['data']) for c in spec['columns']}
+        names = [c['name'] for c in spec['columns']]
+        self.layouts = [[names[i] for i in layout] for layout in spec['layouts']]
+        self.row_layouts = base + spec['row_layouts']
+        index = spec['id_index']
+        self.id_index = (index['count'], base + index['rows'], base + index['offsets'], base + index['data'])
+        self.orders = {name: base + position for name, position in spec['orders'].items()}
+
+    def __len__(self):
+        return self.rows
+
+    def raw(self, column, row):
+        """Encoded JSON of a value; null when the record has no such field"""
+        offsets, data = self.columns[column]
+        start, end = struct.unpack_from('<QQ', self.buffer, offsets + 8 * row)
+        return self.buffer[data + start:data + end - 1]
+
+    def value(self, column, row):
+        return json.loads(self.raw(column, row))
+
+    def record(self, row):
+        """The record at a row as a dict, with its fields in their original order"""
+        layout = self.layouts[struct.unpack_from('<I', self.buffer, self.row_layouts + 4 * row)[0]]
+        return {name: self.value(name, row) for name in layout}
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self.record(row)
+
+    def _indexed_id(self, i):
+        _, _, offsets, data = self.id_index
+        start, end = struct.unpack_from('<QQ', self.buffer, offsets + 8 * i)
+        return self.buffer[data + start:data + end].decode('utf-8')
+
+    def row_of(self, record_id):
+        """Row of a record id (the last one if repeated), or None"""
+        count, rows, _, _ = self.id_index
+        key = _id_key(record_id)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _id_key(self._indexed_id(mid)) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0 or self._indexed_id(lo - 1) != record_id:
+            return None
+        return struct.unpack_from('<I', self.buffer, rows + 4 * (lo - 1))[0]
+
+    def get(self, record_id):
+        row = self.row_of(record_id)
+        return None if row is None else self.record(row)
+
+    def order(self, name):
+        """Row numbers of a sort order"""
+        position = self.orders[name]
+        return struct.unpack_from(f'<{self.rows}I', self.buffer, position)
+
+
+class CorpusReader:
+    """
+    Memory-mapped reader for corpus files
+
+    Values are decoded on access, so many processes can share one file
+    through the page cache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:8] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a corpus file")
+        header_length = struct.unpack_from('<Q', self.buffer, 8)[0]
+        self.header = json.loads(self.buffer[16:16 + header_length])
+        base = 16 + header_length
+        self.tables = {name: CorpusTable(self.buffer, base, spec) for name, spec in self.header['tables'].items()}
+
+    def __getitem__(self, table):
+        return self.tables[table]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+def create_corpus(patents, drugs, sort_orders, output_dir='processed_data'):
+    """Write the Cortellis patents and drugs as a corpus file, with the given build_sort_orders output"""
+    print("\n🗄️  WRITING CORPUS FILE...")
+    print("-" * 50)
+
+    corpus_file = os.path.join(output_dir, CORPUS_FILE)
+    with CorpusWriter(corpus_file) as writer:
+        for name, records, record_class in (('patents', patents, PatentRecord), ('drugs', drugs, DrugRecord)):
+            table = writer.table(name, columns=record_class.__slots__)
+            for record in records:
+                table.append(record.to_dict())
+            table.set_orders(resolve_orders(sort_orders[name], table.ids))
+
+    print(f"✅ Corpus: {len(patents)} patents, {len(drugs)} drugs ({os.path.getsize(corpus_file) / (1024 * 1024):.1f} MB)")
+    print(f"   Saved to: {corpus_file}")
+
+    return CORPUS_FILE
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        patents = load_records(PatentRecord, 'processed_data/patents_processed.json')
+        drugs = load_records(DrugRecord, 'processed_data/drugs_processed.json')
+        if os.path.exists('processed_data/sort_orders.json'):
+            with open('processed_data/sort_orders.json', 'r', encoding='utf-8') as f:
+                sort_orders = json.load(f)
+        else:
+            sort_orders = build_sort_orders(
+                patents, drugs, load_records(RelationshipRecord, 'processed_data/relationships.json')
+            )
+        create_corpus(patents, drugs, sort_orders)
+        sys.exit(0)
+
+    with CorpusReader(sys.argv[1]) as corpus:
+        if len(sys.argv) == 4:
+            record = corpus[sys.argv[2]].get(sys.argv[3])
+            print(json.dumps(record, ensure_ascii=False, indent=2) if record else f"{sys.argv[3]} not found")
+        else:
+            for name, table in corpus.tables.items():
+                print(f"{name}: {len(table)} rows, columns {', '.join(table.columns)}")
+                print(f"   orders: {', '.join(table.orders) or 'none'}")
@@ -7,17 +7,44 @@ import os
 import sys
 from datetime import datetime
 
+from pipeline_records import write_json
+from compressed_artifacts import load_index
+from stage_scheduler import Stage
+from generations import publish_generation, index_files
+
 sys.stdout.reconfigure(encoding='utf-8')
 
-def create_unified_index():
-    """Create unified index combining all data sources"""
+UNIFIED_DIR = 'unified_patent_data'
+
+# Files the unified index step copies or writes next to the merged data
+UNIFIED_FILES = ['data_references.json', 'relationships.json',
+                 'patent_statistics.json', 'drug_statistics.json']
+
+
+def publish_unified_generation():
+    """Publish the current unified outputs as a new generation for the API server"""
+    master_index = load_index(os.path.join(UNIFIED_DIR, 'master_index.json')) or {}
+    return publish_generation(UNIFIED_DIR, index_files(master_index) + UNIFIED_FILES)
+
+
+def create_unified_index(publish=True):
+    """
+    Create unified index combining all data sources
+
+    With publish=False the outputs are left for the caller to publish
+    (process_all publishes once, after every stage has finished).
+    """
 
     print("\n" + "=" * 80)
     print("UNIFIED INDEX CREATION")
     print("=" * 80)
 
-    # Load existing data
+    # Load existing data; keep the merged-data sections written by the Google merge
+    index_file = 'unified_patent_data/master_index.json'
     master_index = {}
+    if os.path.exists(index_file):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            master_index = json.load(f)
 
     # Check Cortellis data
     if os.path.exists('processed_data/master_index.json'):
@@ -66,31 +93,29 @@ def create_unified_index():
 
     # Save unified index
     os.makedirs('unified_patent_data', exist_ok=True)
-    index_file = 'unified_patent_data/master_index.json'
 
-    with open(index_file, 'w', encoding='utf-8') as f:
-        json.dump(master_index, f, ensure_ascii=False, indent=2)
+    write_json(master_index, index_file)
 
     print(f"\n✅ Unified index created: {index_file}")
     print(f"   Data sources: {', '.join(master_index['metadata']['data_sources'])}")
 
     # Create lightweight merged data reference (without copying large files)
     if master_index['cortellis']['available']:
-        # Copy small files
+        # Copy small files (not master_index.json, which would overwrite the unified index)
         import shutil
 
         small_files = [
             'relationships.json',
             'patent_statistics.json',
-            'drug_statistics.json',
-            'master_index.json'
+            'drug_statistics.json'
         ]
 
         for filename in small_files:
             src = f'processed_data/{filename}'
             dst = f'unified_patent_data/{filename}'
             if os.path.exists(src):
-                shutil.copy2(src, dst)
+                shutil.copy2(src, f"{dst}.tmp")
+                os.replace(f"{dst}.tmp", dst)
                 print(f"   Copied: {filename}")
 
         # Create symlinks or references for large files
@@ -100,16 +125,34 @@ def create_unified_index():
         }
 
         ref_file = 'unified_patent_data/data_references.json'
-        with open(ref_file, 'w', encoding='utf-8') as f:
-            json.dump(large_files_ref, f, indent=2)
+        write_json(large_files_ref, ref_file)
 
         print(f"   Created data references: data_references.json")
 
+    if publish:
+        publish_unified_generation()
+
     print("\n" + "=" * 80)
     print("✅ UNIFIED INDEX COMPLETE!")
     print("=" * 80)
 
     return master_index
 
+def unified_index_stage(deps=('master_index',)):
+    """Unified index as a stage for CortellisDataProcessor.process_all"""
+    return Stage(
+        'unified_index', lambda: create_unified_index(publish=False),
+        # Only the names of the cached searches are read, not the pages or backfill shards
+        listings=['cache/google_patents'],
+        outputs=[
+            'unified_patent_data/master_index.json',
+            'unified_patent_data/data_references.json',
+            'unified_patent_data/relationships.json',
+            'unified_patent_data/patent_statistics.json',
+            'unified_patent_data/drug_statistics.json'
+        ],
+        deps=deps, uses=[]
+    )
+
 if __name__ == "__main__":
     create_unified_index()
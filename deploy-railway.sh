@@ -40,6 +40,37 @@ else
 fi
 
 echo ""
+
+# Data files are not in git and are uploaded separately (dashboard or
+# volumes). The master index of the last deployed data is kept next to the
+# local one, so only files whose content hash changed need uploading.
+DATA_DIRS="processed_data unified_patent_data"
+DEPLOYED_INDEX=".deployed_master_index.json"
+PYTHON=$(command -v python3 || command -v python)
+
+list_changed_data() {
+    if [ -z "$PYTHON" ]; then
+        echo "    (python not found; upload every data file)"
+        return
+    fi
+    for DIR in $DATA_DIRS; do
+        [ -f "$DIR/master_index.json" ] || continue
+        echo "    $DIR/master_index.json"
+        # The corpus file is not hashed in the master index
+        [ -f "$DIR/corpus.bin" ] && echo "    $DIR/corpus.bin"
+        "$PYTHON" compressed_artifacts.py "$DIR/$DEPLOYED_INDEX" "$DIR/master_index.json" | sed "s|^|    $DIR/|"
+    done
+}
+
+record_deployed_data() {
+    for DIR in $DATA_DIRS; do
+        if [ -f "$DIR/master_index.json" ]; then
+            cp "$DIR/master_index.json" "$DIR/$DEPLOYED_INDEX"
+        fi
+    done
+    echo "✅ Recorded the current data as deployed"
+}
+
 echo "========================================"
 echo "Deployment Options"
 echo "========================================"
@@ -91,6 +122,9 @@ case $CHOICE in
         echo "   b) Use Railway volumes"
         echo "   c) Regenerate with Python scripts"
         echo ""
+        echo "   Changed since the last deploy:"
+        list_changed_data
+        echo ""
         echo "6. Get your URL:"
         echo "   Settings -> Domains -> Generate Domain"
         echo ""
@@ -110,6 +144,12 @@ case $CHOICE in
             echo "Open this URL in your browser:"
             echo "https://railway.app/new"
         fi
+
+        echo ""
+        read -p "Mark the current data as deployed once uploaded? (y/n): " UPLOADED
+        if [ "$UPLOADED" = "y" ]; then
+            record_deployed_data
+        fi
         ;;
 
     2)
@@ -134,9 +174,17 @@ case $CHOICE in
         # Try to initialize
         railway init
 
+        echo ""
+        echo "Data files changed since the last deploy:"
+        list_changed_data
         echo ""
         echo "Deploying to Railway..."
-        railway up
+        if ! railway up; then
+            echo "❌ Deployment failed"
+            exit 1
+        fi
+        # railway up uploads the whole directory, data files included
+        record_deployed_data
 
         echo ""
         echo "✅ Deployment complete!"
@@ -183,11 +231,12 @@ case $CHOICE in
         echo "Step 6: Upload Data Files"
         echo "-------------------------"
         echo "  Use Railway dashboard or volumes"
-        echo "  Upload to: /app/processed_data/"
-        echo "  Required files:"
-        echo "    - patents_processed.json"
-        echo "    - drugs_processed.json"
-        echo "    - relationships.json"
+        echo "  Upload to: /app/processed_data/ and /app/unified_patent_data/"
+        echo "  Files changed since the last deploy:"
+        list_changed_data
+        echo "  Then record them as deployed:"
+        echo "    cp processed_data/master_index.json processed_data/$DEPLOYED_INDEX"
+        echo "    cp unified_patent_data/master_index.json unified_patent_data/$DEPLOYED_INDEX"
         echo ""
         echo "Step 7: Test Deployment"
         echo "-----------------------"
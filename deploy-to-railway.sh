@@ -56,6 +56,40 @@ RAILWAY_USER=$(railway whoami 2>&1 | grep "Logged in as" | cut -d' ' -f4- || ech
 echo "Railway User: $RAILWAY_USER"
 echo ""
 
+# Data files are not in git and are uploaded separately (dashboard or
+# volumes). The master index of the last deployed data is kept next to the
+# local one, so only files whose content hash changed need uploading.
+DATA_DIRS="processed_data unified_patent_data"
+DEPLOYED_INDEX=".deployed_master_index.json"
+PYTHON=$(command -v python3 || command -v python || true)
+
+list_changed_data() {
+    if [ -z "$PYTHON" ]; then
+        echo "    (python not found; upload every data file)"
+        return
+    fi
+    for DIR in $DATA_DIRS; do
+        if [ ! -f "$DIR/master_index.json" ]; then
+            continue
+        fi
+        echo "    $DIR/master_index.json"
+        # The corpus file is not hashed in the master index
+        if [ -f "$DIR/corpus.bin" ]; then
+            echo "    $DIR/corpus.bin"
+        fi
+        "$PYTHON" compressed_artifacts.py "$DIR/$DEPLOYED_INDEX" "$DIR/master_index.json" | sed "s|^|    $DIR/|"
+    done
+}
+
+record_deployed_data() {
+    for DIR in $DATA_DIRS; do
+        if [ -f "$DIR/master_index.json" ]; then
+            cp "$DIR/master_index.json" "$DIR/$DEPLOYED_INDEX"
+        fi
+    done
+    echo -e "${GREEN}✓ Recorded the current data as deployed${NC}"
+}
+
 # Deployment options
 echo "=========================================="
 echo "🎯 Deployment Method"
@@ -87,6 +121,9 @@ echo "2. Select 'Deploy from GitHub repo'"
 echo "3. Choose: mahirkurt/medicines-patent-api"
 echo "4. Wait for build to complete"
 echo "5. Generate domain in Settings → Networking"
+echo "6. Upload the data files changed since the last deploy"
+echo "   (dashboard or volume, under /app/):"
+list_changed_data
 echo ""
 
 # Try to open browser
@@ -103,6 +140,11 @@ fi
 echo ""
 read -p "Press Enter when deployment is complete..."
 
+read -p "Were the data files above uploaded? (y/n): " UPLOADED
+if [ "$UPLOADED" = "y" ]; then
+    record_deployed_data
+fi
+
 echo ""
 echo -e "${BLUE}Step 2: Testing Deployment${NC}"
 echo ""
@@ -0,0 +1,114 @@
+"""
+External Merge Sort
+Sorts JSON-serializable items with bounded memory by spilling sorted runs
+to disk and merging them with heapq.merge, at most MERGE_FAN_IN runs at a time
+"""
+import heapq
+import json
+import os
+import sys
+import tempfile
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# Runs opened at once by one merge; more runs are merged in several passes
+MERGE_FAN_IN = 64
+
+
+class ExternalSorter:
+    """
+    Collects items and yields them sorted by key(item)
+
+    Items are buffered as JSON lines. When the buffer holds more than
+    memory_limit bytes of serialized items it is sorted and written out
+    as a run. Keys must be JSON values that compare in Python (strings,
+    numbers, lists of those). The limit counts serialized bytes; live
+    Python objects take a small multiple of that. At most fan_in run
+    files are open at once; with more runs, groups of fan_in runs are
+    first merged into longer runs.
+    """
+
+    def __init__(self, key, memory_limit=256 * 1024 * 1024, tmp_dir=None, fan_in=MERGE_FAN_IN):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.key = key
+        self.memory_limit = memory_limit
+        self.tmp_dir = tmp_dir
+        self.fan_in = fan_in
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.runs = []
+        self.count = 0
+
+    def add(self, item):
+        line = json.dumps([self.key(item), item], ensure_ascii=False)
+        self.buffer.append(line)
+        self.buffered_bytes += len(line)
+        self.count += 1
+        if self.buffered_bytes >= self.memory_limit:
+            self._spill()
+
+    def _sorted_buffer(self):
+        entries = [json.loads(line) for line in self.buffer]
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    def _write_run(self, entries):
+        fd, path = tempfile.mkstemp(prefix='run-', suffix='.jsonl', dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def _spill(self):
+        self.runs.append(self._write_run(self._sorted_buffer()))
+        self.buffer = []
+        self.buffered_bytes = 0
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _merge_pass(self):
+        """Merge consecutive groups of fan_in runs into one run each, keeping their order"""
+        position = 0
+        while position < len(self.runs):
+            group = self.runs[position:position + self.fan_in]
+            if len(group) == 1:
+                break
+            streams = [self._read_run(path) for path in group]
+            try:
+                merged = self._write_run(heapq.merge(*streams, key=lambda entry: entry[0]))
+            finally:
+                for stream in streams:
+                    stream.close()
+            self.runs[position:position + self.fan_in] = [merged]
+            for path in group:
+                os.remove(path)
+            position += 1
+
+    def sorted(self):
+        """Yield all items in key order; run files are removed afterwards"""
+        streams = []
+        try:
+            # The in-memory buffer is one more stream in the final merge
+            while len(self.runs) >= self.fan_in:
+                self._merge_pass()
+            streams = [self._read_run(path) for path in self.runs]
+            streams.append(entry for entry in self._sorted_buffer())
+            self.buffer = []
+            self.buffered_bytes = 0
+            for _, item in heapq.merge(*streams, key=lambda entry: entry[0]):
+                yield item
+        finally:
+            for stream in streams:
+                stream.close()
+            for path in self.runs:
+                os.remove(path)
+            self.runs = []
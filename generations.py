@@ -0,0 +1,140 @@
+"""
+Data Generations
+Publishes pipeline outputs as immutable numbered generations and flips a
+CURRENT pointer atomically, so the API server can hot-swap to new data
+"""
+import os
+import shutil
+import sys
+import time
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+GENERATIONS_DIR = 'generations'
+CURRENT_FILE = 'CURRENT'
+KEEP_GENERATIONS = 3
+# A replaced generation is kept at least this long, so servers still loading
+# or serving it (watch interval, background reload, lazy file reads) are not
+# pulled out from under
+RETIRE_GRACE_SECONDS = 15 * 60
+
+
+def current_generation(data_dir):
+    """Name of the generation CURRENT points to, or None"""
+    current_file = os.path.join(data_dir, CURRENT_FILE)
+    if not os.path.exists(current_file):
+        return None
+    with open(current_file, 'r', encoding='utf-8') as f:
+        return f.read().strip() or None
+
+
+def _link_or_copy(src, dst):
+    # Pipeline writers replace files atomically, so a hard link is never
+    # modified in place once it is part of a generation
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _unchanged(data_dir, generation, filenames):
+    """True if the generation already holds exactly these working files"""
+    if generation is None:
+        return False
+    generation_dir = os.path.join(data_dir, GENERATIONS_DIR, generation)
+    published = set(os.listdir(generation_dir)) if os.path.isdir(generation_dir) else set()
+    if published != set(filenames):
+        return False
+    return all(
+        os.path.samefile(os.path.join(data_dir, name), os.path.join(generation_dir, name))
+        for name in filenames
+    )
+
+
+def prune_generations(data_dir, keep=KEEP_GENERATIONS, grace=RETIRE_GRACE_SECONDS, now=None):
+    """
+    Delete old generations beyond the newest `keep`
+
+    A generation stopped being CURRENT when its successor was published
+    (the successor directory's mtime). It is only deleted once that is
+    more than `grace` seconds ago. Returns the deleted generation names.
+    """
+    generations_root = os.path.join(data_dir, GENERATIONS_DIR)
+    if not os.path.isdir(generations_root):
+        return []
+    now = time.time() if now is None else now
+    existing = sorted(int(name) for name in os.listdir(generations_root) if name.isdigit())
+    current = current_generation(data_dir)
+
+    deleted = []
+    for old, successor in zip(existing[:max(0, len(existing) - keep)], existing[1:]):
+        name = f"{old:06d}"
+        if name == current:
+            continue
+        replaced_at = os.path.getmtime(os.path.join(generations_root, f"{successor:06d}"))
+        if now - replaced_at < grace:
+            continue
+        shutil.rmtree(os.path.join(generations_root, name), ignore_errors=True)
+        deleted.append(name)
+    return deleted
+
+
+def publish_generation(data_dir, filenames, keep=KEEP_GENERATIONS, grace=RETIRE_GRACE_SECONDS):
+    """
+    Snapshot the given output files of data_dir as a new generation
+
+    The files are hard-linked (or copied) into generations/<number>/,
+    then CURRENT is replaced atomically. The newest `keep` generations
+    are retained, older ones once they have been replaced for `grace`
+    seconds. Nothing is published when the current generation already
+    holds the same files.
+    """
+    print("\n📦 PUBLISHING DATA GENERATION...")
+    print("-" * 50)
+
+    filenames = sorted({f for f in filenames if os.path.exists(os.path.join(data_dir, f))})
+    current = current_generation(data_dir)
+    if _unchanged(data_dir, current, filenames):
+        print(f"   Generation {current} is up to date")
+        return current
+
+    generations_root = os.path.join(data_dir, GENERATIONS_DIR)
+    os.makedirs(generations_root, exist_ok=True)
+    existing = sorted(int(name) for name in os.listdir(generations_root) if name.isdigit())
+    generation = f"{(existing[-1] + 1 if existing else 1):06d}"
+
+    # Build the generation under a temporary name, then rename it into place
+    staging_dir = os.path.join(generations_root, f".{generation}.tmp")
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    for filename in filenames:
+        _link_or_copy(os.path.join(data_dir, filename), os.path.join(staging_dir, filename))
+    os.rename(staging_dir, os.path.join(generations_root, generation))
+
+    # Flip the pointer atomically
+    current_file = os.path.join(data_dir, CURRENT_FILE)
+    tmp_file = f"{current_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(generation + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, current_file)
+
+    prune_generations(data_dir, keep, grace)
+
+    print(f"✅ Published generation {generation} ({len(filenames)} files)")
+    print(f"   Pointer: {current_file}")
+
+    return generation
+
+
+def index_files(master_index):
+    """All files listed in a master index, with their compressed variants"""
+    filenames = ['master_index.json']
+    filenames.extend(master_index.get('files', {}).values())
+    if master_index.get('corpus'):
+        filenames.append(master_index['corpus'])
+    for entry in master_index.get('artifacts', {}).values():
+        filenames.extend(entry[enc]['file'] for enc in ('gzip', 'zstd') if enc in entry)
+    return filenames
@@ -0,0 +1,316 @@
+"""
+Resumable Google Patents Backfill
+Searches Google Patents for every Cortellis drug, one (drug, query, page)
+unit at a time, with an append-only checkpoint journal and sharded
+JSONL output
+
+Usage:
+    python google_patents_backfill.py                 start or resume the backfill
+    python google_patents_backfill.py --max-drugs 500 stop after the first 500 drugs
+    python google_patents_backfill.py --export        write the merge stage input from the shards
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import requests
+
+from google_patents_integration import (GooglePatentsAPI, DRUG_QUERY_TEMPLATES, GOOGLE_SEARCH_RESULTS,
+                                        serpapi_api_key)
+from pipeline_records import DrugRecord, RelationshipRecord, PatentRecord, load_records
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+BACKFILL_DIR = 'cache/google_patents/backfill'
+JOURNAL_FILE = 'journal.jsonl'
+SHARD_BYTES = 64 * 1024 * 1024
+PAGE_SIZE = 10
+
+
+def shard_name(index):
+    return f"shard-{index:05d}.jsonl"
+
+
+def shard_index(name):
+    return int(name[len('shard-'):-len('.jsonl')])
+
+
+def _append_line(f, entry):
+    f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class BackfillJournal:
+    """
+    Append-only checkpoint journal
+
+    The first line is the plan (drug order, queries, pages per query).
+    Every later line records one completed (drug, query, page) unit and
+    where its results end in the shard files. A line torn by a crash
+    is ignored; its unit is fetched again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.plan = None
+        self.completed = {}
+        self.last_entry = None
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break
+                    entry = json.loads(line)
+                    if 'plan' in entry:
+                        self.plan = entry
+                    else:
+                        self.completed[(entry['drug'], entry['query'])] = entry
+                        self.last_entry = entry
+            self._truncate_torn_line()
+
+        self.file = open(path, 'ab')
+
+    def _truncate_torn_line(self):
+        # Cut everything after the last complete line
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            f.truncate(end)
+
+    def start(self, plan):
+        self.plan = plan
+        _append_line(self.file, plan)
+
+    def next_page(self, drug, query):
+        """Next page to fetch for a query, or None when the query is done"""
+        entry = self.completed.get((drug, query))
+        if entry is None:
+            return 0
+        if entry['exhausted'] or entry['page'] + 1 >= self.plan['pages']:
+            return None
+        return entry['page'] + 1
+
+    def record(self, entry):
+        _append_line(self.file, entry)
+        self.completed[(entry['drug'], entry['query'])] = entry
+        self.last_entry = entry
+
+    def close(self):
+        self.file.close()
+
+
+class ShardWriter:
+    """
+    Appends result lines to numbered JSONL shards
+
+    On resume, every shard is cut back to the last journaled offset, so
+    results written after the last checkpoint are dropped and refetched
+    rather than duplicated.
+    """
+
+    def __init__(self, directory, last_entry=None, max_bytes=SHARD_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index = shard_index(last_entry['shard']) if last_entry else 0
+        offset = last_entry['offset'] if last_entry else 0
+
+        for name in os.listdir(directory):
+            if name.startswith('shard-') and name.endswith('.jsonl') and shard_index(name) > self.index:
+                os.remove(os.path.join(directory, name))
+
+        self.file = open(os.path.join(directory, shard_name(self.index)), 'ab')
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def write(self, records):
+        """Append records durably; returns (shard name, end offset)"""
+        if self.file.tell() >= self.max_bytes:
+            self.file.close()
+            self.index += 1
+            self.file = open(os.path.join(self.directory, shard_name(self.index)), 'ab')
+            self.file.truncate(0)
+
+        for record in records:
+            self.file.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return shard_name(self.index), self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def prioritized_drugs(patents, drugs, relationships):
+    """Drug names, most-patented first"""
+    counts = Counter(r.drug_id for r in relationships)
+    if not counts:
+        # Without relationships, count drug mentions on patents
+        ids_by_name = {d.name.lower(): d.id for d in drugs if d.name}
+        counts = Counter(ids_by_name.get(name.lower()) for p in patents for name in p.drugs or ())
+
+    ranked = sorted((d for d in drugs if d.name), key=lambda d: counts.get(d.id, 0), reverse=True)
+    seen = set()
+    names = []
+    for drug in ranked:
+        if drug.name.lower() not in seen:
+            seen.add(drug.name.lower())
+            names.append(drug.name)
+    return names
+
+
+def run_backfill(api, drug_names, backfill_dir=BACKFILL_DIR, pages=1, max_drugs=None, retries=3):
+    """
+    Fetch every (drug, query, page) unit not yet in the journal
+
+    Results of a unit are written to the shards before the unit is
+    journaled. Returns True when every planned unit is done; stops early
+    (returning False) after `max_drugs` drugs or when a unit keeps
+    failing, with all completed units kept.
+    """
+    os.makedirs(backfill_dir, exist_ok=True)
+    journal = BackfillJournal(os.path.join(backfill_dir, JOURNAL_FILE))
+    if journal.plan is None:
+        journal.start({
+            'plan': drug_names,
+            'queries': DRUG_QUERY_TEMPLATES,
+            'pages': pages,
+            'created': datetime.now().isoformat()
+        })
+    else:
+        print(f"   Resuming journal from {journal.plan['created']} ({len(journal.completed)} queries started)")
+
+    shards = ShardWriter(backfill_dir, journal.last_entry)
+    plan = journal.plan
+    fetched = 0
+
+    try:
+        for position, drug in enumerate(plan['plan'], 1):
+            if max_drugs is not None and position > max_drugs:
+                return False
+
+            for template in plan['queries']:
+                query = template.format(drug=drug)
+                page = journal.next_page(drug, query)
+                while page is not None:
+                    for attempt in range(1, retries + 1):
+                        try:
+                            results = api.fetch_page(query, page * PAGE_SIZE, plan['pages'] * PAGE_SIZE)
+                            break
+                        except requests.exceptions.RequestException as e:
+                            print(f"  ⚠️ {query!r} page {page} failed (attempt {attempt}/{retries}): {e}")
+                            if attempt == retries:
+                                print("  Stopping; rerun to resume from this unit")
+                                return False
+                            time.sleep(2 ** attempt)
+
+                    for result in results:
+                        result['search_category'] = drug
+                        result['query'] = query
+                    shard, offset = shards.write(results)
+
+                    exhausted = len(results) < PAGE_SIZE
+                    journal.record({
+                        'drug': drug, 'query': query, 'page': page,
+                        'results': len(results), 'exhausted': exhausted,
+                        'shard': shard, 'offset': offset
+                    })
+                    fetched += 1
+                    page = None if exhausted else journal.next_page(drug, query)
+
+            if position % 100 == 0:
+                print(f"  Completed {position}/{len(plan['plan'])} drugs ({fetched} pages fetched this run)")
+        return True
+    finally:
+        shards.close()
+        journal.close()
+
+
+def iter_backfill_results(backfill_dir=BACKFILL_DIR):
+    """Stream every result line from the shards, in fetch order"""
+    names = sorted(n for n in os.listdir(backfill_dir) if n.startswith('shard-') and n.endswith('.jsonl'))
+    for name in names:
+        with open(os.path.join(backfill_dir, name), 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def export_search_results(backfill_dir=BACKFILL_DIR, output_file=GOOGLE_SEARCH_RESULTS):
+    """
+    Write the merge stage input ({drug: [patents]}) from the shards
+
+    The plan fixes the drug order, so each drug's results are contiguous
+    and one drug at a time is held in memory.
+    """
+    def drug_entry(drug, unique):
+        # Results are deduplicated across the drug's queries
+        return json.dumps(drug, ensure_ascii=False) + ': ' + json.dumps(list(unique.values()), ensure_ascii=False)
+
+    tmp_path = f"{output_file}.tmp"
+    categories = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        current, unique = None, {}
+        for result in iter_backfill_results(backfill_dir):
+            drug = result.pop('search_category')
+            result.pop('query', None)
+            if drug != current:
+                if current is not None:
+                    f.write((', ' if categories else '') + drug_entry(current, unique))
+                    categories += 1
+                current, unique = drug, {}
+            unique[result['id']] = result
+        if current is not None:
+            f.write((', ' if categories else '') + drug_entry(current, unique))
+            categories += 1
+        f.write('}')
+    os.replace(tmp_path, output_file)
+    return categories
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resumable Google Patents backfill for all Cortellis drugs')
+    parser.add_argument('--pages', type=int, default=1, help='pages of 10 results per query (new journals only)')
+    parser.add_argument('--max-drugs', type=int, help='stop after this many drugs of the plan')
+    parser.add_argument('--dir', default=BACKFILL_DIR, help='journal and shard directory')
+    parser.add_argument('--export', action='store_true', help=f'write {GOOGLE_SEARCH_RESULTS} from the shards')
+    args = parser.parse_args()
+
+    if args.export:
+        print("\n📤 EXPORTING BACKFILL RESULTS...")
+        print("-" * 50)
+        categories = export_search_results(args.dir)
+        print(f"✅ Exported {categories} drugs to {GOOGLE_SEARCH_RESULTS}")
+        return
+
+    api_key = serpapi_api_key()
+
+    print("\n" + "=" * 80)
+    print("GOOGLE PATENTS BACKFILL")
+    print("=" * 80)
+
+    patents = load_records(PatentRecord, 'processed_data/patents_processed.json')
+    drugs = load_records(DrugRecord, 'processed_data/drugs_processed.json')
+    relationships_file = 'processed_data/relationships.json'
+    relationships = load_records(RelationshipRecord, relationships_file) if os.path.exists(relationships_file) else []
+
+    drug_names = prioritized_drugs(patents, drugs, relationships)
+    print(f"   Drugs: {len(drug_names)} (most-patented first)")
+    print(f"   Journal: {os.path.join(args.dir, JOURNAL_FILE)}")
+
+    done = run_backfill(GooglePatentsAPI(api_key), drug_names, args.dir, args.pages, args.max_drugs)
+
+    print("\n" + "=" * 80)
+    print("✅ BACKFILL COMPLETE!" if done else "⏸️  BACKFILL PAUSED - rerun to resume")
+    print("=" * 80)
+    if not done:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,46 @@ import sys
 import json
 import time
 import hashlib
+import tempfile
+from array import array
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import requests
 from urllib.parse import quote
 
+from pipeline_records import PatentRecord, DrugRecord, load_records, write_records, write_json, write_json_array
+from external_sort import ExternalSorter
+from corpus_file import CorpusWriter, CORPUS_FILE, resolve_orders
+from compressed_artifacts import publish_artifacts, load_index
+from stage_scheduler import Stage
+from create_unified_index import publish_unified_generation
+
 # Set UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
 
+# Latest pharmaceutical search results, input of the merge stage
+GOOGLE_SEARCH_RESULTS = 'cache/google_patents/search_results.json'
+
+
+def serpapi_api_key() -> str:
+    """SerpAPI key from the SERPAPI_API_KEY environment variable; exits when it is unset"""
+    api_key = os.environ.get('SERPAPI_API_KEY', '').strip()
+    if not api_key:
+        print("❌ SERPAPI_API_KEY is not set; export your SerpAPI key to search Google Patents")
+        sys.exit(1)
+    return api_key
+
+
+# Google Patents queries run for every drug
+DRUG_QUERY_TEMPLATES = [
+    '"{drug}" pharmaceutical',
+    '"{drug}" formulation',
+    '"{drug}" composition',
+    '"{drug}" method treatment'
+]
+
 class GooglePatentsAPI:
     def __init__(self, api_key: str):
         self.api_key = api_key
@@ -25,73 +57,65 @@ class GooglePatentsAPI:
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
 
-    def search_patents(self, query: str, num_results: int = 100) -> List[Dict]:
-        """
-        Search Google Patents using SerpAPI
+    def fetch_page(self, query: str, offset: int, num_results: int = 100) -> List[Dict]:
         """
-        print(f"\n🔍 Searching Google Patents for: {query}")
+        Fetch one page of up to 10 search results starting at offset
 
-        all_results = []
-        offset = 0
+        Pages are cached for 24 hours. Request errors are raised to the
+        caller; an empty list means there are no more results.
+        """
+        # Check cache first
+        cache_key = f"{query}_{offset}_{num_results}"
+        cache_file = os.path.join(self.cache_dir, f"{hashlib.md5(cache_key.encode()).hexdigest()}.json")
 
-        while len(all_results) < num_results:
-            # Check cache first
-            cache_key = f"{query}_{offset}_{num_results}"
-            cache_file = os.path.join(self.cache_dir, f"{hashlib.md5(cache_key.encode()).hexdigest()}.json")
-
-            if os.path.exists(cache_file):
-                # Load from cache if less than 24 hours old
-                cache_age = time.time() - os.path.getmtime(cache_file)
-                if cache_age < 86400:  # 24 hours
-                    print(f"  Loading from cache (offset={offset})...")
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        cached_data = json.load(f)
-                        all_results.extend(cached_data.get('patents', []))
-                        offset += 10
-                        continue
-
-            # Make API request
-            params = {
-                'engine': 'google_patents',
-                'q': query,
-                'api_key': self.api_key,
-                'start': offset,
-                'num': min(10, num_results - len(all_results))  # Google Patents returns max 10 per request
-            }
-
-            print(f"  Fetching results (offset={offset})...")
+        if os.path.exists(cache_file):
+            # Load from cache if less than 24 hours old
+            cache_age = time.time() - os.path.getmtime(cache_file)
+            if cache_age < 86400:  # 24 hours
+                print(f"  Loading from cache (offset={offset})...")
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('patents', [])
 
-            try:
-                response = requests.get(self.base_url, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
+        # Make API request
+        params = {
+            'engine': 'google_patents',
+            'q': query,
+            'api_key': self.api_key,
+            'start': offset,
+            'num': min(10, num_results - offset)  # Google Patents returns max 10 per request
+        }
 
-                # Extract patent results
-                patents = data.get('organic_results', [])
+        print(f"  Fetching results (offset={offset})...")
 
-                if not patents:
-                    print(f"  No more results found.")
-                    break
+        response = requests.get(self.base_url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
 
-                # Process and standardize patent data
-                processed_patents = []
-                for patent in patents:
-                    processed_patent = self._process_patent_result(patent)
-                    processed_patents.append(processed_patent)
+        # Process and standardize patent data
+        processed_patents = [self._process_patent_result(patent) for patent in data.get('organic_results', [])]
 
-                all_results.extend(processed_patents)
+        if processed_patents:
+            # Cache the results
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'patents': processed_patents, 'timestamp': datetime.now().isoformat()}, f)
 
-                # Cache the results
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump({'patents': processed_patents, 'timestamp': datetime.now().isoformat()}, f)
+        # Rate limiting
+        time.sleep(1)
 
-                print(f"  Found {len(processed_patents)} patents (total: {len(all_results)})")
+        return processed_patents
 
-                # Rate limiting
-                time.sleep(1)
+    def search_patents(self, query: str, num_results: int = 100) -> List[Dict]:
+        """
+        Search Google Patents using SerpAPI
+        """
+        print(f"\n🔍 Searching Google Patents for: {query}")
 
-                offset += 10
+        all_results = []
+        offset = 0
 
+        while len(all_results) < num_results:
+            try:
+                patents = self.fetch_page(query, offset, num_results)
             except requests.exceptions.RequestException as e:
                 print(f"  ⚠️ API request failed: {e}")
                 break
@@ -99,6 +123,15 @@ class GooglePatentsAPI:
                 print(f"  ⚠️ Error processing results: {e}")
                 break
 
+            if not patents:
+                print(f"  No more results found.")
+                break
+
+            all_results.extend(patents)
+            print(f"  Found {len(patents)} patents (total: {len(all_results)})")
+
+            offset += 10
+
         return all_results[:num_results]
 
     def get_patent_details(self, patent_id: str) -> Optional[Dict]:
@@ -213,12 +246,7 @@ class GooglePatentsAPI:
             print(f"\n🔬 Searching patents for drug: {drug_name}")
 
             # Search queries
-            queries = [
-                f'"{drug_name}" pharmaceutical',
-                f'"{drug_name}" formulation',
-                f'"{drug_name}" composition',
-                f'"{drug_name}" method treatment'
-            ]
+            queries = [template.format(drug=drug_name) for template in DRUG_QUERY_TEMPLATES]
 
             drug_patents = []
             for query in queries:
@@ -252,6 +280,97 @@ class GooglePatentsAPI:
         return all_patents
 
 
+def cortellis_data(patent: PatentRecord) -> Dict:
+    """
+    Cortellis fields attached to a Google patent that matches a Cortellis patent
+    """
+    return {
+        'compound_name': patent.compound_name,
+        'drugs': list(patent.drugs or ()),
+        'medical_uses': list(patent.medical_uses or ()),
+        'targets': list(patent.targets or ()),
+        'mechanisms': list(patent.mechanisms or ()),
+        'advantages': patent.advantages,
+        'biology': patent.biology,
+        'chemistry': patent.chemistry,
+        'formulation': patent.formulation
+    }
+
+
+class _JsonStream:
+    """Incremental reader for one large JSON object, value by value"""
+
+    def __init__(self, f, chunk_size=1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+
+    def _read_more(self, size):
+        more = self.f.read(size)
+        if not more:
+            return False
+        self.buffer = self.buffer[self.pos:] + more
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more(self.chunk_size):
+                raise ValueError('Unexpected end of JSON input')
+
+    def next_char(self):
+        """Skip whitespace and consume the next character"""
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value, reading until it is complete"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                self.pos = end
+                return value
+            except json.JSONDecodeError:
+                if not self._read_more(size):
+                    raise
+                size = max(size, len(self.buffer))
+
+
+def iter_search_results(file_path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Stream (category, patent) pairs from a search results file
+
+    The file is the {category: [patents]} object written by main() or the
+    backfill export. Only one category's patents are held in memory.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f)
+        if stream.next_char() != '{':
+            raise ValueError(f"{file_path} is not a JSON object")
+        while True:
+            char = stream.peek()
+            if char in '},':
+                stream.pos += 1
+                if char == '}':
+                    return
+                continue
+            category = stream.value()
+            if stream.next_char() != ':':
+                raise ValueError(f"Malformed JSON object in {file_path}")
+            for patent in stream.value():
+                yield category, patent
+
+
 class PatentDataMerger:
     """
     Merges Cortellis and Google Patents data
@@ -263,7 +382,7 @@ class PatentDataMerger:
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
-    def merge_patent_data(self, cortellis_patents: List[Dict], google_patents: Dict) -> List[Dict]:
+    def merge_patent_data(self, cortellis_patents: List[PatentRecord], google_patents: Dict) -> List[Dict]:
         """
         Merge Cortellis and Google Patents data
         """
@@ -275,10 +394,10 @@ class PatentDataMerger:
         # Create lookup dictionaries
         cortellis_by_number = {}
         for patent in cortellis_patents:
-            if patent.get('patent_number'):
-                cortellis_by_number[patent['patent_number']] = patent
-            if patent.get('application_number'):
-                cortellis_by_number[patent['application_number']] = patent
+            if patent.patent_number:
+                cortellis_by_number[patent.patent_number] = patent
+            if patent.application_number:
+                cortellis_by_number[patent.application_number] = patent
 
         # Process Google Patents
         google_patent_list = []
@@ -305,17 +424,7 @@ class PatentDataMerger:
             if cortellis_match:
                 # Merge data from both sources
                 merged_patent['data_sources'] = ['Cortellis', 'Google Patents']
-                merged_patent['cortellis_data'] = {
-                    'compound_name': cortellis_match.get('compound_name'),
-                    'drugs': cortellis_match.get('drugs', []),
-                    'medical_uses': cortellis_match.get('medical_uses', []),
-                    'targets': cortellis_match.get('targets', []),
-                    'mechanisms': cortellis_match.get('mechanisms', []),
-                    'advantages': cortellis_match.get('advantages'),
-                    'biology': cortellis_match.get('biology'),
-                    'chemistry': cortellis_match.get('chemistry'),
-                    'formulation': cortellis_match.get('formulation')
-                }
+                merged_patent['cortellis_data'] = cortellis_data(cortellis_match)
                 matched_count += 1
             else:
                 merged_patent['data_sources'] = ['Google Patents']
@@ -332,7 +441,7 @@ class PatentDataMerger:
             )
 
             if not already_merged:
-                merged_patent = cortellis_patent.copy()
+                merged_patent = cortellis_patent.to_dict()
                 merged_patent['data_sources'] = ['Cortellis']
                 merged_patents.append(merged_patent)
 
@@ -343,24 +452,166 @@ class PatentDataMerger:
 
         return merged_patents
 
-    def save_unified_data(self, merged_patents: List[Dict], merged_drugs: List[Dict]):
+    def merge_patent_data_external(self, cortellis_patents: Iterable[PatentRecord],
+                                   google_patents: Iterable[Tuple[str, Dict]],
+                                   memory_limit: int = 256 * 1024 * 1024,
+                                   tmp_dir: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Out-of-core merge with the same output as merge_patent_data
+
+        google_patents yields (category, patent) pairs. Both sources are
+        spilled as runs sorted by patent number key and joined in one
+        streaming pass; the merged patents are then yielded in the order
+        merge_patent_data returns them. Sort buffers stay under
+        memory_limit bytes of serialized data. Sort entries refer to
+        Cortellis records by row; the records are written once to a row
+        file and read back by offset when they are emitted.
+        """
+        print("\n🔗 MERGING PATENT DATA (external sort)...")
+        print("-" * 50)
+
+        KEY, CLAIM, PROBE = 0, 1, 2
+
+        with tempfile.TemporaryDirectory(prefix='patent-merge-', dir=tmp_dir) as work_dir, \
+                open(os.path.join(work_dir, 'cortellis.jsonl'), 'w+b') as records:
+            # Entries per patent number key, sorted by (key, kind, ordinal):
+            #   KEY    a cortellis_by_number insertion (ordinal 2*row or 2*row+1)
+            #   CLAIM  a Cortellis patent whose id or application number is the key;
+            #          once that patent is added, the key counts as already merged
+            #   PROBE  a Google patent looking the key up by id or application number
+            by_key = ExternalSorter(lambda e: e[:3], memory_limit, work_dir)
+
+            # Byte offset of each Cortellis record (one JSON line) in the row file
+            offsets = array('Q')
+
+            def record_at(row):
+                records.seek(offsets[row])
+                return json.loads(records.readline())
+
+            for row, patent in enumerate(cortellis_patents):
+                offsets.append(records.tell())
+                records.write((json.dumps(patent.to_dict(), ensure_ascii=False) + '\n').encode('utf-8'))
+                for ordinal, key in ((2 * row, patent.patent_number), (2 * row + 1, patent.application_number)):
+                    if key:
+                        by_key.add([key, KEY, ordinal, row])
+                for key in (patent.id, patent.application_number):
+                    if key:
+                        by_key.add([key, CLAIM, row])
+
+            # Google patents are kept in input order for the output pass
+            google_file = os.path.join(work_dir, 'google.jsonl')
+            n_google = 0
+            with open(google_file, 'w', encoding='utf-8') as f:
+                for index, (category, patent) in enumerate(google_patents):
+                    n_google += 1
+                    patent['search_category'] = category
+                    f.write(json.dumps(patent, ensure_ascii=False) + '\n')
+                    for lookup, key in ((0, patent.get('id', '')), (1, patent.get('application_number', ''))):
+                        if key:
+                            by_key.add([key, PROBE, index, lookup])
+
+            print(f"   Spilled {by_key.count} join entries in {len(by_key.runs) + 1} runs")
+
+            # Join pass: one group per key
+            by_position = ExternalSorter(lambda e: e[0], memory_limit // 2, work_dir)
+            matches = ExternalSorter(lambda e: e[:2], memory_limit // 2, work_dir)
+            for _, group in groupby(by_key.sorted(), key=lambda e: e[0]):
+                entries, claimers, probes = [], [], []
+                for entry in group:
+                    (entries, claimers, probes)[entry[1]].append(entry)
+                if not entries:
+                    continue
+                # Dict semantics: first insertion sets the position, last one the value
+                row = entries[-1][3]
+                by_position.add([entries[0][2], row, bool(probes), [c[2] for c in claimers]])
+                for probe in probes:
+                    matches.add([probe[2], probe[3], row])
+
+            # Google patents in input order; a match by id wins over one by application number
+            matched_count = 0
+            match_stream = matches.sorted()
+            next_match = next(match_stream, None)
+            with open(google_file, 'r', encoding='utf-8') as f:
+                for index, line in enumerate(f):
+                    merged_patent = json.loads(line)
+                    match = None
+                    while next_match is not None and next_match[0] == index:
+                        if match is None:
+                            match = next_match[2]
+                        next_match = next(match_stream, None)
+
+                    if match is not None:
+                        merged_patent['data_sources'] = ['Cortellis', 'Google Patents']
+                        merged_patent['cortellis_data'] = cortellis_data(PatentRecord.from_dict(record_at(match)))
+                        matched_count += 1
+                    else:
+                        merged_patent['data_sources'] = ['Google Patents']
+                    yield merged_patent
+
+            # Cortellis-only patents in cortellis_by_number order
+            added = bytearray(len(offsets))
+            n_keys = 0
+            n_merged = n_google
+            for _, row, google_claimed, claimers in by_position.sorted():
+                n_keys += 1
+                if google_claimed or any(added[c] for c in claimers):
+                    continue
+                added[row] = 1
+                record = record_at(row)
+                record['data_sources'] = ['Cortellis']
+                n_merged += 1
+                yield record
+
+        print(f"✅ Merged {n_merged} total patents")
+        print(f"   Matched: {matched_count}")
+        print(f"   Cortellis only: {n_keys - matched_count}")
+        print(f"   Google only: {n_google - matched_count}")
+
+    def save_unified_data(self, merged_patents: Iterable[Dict], merged_drugs: List[DrugRecord]) -> int:
         """
         Save unified patent and drug data
         """
         print("\n💾 SAVING UNIFIED DATA...")
         print("-" * 50)
 
-        # Save merged patents
+        # Save merged patents as they arrive, counting their sources and
+        # adding them to the corpus file
+        source_counts = Counter()
         patents_file = os.path.join(self.output_dir, 'unified_patents.json')
-        with open(patents_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_patents, f, ensure_ascii=False, indent=2)
-        print(f"   Saved patents to: {patents_file}")
-
-        # Save merged drugs (from Cortellis)
         drugs_file = os.path.join(self.output_dir, 'unified_drugs.json')
-        with open(drugs_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_drugs, f, ensure_ascii=False, indent=2)
-        print(f"   Saved drugs to: {drugs_file}")
+
+        with CorpusWriter(os.path.join(self.output_dir, CORPUS_FILE)) as corpus:
+            patents_table = corpus.table('patents')
+
+            def counted(patents):
+                for patent in patents:
+                    sources = patent.get('data_sources', [])
+                    source_counts['total'] += 1
+                    source_counts['cortellis_only'] += sources == ['Cortellis']
+                    source_counts['google_only'] += sources == ['Google Patents']
+                    source_counts['both'] += len(sources) > 1
+                    patents_table.append(patent)
+                    yield patent
+
+            write_json_array(counted(merged_patents), patents_file)
+            print(f"   Saved patents to: {patents_file}")
+
+            # Save merged drugs (from Cortellis)
+            write_records(merged_drugs, drugs_file)
+            print(f"   Saved drugs to: {drugs_file}")
+
+            drugs_table = corpus.table('drugs', columns=DrugRecord.__slots__)
+            for drug in merged_drugs:
+                drugs_table.append(drug.to_dict())
+
+            # Cortellis sort orders, resolved to the unified rows
+            orders_file = os.path.join(self.cortellis_dir, 'sort_orders.json')
+            if os.path.exists(orders_file):
+                with open(orders_file, 'r', encoding='utf-8') as f:
+                    sort_orders = json.load(f)
+                patents_table.set_orders(resolve_orders(sort_orders.get('patents'), patents_table.ids))
+                drugs_table.set_orders(resolve_orders(sort_orders.get('drugs'), drugs_table.ids))
+        print(f"   Saved corpus to: {os.path.join(self.output_dir, CORPUS_FILE)}")
 
         # Create master index
         master_index = {
@@ -370,27 +621,68 @@ class PatentDataMerger:
                 'version': '2.0'
             },
             'statistics': {
-                'total_patents': len(merged_patents),
+                'total_patents': source_counts['total'],
                 'total_drugs': len(merged_drugs),
                 'data_sources': {
-                    'cortellis_only': len([p for p in merged_patents if p.get('data_sources') == ['Cortellis']]),
-                    'google_only': len([p for p in merged_patents if p.get('data_sources') == ['Google Patents']]),
-                    'both': len([p for p in merged_patents if len(p.get('data_sources', [])) > 1])
+                    'cortellis_only': source_counts['cortellis_only'],
+                    'google_only': source_counts['google_only'],
+                    'both': source_counts['both']
                 }
             },
             'files': {
                 'patents': 'unified_patents.json',
                 'drugs': 'unified_drugs.json'
-            }
+            },
+            'corpus': CORPUS_FILE
         }
 
         index_file = os.path.join(self.output_dir, 'master_index.json')
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(master_index, f, ensure_ascii=False, indent=2)
+        master_index['artifacts'] = publish_artifacts(
+            self.output_dir, master_index['files'].values(), load_index(index_file)
+        )
+
+        write_json(master_index, index_file)
         print(f"   Saved master index to: {index_file}")
 
         print("\n✅ Unified data saved successfully!")
 
+        return source_counts['total']
+
+
+def google_merge_stage(search_results_file: str = GOOGLE_SEARCH_RESULTS,
+                       memory_limit: Optional[int] = None) -> Stage:
+    """
+    Google Patents merge as a stage for CortellisDataProcessor.process_all
+
+    With memory_limit (bytes) the merge runs out of core, streaming the
+    search results and the unified output.
+    """
+    merger = PatentDataMerger()
+
+    def run(patents, drugs):
+        if memory_limit:
+            merged_patents = merger.merge_patent_data_external(
+                patents, iter_search_results(search_results_file), memory_limit
+            )
+        else:
+            with open(search_results_file, 'r', encoding='utf-8') as f:
+                google_patents = json.load(f)
+            merged_patents = merger.merge_patent_data(patents, google_patents)
+        return merger.save_unified_data(merged_patents, drugs)
+
+    return Stage(
+        'google_merge', run,
+        inputs=[search_results_file],
+        outputs=[
+            os.path.join(merger.output_dir, 'unified_patents.json'),
+            os.path.join(merger.output_dir, 'unified_drugs.json'),
+            os.path.join(merger.output_dir, CORPUS_FILE)
+        ],
+        # The corpus file takes its sort orders from the sort_orders stage
+        deps=['patents', 'drugs', 'sort_orders'], uses=['patents', 'drugs'],
+        version='2'
+    )
+
 
 def main():
     """
@@ -401,8 +693,7 @@ def main():
     print("=" * 80)
 
     # Initialize Google Patents API
-    api_key = "20860d94b3b1f4f197f2aa79c0cf7bb0b429431cb97a5257a53b5070068ac455"
-    google_api = GooglePatentsAPI(api_key)
+    google_api = GooglePatentsAPI(serpapi_api_key())
 
     # Load processed Cortellis data if available
     cortellis_patents = []
@@ -410,24 +701,22 @@ def main():
 
     if os.path.exists('processed_data/patents_processed.json'):
         print("\n📂 Loading Cortellis data...")
-        with open('processed_data/patents_processed.json', 'r', encoding='utf-8') as f:
-            cortellis_patents = json.load(f)
+        cortellis_patents = load_records(PatentRecord, 'processed_data/patents_processed.json')
         print(f"   Loaded {len(cortellis_patents)} Cortellis patents")
 
-        with open('processed_data/drugs_processed.json', 'r', encoding='utf-8') as f:
-            cortellis_drugs = json.load(f)
+        cortellis_drugs = load_records(DrugRecord, 'processed_data/drugs_processed.json')
         print(f"   Loaded {len(cortellis_drugs)} Cortellis drugs")
 
     # Extract drug names for Google Patents search
     drug_names = []
     for drug in cortellis_drugs[:20]:  # Limit for demo
-        if drug.get('name'):
-            drug_names.append(drug['name'])
+        if drug.name:
+            drug_names.append(drug.name)
 
     # Extract common indications
     indication_counts = {}
     for drug in cortellis_drugs:
-        for indication in drug.get('active_indications', []):
+        for indication in drug.active_indications or ():
             indication_counts[indication] = indication_counts.get(indication, 0) + 1
 
     top_indications = sorted(indication_counts.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -440,14 +729,19 @@ def main():
     # Search Google Patents
     google_patents = google_api.search_pharmaceutical_patents(drug_names, indications)
 
+    # Keep the search results so the merge stage can rerun without the API
+    with open(GOOGLE_SEARCH_RESULTS, 'w', encoding='utf-8') as f:
+        json.dump(google_patents, f, ensure_ascii=False)
+
     # Initialize merger
     merger = PatentDataMerger()
 
     # Merge data
     merged_patents = merger.merge_patent_data(cortellis_patents, google_patents)
 
-    # Save unified data
+    # Save unified data and publish it for the API server
     merger.save_unified_data(merged_patents, cortellis_drugs)
+    publish_unified_generation()
 
     print("\n" + "=" * 80)
     print("✅ INTEGRATION COMPLETE!")
@@ -0,0 +1,320 @@
+"""
+Patent Knowledge Graph
+Typed graph of patents, drugs, targets, mechanisms and companies stored as
+CSR adjacency arrays per edge type, with k-hop and intersection queries
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+from company_index import company_key
+from pipeline_records import PatentRecord, DrugRecord, RelationshipRecord, load_records, write_json
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+NODE_TYPES = ('patent', 'drug', 'target', 'mechanism', 'company')
+
+# Edge type -> (source node type, destination node type)
+EDGE_TYPES = {
+    'patent_drug': ('patent', 'drug'),
+    'patent_target': ('patent', 'target'),
+    'patent_mechanism': ('patent', 'mechanism'),
+    'patent_company': ('patent', 'company'),
+    'drug_target': ('drug', 'target'),
+    'drug_mechanism': ('drug', 'mechanism'),
+    'drug_company': ('drug', 'company')
+}
+
+GRAPH_FILE = 'knowledge_graph.npz'
+NODES_FILE = 'knowledge_graph_nodes.json'
+
+
+def _fold(name):
+    return ' '.join(name.split()).lower()
+
+
+def node_key(node_type, value):
+    """Lookup key of a node: patent and drug IDs as-is, companies by company_key, other names case-folded"""
+    if node_type in ('patent', 'drug'):
+        return value
+    if node_type == 'company':
+        return company_key(value)
+    return _fold(value)
+
+
+def drug_node_key(drug):
+    """Node key of a drug: its ID, or its name for drugs without one"""
+    return drug.id or drug.name
+
+
+def _csr(rows, columns, n_rows):
+    """indptr/indices of the (row, column) pairs, grouped by row"""
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, columns[order].astype(np.int32)
+
+
+class KnowledgeGraph:
+    """
+    Heterogeneous graph with one forward and one reverse CSR per edge type
+
+    Nodes of each type are numbered 0..n-1. `keys[type]` holds their lookup
+    keys and `labels[type]` their display names. `edges[name]` holds
+    'indptr'/'indices' (source -> destinations) and 'rev_indptr'/
+    'rev_indices' (destination -> sources).
+    """
+
+    def __init__(self, keys, labels, edges, drug_phases=None):
+        self.keys = keys
+        self.labels = labels
+        self.edges = edges
+        self.drug_phases = drug_phases or []
+        self.index = {t: {k: i for i, k in enumerate(keys[t])} for t in NODE_TYPES}
+        # Drugs can also be looked up by name
+        self.drug_names = {}
+        for i, label in enumerate(labels['drug']):
+            self.drug_names.setdefault(_fold(label), i)
+
+    @classmethod
+    def build(cls, patents, drugs, relationships):
+        """Build the graph from processed patents, drugs and relationships"""
+        keys = {t: [] for t in NODE_TYPES}
+        labels = {t: [] for t in NODE_TYPES}
+        lookup = {t: {} for t in NODE_TYPES}
+        pairs = {name: ([], []) for name in EDGE_TYPES}
+
+        def node(node_type, value, key=None):
+            key = key if key is not None else node_key(node_type, value)
+            if not key:
+                return None
+            index = lookup[node_type].get(key)
+            if index is None:
+                index = lookup[node_type][key] = len(keys[node_type])
+                keys[node_type].append(key)
+                labels[node_type].append(value)
+            return index
+
+        def link(edge_type, source, values):
+            dst_type = EDGE_TYPES[edge_type][1]
+            for value in values or ():
+                target = node(dst_type, value)
+                if target is not None:
+                    pairs[edge_type][0].append(source)
+                    pairs[edge_type][1].append(target)
+
+        # Every node is looked up by the key it was added with; records
+        # without a usable key are left out of the graph
+        for drug in drugs:
+            if drug_node_key(drug):
+                node('drug', drug.name or drug.id, key=drug_node_key(drug))
+        for patent in patents:
+            if not patent.id:
+                continue
+            source = node('patent', patent.patent_number or patent.id, key=patent.id)
+            link('patent_target', source, patent.targets)
+            link('patent_mechanism', source, patent.mechanisms)
+            link('patent_company', source, (patent.grantees or ()) + (patent.original_applicants or ()))
+        for drug in drugs:
+            source = lookup['drug'].get(drug_node_key(drug))
+            if source is None:
+                continue
+            link('drug_target', source, drug.targets)
+            link('drug_mechanism', source, drug.mechanism_of_action)
+            link('drug_company', source, drug.active_companies)
+        for relationship in relationships:
+            patent = lookup['patent'].get(relationship.patent_id)
+            drug = lookup['drug'].get(relationship.drug_id)
+            if patent is not None and drug is not None:
+                pairs['patent_drug'][0].append(patent)
+                pairs['patent_drug'][1].append(drug)
+
+        edges = {}
+        for name, (src_type, dst_type) in EDGE_TYPES.items():
+            n_src, n_dst = len(keys[src_type]), len(keys[dst_type])
+            src = np.asarray(pairs[name][0], dtype=np.int64)
+            dst = np.asarray(pairs[name][1], dtype=np.int64)
+
+            # Drop duplicate edges
+            unique = np.unique(src * max(n_dst, 1) + dst)
+            src, dst = unique // max(n_dst, 1), unique % max(n_dst, 1)
+
+            indptr, indices = _csr(src, dst, n_src)
+            rev_indptr, rev_indices = _csr(dst, src, n_dst)
+            edges[name] = {'indptr': indptr, 'indices': indices,
+                           'rev_indptr': rev_indptr, 'rev_indices': rev_indices}
+
+        phases = [None] * len(keys['drug'])
+        for drug in drugs:
+            index = lookup['drug'].get(drug_node_key(drug))
+            if index is not None:
+                phases[index] = drug.highest_phase
+        return cls(keys, labels, edges, phases)
+
+    def save(self, output_dir):
+        """Write the CSR arrays (.npz) and the node dictionaries (.json)"""
+        arrays = {f"{name}.{part}": array for name, parts in self.edges.items() for part, array in parts.items()}
+        graph_file = os.path.join(output_dir, GRAPH_FILE)
+        tmp_path = f"{graph_file}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, graph_file)
+
+        write_json({'keys': self.keys, 'labels': self.labels, 'drug_phases': self.drug_phases},
+                   os.path.join(output_dir, NODES_FILE), indent=None)
+
+    @classmethod
+    def load(cls, output_dir='processed_data'):
+        with open(os.path.join(output_dir, NODES_FILE), 'r', encoding='utf-8') as f:
+            nodes = json.load(f)
+        edges = {name: {} for name in EDGE_TYPES}
+        with np.load(os.path.join(output_dir, GRAPH_FILE)) as arrays:
+            for array_name in arrays.files:
+                name, part = array_name.split('.')
+                edges[name][part] = arrays[array_name]
+        return cls(nodes['keys'], nodes['labels'], edges, nodes.get('drug_phases'))
+
+    def size(self):
+        nodes = {t: len(self.keys[t]) for t in NODE_TYPES}
+        edges = {name: len(parts['indices']) for name, parts in self.edges.items()}
+        return nodes, edges
+
+    def lookup(self, node_type, values):
+        """Node indices for IDs or names; unknown values are skipped"""
+        if isinstance(values, str):
+            values = [values]
+        index = self.index[node_type]
+        found = [index.get(node_key(node_type, v)) for v in values]
+        if node_type == 'drug':
+            found = [i if i is not None else self.drug_names.get(_fold(v)) for i, v in zip(found, values)]
+        return np.asarray(sorted({i for i in found if i is not None}), dtype=np.int64)
+
+    def describe(self, node_type, indices):
+        """Display names of node indices"""
+        return [self.labels[node_type][i] for i in indices]
+
+    def _edge_directions(self, from_type, to_type, edge_types=None):
+        """(indptr, indices) pairs leading from from_type nodes to to_type nodes"""
+        for name, (src_type, dst_type) in EDGE_TYPES.items():
+            if edge_types is not None and name not in edge_types:
+                continue
+            parts = self.edges[name]
+            if src_type == from_type and dst_type == to_type:
+                yield parts['indptr'], parts['indices']
+            if dst_type == from_type and src_type == to_type:
+                yield parts['rev_indptr'], parts['rev_indices']
+
+    def step(self, from_type, nodes, to_type, edge_types=None):
+        """
+        Unique to_type neighbors of the given from_type nodes
+
+        Only the adjacency slices of `nodes` are read, so the cost is
+        proportional to the edges touched.
+        """
+        chunks = []
+        for indptr, indices in self._edge_directions(from_type, to_type, edge_types):
+            chunks.extend(indices[indptr[n]:indptr[n + 1]] for n in nodes)
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(chunks)).astype(np.int64)
+
+    def walk(self, start_type, start, path, edge_types=None):
+        """
+        Follow a path of node types from the start nodes
+
+        walk('company', 'Pfizer', ['patent', 'target']) returns the targets
+        of the patents held by Pfizer. `start` may be IDs/names or indices.
+        """
+        nodes = start if isinstance(start, np.ndarray) else self.lookup(start_type, start)
+        current = start_type
+        for next_type in path:
+            nodes = self.step(current, nodes, next_type, edge_types)
+            current = next_type
+        return nodes
+
+    def k_hop(self, start_type, start, k=2, edge_types=None):
+        """
+        All nodes within k hops of the start nodes, by type
+
+        Breadth-first over every edge type in both directions. Each hop
+        expands only the newly reached nodes.
+        """
+        frontier = {start_type: self.lookup(start_type, start)}
+        visited = {t: np.empty(0, dtype=np.int64) for t in NODE_TYPES}
+        visited[start_type] = frontier[start_type]
+
+        for _ in range(k):
+            reached = {}
+            for from_type, nodes in frontier.items():
+                if not len(nodes):
+                    continue
+                for to_type in NODE_TYPES:
+                    found = self.step(from_type, nodes, to_type, edge_types)
+                    if len(found):
+                        reached[to_type] = np.union1d(reached.get(to_type, found), found)
+            frontier = {}
+            for node_type, nodes in reached.items():
+                new = np.setdiff1d(nodes, visited[node_type], assume_unique=True)
+                if len(new):
+                    frontier[node_type] = new
+                    visited[node_type] = np.union1d(visited[node_type], new)
+            if not frontier:
+                break
+
+        visited[start_type] = np.setdiff1d(visited[start_type], self.lookup(start_type, start))
+        return {t: nodes for t, nodes in visited.items() if len(nodes)}
+
+    @staticmethod
+    def intersect(*node_sets):
+        """Nodes present in every given index array"""
+        if not node_sets:
+            return np.empty(0, dtype=np.int64)
+        result = node_sets[0]
+        for nodes in node_sets[1:]:
+            result = np.intersect1d(result, nodes, assume_unique=True)
+        return result
+
+    def company_target_overlap(self, company, phase='Launched'):
+        """
+        Targets a company holds patents on, and the drugs at `phase` that
+        share them
+        """
+        targets = self.walk('company', company, ['patent', 'target'])
+        drugs = self.walk('target', targets, ['drug'])
+        if phase:
+            drugs = np.asarray([d for d in drugs if self.drug_phases[d] == phase], dtype=np.int64)
+        return targets, drugs
+
+
+def create_knowledge_graph(patents, drugs, relationships, output_dir='processed_data'):
+    """Build and save the knowledge graph"""
+    print("\n🕸️  BUILDING KNOWLEDGE GRAPH...")
+    print("-" * 50)
+
+    graph = KnowledgeGraph.build(patents, drugs, relationships)
+    graph.save(output_dir)
+
+    nodes, edges = graph.size()
+    print(f"✅ Nodes: {', '.join(f'{t} {count}' for t, count in nodes.items())}")
+    print(f"   Edges: {', '.join(f'{name} {count}' for name, count in edges.items())}")
+    print(f"   Saved to: {os.path.join(output_dir, GRAPH_FILE)}")
+
+    return graph
+
+
+if __name__ == "__main__":
+    # python knowledge_graph.py            rebuild from processed_data/
+    # python knowledge_graph.py COMPANY    targets and launched drugs overlapping COMPANY's patents
+    if len(sys.argv) > 1:
+        graph = KnowledgeGraph.load()
+        targets, drugs = graph.company_target_overlap(sys.argv[1])
+        print(f"Targets patented by {sys.argv[1]}: {', '.join(graph.describe('target', targets)) or 'none'}")
+        print(f"Launched drugs on those targets: {', '.join(graph.describe('drug', drugs)) or 'none'}")
+    else:
+        create_knowledge_graph(
+            load_records(PatentRecord, 'processed_data/patents_processed.json'),
+            load_records(DrugRecord, 'processed_data/drugs_processed.json'),
+            load_records(RelationshipRecord, 'processed_data/relationships.json')
+        )
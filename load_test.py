@@ -0,0 +1,526 @@
+"""
+API Load Test Harness
+Generates a synthetic processed corpus, starts the API server against it
+and reports per-endpoint latency percentiles, throughput and server RSS
+
+Usage:
+    python load_test.py --patents 20000 --concurrency 1,8,32 --duration 10
+    python load_test.py --mix search_patents=3,patent_detail=1 --isolate
+    python load_test.py --baseline old_results.json --max-regression 0.1
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlencode
+
+from pipeline_records import PatentRecord, DrugRecord, load_records, write_records, write_json
+from process_cortellis_data import CortellisDataProcessor
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Endpoint name -> (default weight, path builder taking (rng, samples))
+ENDPOINTS = {
+    'search_patents': (30, lambda rng, s: '/api/patents/search?' + urlencode(
+        {'q': rng.choice(s['words']), 'limit': 20})),
+    'search_patents_sorted': (10, lambda rng, s: '/api/patents/search?' + urlencode(
+        {'q': rng.choice(s['words']), 'sort': 'application_date', 'limit': 20, 'total': 'estimate'})),
+    'patent_detail': (20, lambda rng, s: '/api/patents/' + quote(rng.choice(s['patent_ids']), safe='')),
+    'similar_patents': (5, lambda rng, s: f"/api/patents/{quote(rng.choice(s['patent_ids']), safe='')}/similar"),
+    'patents_by_company': (5, lambda rng, s: '/api/patents/company/' + quote(rng.choice(s['companies']), safe='')
+                           + '?fields=title,application_date,expiry_date'),
+    'search_drugs': (10, lambda rng, s: '/api/drugs/search?' + urlencode(
+        {'q': rng.choice(s['drug_names']), 'limit': 20})),
+    'drug_detail': (10, lambda rng, s: '/api/drugs/' + quote(rng.choice(s['drug_ids']), safe='')),
+    'patent_landscape': (3, lambda rng, s: '/api/analysis/patent-landscape'),
+    'drug_pipeline': (3, lambda rng, s: '/api/analysis/drug-pipeline'),
+    'competitive_analysis': (2, lambda rng, s: '/api/analysis/competitive/' + quote(rng.choice(s['companies']), safe='')),
+    'expiry_timeline': (2, lambda rng, s: '/api/analysis/expiry-timeline')
+}
+
+WORDS = [
+    'kinase', 'inhibitor', 'antibody', 'receptor', 'tablet', 'formulation', 'crystalline',
+    'salt', 'oral', 'injectable', 'sustained', 'release', 'tumor', 'oncology', 'diabetes',
+    'insulin', 'peptide', 'fusion', 'protein', 'vaccine', 'antigen', 'adjuvant', 'dosage',
+    'pediatric', 'hepatic', 'renal', 'cardiac', 'inflammation', 'cytokine', 'interleukin',
+    'modulator', 'agonist', 'antagonist', 'prodrug', 'polymorph', 'emulsion', 'liposome',
+    'nanoparticle', 'conjugate', 'bispecific', 'monoclonal', 'biosimilar', 'enzyme'
+]
+COMPANIES = [
+    'Pfizer Inc', 'PFIZER INC.', 'Novartis AG', 'Novartis Pharma AG', 'Merck & Co Inc',
+    'GSK plc', 'Glaxo SmithKline PLC', 'Roche Holding AG', 'F. Hoffmann-La Roche Ltd',
+    'AstraZeneca PLC', 'Sanofi SA', 'Bayer AG', 'AbbVie Inc', 'Eli Lilly and Company',
+    'Bristol-Myers Squibb Co', 'Amgen Inc', 'Gilead Sciences Inc', 'Takeda Pharmaceutical Co Ltd'
+]
+PHASES = ['Launched', 'Registered', 'Phase 3 Clinical', 'Phase 2 Clinical', 'Phase 1 Clinical',
+          'Preclinical', 'Discovery']
+INDICATIONS = ['Cancer', 'Pain', 'Hypertension', 'Type 2 diabetes', 'Asthma', 'Psoriasis',
+               'Rheumatoid arthritis', 'HIV infection', 'Depression', 'Obesity']
+TARGETS = ['EGFR', 'HER2', 'PD-1', 'VEGF', 'TNF', 'IL-6', 'GLP-1', 'JAK1', 'BTK', 'CD20']
+MECHANISMS = ['Kinase inhibitor', 'Antibody', 'Receptor agonist', 'Receptor antagonist',
+              'Enzyme inhibitor', 'Gene therapy']
+
+
+def _date(rng, first_year, last_year):
+    return f"{rng.randint(first_year, last_year)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+class SyntheticCorpusProcessor(CortellisDataProcessor):
+    """
+    Cortellis pipeline whose patent and drug stages emit synthetic records
+
+    Every later stage (relationships, families, similarity, indexes,
+    generations) is the real pipeline code. The corpus spec file stands in
+    for the Excel inputs, so the stage cache is keyed by the corpus size
+    and seed.
+    """
+
+    def __init__(self, n_patents, n_drugs, seed):
+        super().__init__()
+        self.n_patents = n_patents
+        self.n_drugs = n_drugs
+        self.seed = seed
+        self.patents_file = self.drugs_file = 'synthetic_corpus.json'
+        write_json({'patents': n_patents, 'drugs': n_drugs, 'seed': seed}, self.patents_file)
+
+    def drug_names(self):
+        return [f"lt-{i:05d}" for i in range(self.n_drugs)]
+
+    def process_patents(self):
+        """Generate synthetic patents"""
+        print("\n🔬 GENERATING SYNTHETIC PATENTS...")
+        print("-" * 50)
+
+        rng = random.Random(self.seed)
+        drug_names = self.drug_names()
+        patents = []
+        for i in range(self.n_patents):
+            patent_number = f"US{8000000 + i}B2"
+            application_number = f"US{12000000 + i}"
+            application_date = _date(rng, 1995, 2023)
+            expiry_year = int(application_date[:4]) + 20
+            patents.append(PatentRecord(
+                id=self.generate_id(patent_number, application_number),
+                patent_number=patent_number,
+                application_number=application_number,
+                title=' '.join(rng.sample(WORDS, 6)).capitalize(),
+                abstract=' '.join(rng.choices(WORDS, k=rng.randint(60, 160))),
+                classifications=rng.sample(['Pharmaceutics', 'Anti-Infectives', 'Diagnostics', 'Oncology'], 2),
+                application_date=application_date,
+                grant_date=_date(rng, int(application_date[:4]) + 1, int(application_date[:4]) + 4),
+                expiry_date=f"{expiry_year}-{application_date[5:]}",
+                latest_expiry_date=f"{expiry_year + rng.randint(0, 5)}-{application_date[5:]}",
+                inventors=[f"Inventor {rng.randint(1, 5000)}" for _ in range(rng.randint(1, 4))],
+                grantees=[rng.choice(COMPANIES)],
+                original_applicants=[rng.choice(COMPANIES)],
+                compound_name=f"cmp-{rng.randint(1, self.n_patents // 4 + 1)}",
+                drugs=rng.sample(drug_names, min(len(drug_names), rng.randint(0, 3))),
+                chemistry=' '.join(rng.sample(WORDS, 5)),
+                jurisdiction=rng.choice(['US', 'EP', 'WO', 'JP', 'CN']),
+                medical_uses=rng.sample(INDICATIONS, 2),
+                targets=[rng.choice(TARGETS)],
+                mechanisms=[rng.choice(MECHANISMS)],
+                patent_family=f"WO{2000 + i % 24}{i // 3:06d}",
+                data_source='Synthetic',
+                processed_date=self.processed_date
+            ))
+
+        output_file = os.path.join(self.output_dir, 'patents_processed.json')
+        write_records(patents, output_file)
+        print(f"✅ Generated {len(patents)} patents")
+
+        self.generate_patent_stats(patents)
+        return patents
+
+    def process_drugs(self):
+        """Generate synthetic drugs"""
+        print("\n💊 GENERATING SYNTHETIC DRUGS...")
+        print("-" * 50)
+
+        rng = random.Random(self.seed + 1)
+        drugs = []
+        for i, name in enumerate(self.drug_names()):
+            phase = rng.choice(PHASES)
+            launched = phase == 'Launched'
+            drugs.append(DrugRecord(
+                id=f"D{i:06d}",
+                name=name,
+                synonyms=[f"{name}-{suffix}" for suffix in rng.sample(['a', 'b', 'sr', 'xr'], 2)],
+                active_companies=rng.sample(COMPANIES, 2),
+                active_indications=rng.sample(INDICATIONS, rng.randint(1, 3)),
+                highest_phase=phase,
+                mechanism_of_action=[rng.choice(MECHANISMS)],
+                targets=[rng.choice(TARGETS)],
+                first_launched_date=_date(rng, 1990, 2024) if launched else None,
+                last_updated=_date(rng, 2020, 2025),
+                summary=' '.join(rng.choices(WORDS, k=40)),
+                phases={'launched': 'US'} if launched else {},
+                data_source='Synthetic',
+                processed_date=self.processed_date
+            ))
+
+        output_file = os.path.join(self.output_dir, 'drugs_processed.json')
+        write_records(drugs, output_file)
+        print(f"✅ Generated {len(drugs)} drugs")
+
+        self.generate_drug_stats(drugs)
+        return drugs
+
+
+def corpus_samples(data_dir):
+    """Identifiers and terms the endpoint mix draws from"""
+    patents = load_records(PatentRecord, os.path.join(data_dir, 'patents_processed.json'))
+    drugs = load_records(DrugRecord, os.path.join(data_dir, 'drugs_processed.json'))
+    return {
+        'patent_ids': [p.id for p in patents],
+        'drug_ids': [d.id for d in drugs],
+        'drug_names': [d.name for d in drugs],
+        'companies': COMPANIES,
+        'words': WORDS
+    }
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client for GET requests"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def get(self, path):
+        """Send a GET and read the full response; returns (status, body size)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        self.writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n".encode('latin-1')
+        )
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Server closed the connection')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            size = len(await self.reader.readexactly(int(headers['content-length'])))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            size = 0
+            while True:
+                chunk_size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(chunk_size + 2)
+                size += chunk_size
+                if chunk_size == 0:
+                    break
+        else:
+            size = len(await self.reader.read())
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, size
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def read_rss_mb(pid):
+    """Resident set size of a process and its child processes (cluster workers) from /proc, in MB"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            rss = next(int(line.split()[1]) / 1024 for line in f if line.startswith('VmRSS:'))
+    except (OSError, StopIteration):
+        return None
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", 'r') as f:
+            children = f.read().split()
+    except OSError:
+        children = []
+    return rss + sum(read_rss_mb(child) or 0 for child in children)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    # Rounding first keeps e.g. 0.07 * 100 (7.000000000000001) at rank 7
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_level(host, port, mix, samples, concurrency, duration, server_pid, seed):
+    """Drive the endpoint mix at a fixed concurrency for `duration` seconds"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    rss = []
+    stop = asyncio.Event()
+
+    async def sample_rss():
+        while not stop.is_set():
+            value = read_rss_mb(server_pid)
+            if value is not None:
+                rss.append(value)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.1)
+            except asyncio.TimeoutError:
+                pass
+
+    async def worker(worker_id, deadline):
+        rng = random.Random(seed * 1000 + worker_id)
+        connection = HttpConnection(host, port)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            path = ENDPOINTS[name][1](rng, samples)
+            started = time.perf_counter()
+            try:
+                status, _ = await connection.get(path)
+                ok = 200 <= status < 400
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                connection.close()
+                ok = False
+            if ok:
+                latencies[name].append(time.perf_counter() - started)
+            else:
+                errors[name] += 1
+        connection.close()
+
+    sampler = asyncio.create_task(sample_rss())
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+
+    endpoints = {}
+    for name in names:
+        values = sorted(latencies[name])
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'rps': round(len(values) / elapsed, 1),
+            'p50_ms': _ms(percentile(values, 0.50)),
+            'p95_ms': _ms(percentile(values, 0.95)),
+            'p99_ms': _ms(percentile(values, 0.99)),
+            'max_ms': _ms(values[-1] if values else None)
+        }
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'errors': sum(errors.values()),
+        'rps': round(total / elapsed, 1),
+        'server_rss_mb': {
+            'start': _round(rss[0] if rss else None),
+            'peak': _round(max(rss) if rss else None),
+            'end': _round(rss[-1] if rss else None)
+        },
+        'endpoints': endpoints
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def start_server(workdir, port, node='node', workers=0):
+    """
+    Start server.js with workdir as its data directory and wait for the data to load
+
+    With workers, the server runs in cluster mode serving from the corpus file.
+    """
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    env = {**os.environ, 'PORT': str(port)}
+    if workers:
+        env['CLUSTER_WORKERS'] = str(workers)
+    server = subprocess.Popen(
+        [node, os.path.join(REPO_DIR, 'server.js')],
+        cwd=workdir, env=env,
+        stdout=log, stderr=subprocess.STDOUT
+    )
+
+    async def wait_ready():
+        deadline = time.perf_counter() + 120
+        while time.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}, see {log.name}")
+            connection = HttpConnection('127.0.0.1', port)
+            try:
+                status, _ = await connection.get('/health')
+                if status == 200:
+                    return
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                connection.close()
+            await asyncio.sleep(0.25)
+        raise RuntimeError('Server did not become ready within 120 s')
+
+    try:
+        asyncio.run(wait_ready())
+    except Exception:
+        server.terminate()
+        raise
+    return server
+
+
+def parse_mix(spec):
+    """'name=weight,...' into a weight dict; an empty spec selects every endpoint"""
+    if not spec:
+        return {name: weight for name, (weight, _) in ENDPOINTS.items()}
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}'. Choose from: {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight) if weight else ENDPOINTS[name][0]
+    return mix
+
+
+def compare_to_baseline(results, baseline, max_regression):
+    """p95 regressions beyond max_regression, and the number of levels compared"""
+    def key(level):
+        return (level['concurrency'], level.get('endpoint'))
+
+    baseline_levels = {key(level): level for level in baseline.get('levels', [])}
+    regressions = []
+    compared = 0
+    for level in results['levels']:
+        old_level = baseline_levels.get(key(level))
+        if not old_level:
+            continue
+        compared += 1
+        for name, stats in level['endpoints'].items():
+            old = old_level['endpoints'].get(name, {}).get('p95_ms')
+            new = stats['p95_ms']
+            if old and new and new > old * (1 + max_regression):
+                regressions.append({
+                    'concurrency': level['concurrency'],
+                    'endpoint': name,
+                    'baseline_p95_ms': old,
+                    'p95_ms': new
+                })
+    return regressions, compared
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the patent API against a synthetic corpus')
+    parser.add_argument('--patents', type=int, default=20000, help='synthetic patents (default 20000)')
+    parser.add_argument('--drugs', type=int, default=2000, help='synthetic drugs (default 2000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per level')
+    parser.add_argument('--mix', default='', help="endpoint weights, e.g. 'search_patents=3,patent_detail=1'")
+    parser.add_argument('--isolate', action='store_true',
+                        help='run each endpoint of the mix on its own, so RSS is attributable to it')
+    parser.add_argument('--workdir', help='corpus directory, reused across runs (default: a temporary directory)')
+    parser.add_argument('--port', type=int, default=3905)
+    parser.add_argument('--node', default='node', help='node executable')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='run the server in cluster mode with this many workers (default: single process)')
+    parser.add_argument('--output', default='load_test_results.json')
+    parser.add_argument('--baseline', help='previous results file; exit 1 if any p95 regresses')
+    parser.add_argument('--max-regression', type=float, default=0.10,
+                        help='allowed p95 increase over the baseline (default 0.10)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(',')]
+    output = os.path.abspath(args.output)
+    baseline_file = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='patent-load-'))
+    os.makedirs(workdir, exist_ok=True)
+
+    print("=" * 80)
+    print("🚦 API LOAD TEST")
+    print("=" * 80)
+    print(f"Corpus: {args.patents} patents, {args.drugs} drugs (seed {args.seed})")
+    print(f"Working directory: {workdir}")
+
+    # The pipeline writes to processed_data/ relative to the working directory
+    os.chdir(workdir)
+    SyntheticCorpusProcessor(args.patents, args.drugs, args.seed).process_all()
+    samples = corpus_samples(os.path.join(workdir, 'processed_data'))
+
+    print("\n🖥️  STARTING SERVER...")
+    print("-" * 50)
+    server = start_server(workdir, args.port, args.node, args.workers)
+    print(f"✅ Server ready on port {args.port} (pid {server.pid}, RSS {read_rss_mb(server.pid):.1f} MB)")
+
+    runs = [(None, mix)] if not args.isolate else [(name, {name: 1}) for name in mix]
+    results = {
+        'corpus': {'patents': args.patents, 'drugs': args.drugs, 'seed': args.seed},
+        'workers': args.workers,
+        'mix': mix,
+        'levels': []
+    }
+    try:
+        for endpoint, run_mix in runs:
+            for concurrency in levels:
+                label = f" [{endpoint}]" if endpoint else ''
+                print(f"\n⏱️  Concurrency {concurrency}{label} for {args.duration:g}s...")
+                level = asyncio.run(run_level('127.0.0.1', args.port, run_mix, samples, concurrency,
+                                              args.duration, server.pid, args.seed))
+                if endpoint:
+                    level['endpoint'] = endpoint
+                results['levels'].append(level)
+
+                print(f"   {level['requests']} requests, {level['rps']} req/s, {level['errors']} errors, "
+                      f"peak RSS {level['server_rss_mb']['peak']} MB")
+                for name, stats in level['endpoints'].items():
+                    print(f"   {name:24} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+                          f"p99 {stats['p99_ms']} ms  {stats['rps']} req/s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    write_json(results, output)
+    print(f"\n✅ Results saved to: {output}")
+
+    if baseline_file:
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            regressions, compared = compare_to_baseline(results, json.load(f), args.max_regression)
+        if not compared:
+            print(f"\n⚠️ No levels in {baseline_file} match this run's concurrency and isolation")
+        elif regressions:
+            print(f"\n❌ {len(regressions)} p95 regressions over {args.max_regression:.0%}:")
+            for r in regressions:
+                print(f"   c={r['concurrency']} {r['endpoint']}: {r['baseline_p95_ms']} ms -> {r['p95_ms']} ms")
+            sys.exit(1)
+        else:
+            print(f"\n✅ No p95 regressions over {args.max_regression:.0%} in {compared} levels")
+
+
+if __name__ == "__main__":
+    main()
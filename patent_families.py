@@ -0,0 +1,147 @@
+"""
+Patent Family Grouping Index
+Resolves patent families with a union-find over patent_family,
+patent numbers and application numbers
+"""
+import os
+import re
+import sys
+
+from pipeline_records import PatentRecord, load_records, write_json
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# Identifiers shorter than this are too generic to link records on
+MIN_KEY_LENGTH = 4
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size"""
+
+    def __init__(self):
+        self.parent = []
+        self.size = []
+
+    def add(self):
+        node = len(self.parent)
+        self.parent.append(node)
+        self.size.append(1)
+        return node
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+def normalize_identifier(value):
+    """Uppercase an identifier and strip spaces and punctuation"""
+    return re.sub(r'[^0-9A-Z]', '', value.upper())
+
+
+def family_keys(patent):
+    """All identifiers that link a patent to other members of its family"""
+    values = [patent.patent_number, patent.application_number]
+    if patent.patent_family:
+        values.extend(re.split(r'[;|\n]', patent.patent_family))
+
+    keys = set()
+    for value in values:
+        if value:
+            key = normalize_identifier(value)
+            if len(key) >= MIN_KEY_LENGTH:
+                keys.add(key)
+    return keys
+
+
+def resolve_families(patents):
+    """
+    Group patents into families
+
+    Returns a list with one compact family ID per patent, in input order.
+    Family IDs are numbered by first appearance.
+    """
+    forest = UnionFind()
+    key_nodes = {}
+    patent_nodes = []
+
+    for patent in patents:
+        node = forest.add()
+        patent_nodes.append(node)
+        for key in family_keys(patent):
+            key_node = key_nodes.get(key)
+            if key_node is None:
+                key_nodes[key] = node
+            else:
+                forest.union(node, key_node)
+
+    family_by_root = {}
+    family_ids = []
+    for node in patent_nodes:
+        root = forest.find(node)
+        if root not in family_by_root:
+            family_by_root[root] = len(family_by_root)
+        family_ids.append(family_by_root[root])
+    return family_ids
+
+
+def build_family_index(patents, family_ids):
+    """Family adjacency plus earliest and latest expiry per family"""
+    families = {}
+    for patent, family_id in zip(patents, family_ids):
+        family = families.get(family_id)
+        if family is None:
+            family = families[family_id] = {
+                'members': [],
+                'earliest_expiry': None,
+                'latest_expiry': None
+            }
+        family['members'].append(patent.id)
+
+        earliest = patent.expiry_date or patent.latest_expiry_date
+        latest = patent.latest_expiry_date or patent.expiry_date
+        if earliest and (family['earliest_expiry'] is None or earliest < family['earliest_expiry']):
+            family['earliest_expiry'] = earliest
+        if latest and (family['latest_expiry'] is None or latest > family['latest_expiry']):
+            family['latest_expiry'] = latest
+
+    return {
+        'total_families': len(families),
+        'patent_family_ids': {p.id: f for p, f in zip(patents, family_ids)},
+        'families': families
+    }
+
+
+def create_family_index(patents, output_dir='processed_data'):
+    """Resolve patent families and save the family index"""
+    print("\n👪 GROUPING PATENT FAMILIES...")
+    print("-" * 50)
+
+    family_ids = resolve_families(patents)
+    index = build_family_index(patents, family_ids)
+
+    index_file = os.path.join(output_dir, 'patent_families.json')
+    write_json(index, index_file, indent=None)
+
+    multi_member = sum(1 for fam in index['families'].values() if len(fam['members']) > 1)
+    print(f"✅ Resolved {index['total_families']} families from {len(patents)} patents")
+    print(f"   Families with multiple members: {multi_member}")
+    print(f"   Saved to: {index_file}")
+
+    return index
+
+
+if __name__ == "__main__":
+    create_family_index(load_records(PatentRecord, 'processed_data/patents_processed.json'))
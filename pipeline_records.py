@@ -0,0 +1,143 @@
+"""
+Compact record types for the Cortellis processing pipeline
+Slot-based patent, drug and relationship records that serialize to the
+same JSON shape as the original dict-based pipeline output
+"""
+import json
+import os
+import sys
+import textwrap
+
+# Short categorical values repeated across many records
+INTERNED_FIELDS = {
+    'classifications', 'jurisdiction', 'data_source', 'highest_phase',
+    'therapeutic_class', 'ephmra_codes', 'first_launched_country', 'type'
+}
+
+
+def _is_empty(value):
+    return value is None or value == '' or value == () or value == [] or value == {}
+
+
+def _compact(name, value):
+    """Store list fields as tuples and intern repeated categorical strings"""
+    if isinstance(value, list):
+        value = tuple(value)
+    if name in INTERNED_FIELDS:
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, tuple):
+            return tuple(sys.intern(v) if isinstance(v, str) else v for v in value)
+    return value
+
+
+class Record:
+    """
+    Base class for slot-based pipeline records
+
+    Subclasses list their fields in __slots__, in the order the keys
+    should appear in the serialized JSON.
+    """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields.pop(name, None)
+            setattr(self, name, None if _is_empty(value) else _compact(name, value))
+        if fields:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(fields)}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a dict loaded from the processed JSON files"""
+        return cls(**{k: v for k, v in data.items() if k in cls.__slots__})
+
+    def to_dict(self):
+        """Serialize to the processed JSON shape, omitting empty fields"""
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if _is_empty(value):
+                continue
+            result[name] = list(value) if isinstance(value, tuple) else value
+        return result
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+
+class PatentRecord(Record):
+    __slots__ = (
+        'id', 'patent_number', 'application_number', 'title', 'abstract',
+        'classifications', 'advantages', 'application_date', 'grant_date',
+        'expiry_date', 'latest_expiry_date', 'inventors', 'grantees',
+        'original_applicants', 'compound_name', 'drugs', 'chemistry', 'biology',
+        'formulation', 'jurisdiction', 'medical_uses', 'targets', 'mechanisms',
+        'pharmacokinetics', 'patent_family', 'data_source', 'processed_date'
+    )
+
+
+class DrugRecord(Record):
+    __slots__ = (
+        'id', 'name', 'synonyms', 'active_companies', 'inactive_companies',
+        'active_indications', 'inactive_indications', 'highest_phase',
+        'mechanism_of_action', 'targets', 'therapeutic_class', 'ephmra_codes',
+        'first_launched_date', 'first_launched_country', 'first_launched_indication',
+        'last_updated', 'added_date', 'summary', 'phases', 'data_source',
+        'processed_date'
+    )
+
+
+class RelationshipRecord(Record):
+    __slots__ = (
+        'type', 'drug_id', 'drug_name', 'patent_id', 'patent_number',
+        'relationship_date'
+    )
+
+    def to_dict(self):
+        # Relationships always carry every key, matching the original output
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def write_json_array(items, file_path):
+    """
+    Stream JSON values to a JSON array file one element at a time
+
+    Produces the same bytes as json.dump(list(items), indent=2) without
+    materializing the list. The file is written to a temporary path and
+    moved into place so readers never see a partial file.
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        first = True
+        for value in items:
+            f.write('[\n' if first else ',\n')
+            item = json.dumps(value, ensure_ascii=False, indent=2)
+            f.write(textwrap.indent(item, '  '))
+            first = False
+        f.write('[]' if first else '\n]')
+    os.replace(tmp_path, file_path)
+
+
+def write_records(records, file_path):
+    """Stream records to a JSON array file, as json.dump of their dicts with indent=2"""
+    write_json_array((record.to_dict() for record in records), file_path)
+
+
+def write_json(data, file_path, indent=2):
+    """Write a JSON file via a temporary file and an atomic rename"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, file_path)
+
+
+def load_records(record_cls, file_path):
+    """Load a processed JSON array file as a list of records"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [record_cls.from_dict(item) for item in json.load(f)]
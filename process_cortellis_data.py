@@ -9,6 +9,20 @@ import sys
 from datetime import datetime
 import hashlib
 import re
+import tracemalloc
+from collections import Counter
+
+from pipeline_records import PatentRecord, DrugRecord, RelationshipRecord, write_records, write_json, load_records
+from patent_families import create_family_index
+from similar_patents import create_similarity_index
+from company_index import create_company_index, company_key
+from sort_orders import create_sort_orders
+from knowledge_graph import create_knowledge_graph
+from corpus_file import create_corpus, CORPUS_FILE
+from compressed_artifacts import publish_artifacts, load_index
+from stage_scheduler import Stage, StageScheduler
+from generations import publish_generation, index_files
+from create_unified_index import unified_index_stage, publish_unified_generation
 
 # Set UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
@@ -18,6 +32,8 @@ class CortellisDataProcessor:
         self.patents_file = 'cortellis_patents.xlsx'
         self.drugs_file = 'cortellis_drugs.xlsx'
         self.output_dir = 'processed_data'
+        # One timestamp per run, shared by every record
+        self.processed_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
         # Create output directory
         if not os.path.exists(self.output_dir):
@@ -63,51 +79,50 @@ class CortellisDataProcessor:
         # Read the main patent data
         df = pd.read_excel(self.patents_file, sheet_name='Birlestirilmis_Veri')
         print(f"Total patents: {len(df)}")
+        for column in ('grantee', 'original_applicant'):
+            if column not in df.columns or df[column].isna().all():
+                print(f"  ⚠️ Column '{column}' is missing or empty; company fields will be blank")
 
         patents = []
         for idx, row in df.iterrows():
             if idx % 5000 == 0:
                 print(f"  Processing patent {idx}/{len(df)}...")
 
-            # Extract and structure patent data
-            patent = {
-                'id': self.generate_id(row.get('patent_number'), row.get('application_number')),
-                'patent_number': self.clean_text(row.get('patent_number')),
-                'application_number': self.clean_text(row.get('application_number')),
-                'title': self.clean_text(row.get('invention_title')),
-                'abstract': self.clean_text(row.get('annotation')),
-                'classifications': self.parse_list_field(row.get('abstract_classification')),
-                'advantages': self.clean_text(row.get('advantage')),
-                'application_date': self.parse_date(row.get('application_date')),
-                'grant_date': self.parse_date(row.get('grant_date')),
-                'expiry_date': self.parse_date(row.get('earliest_expiry_date')),
-                'latest_expiry_date': self.parse_date(row.get('latest_expiry_date')),
-                'inventors': self.parse_list_field(row.get('inventor_name')),
-                'grantees': self.parse_list_field(row.get('grantee')),
-                'original_applicants': self.parse_list_field(row.get('original_applicant')),
-                'compound_name': self.clean_text(row.get('compound_name')),
-                'drugs': self.parse_list_field(row.get('drugs')),
-                'chemistry': self.clean_text(row.get('chemistry')),
-                'biology': self.clean_text(row.get('biology')),
-                'formulation': self.clean_text(row.get('formulation')),
-                'jurisdiction': self.clean_text(row.get('jurisdiction')),
-                'medical_uses': self.parse_list_field(row.get('medical_use')),
-                'targets': self.parse_list_field(row.get('target')),
-                'mechanisms': self.parse_list_field(row.get('mechanism')),
-                'pharmacokinetics': self.clean_text(row.get('pharmacokinetics')),
-                'patent_family': self.clean_text(row.get('patent_family')),
-                'data_source': 'Cortellis',
-                'processed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            # Remove None values and empty lists
-            patent = {k: v for k, v in patent.items() if v is not None and v != [] and v != ''}
+            # Extract and structure patent data (empty values are dropped by the record)
+            patent = PatentRecord(
+                id=self.generate_id(row.get('patent_number'), row.get('application_number')),
+                patent_number=self.clean_text(row.get('patent_number')),
+                application_number=self.clean_text(row.get('application_number')),
+                title=self.clean_text(row.get('invention_title')),
+                abstract=self.clean_text(row.get('annotation')),
+                classifications=self.parse_list_field(row.get('abstract_classification')),
+                advantages=self.clean_text(row.get('advantage')),
+                application_date=self.parse_date(row.get('application_date')),
+                grant_date=self.parse_date(row.get('grant_date')),
+                expiry_date=self.parse_date(row.get('earliest_expiry_date')),
+                latest_expiry_date=self.parse_date(row.get('latest_expiry_date')),
+                inventors=self.parse_list_field(row.get('inventor_name')),
+                grantees=self.parse_list_field(row.get('grantee')),
+                original_applicants=self.parse_list_field(row.get('original_applicant')),
+                compound_name=self.clean_text(row.get('compound_name')),
+                drugs=self.parse_list_field(row.get('drugs')),
+                chemistry=self.clean_text(row.get('chemistry')),
+                biology=self.clean_text(row.get('biology')),
+                formulation=self.clean_text(row.get('formulation')),
+                jurisdiction=self.clean_text(row.get('jurisdiction')),
+                medical_uses=self.parse_list_field(row.get('medical_use')),
+                targets=self.parse_list_field(row.get('target')),
+                mechanisms=self.parse_list_field(row.get('mechanism')),
+                pharmacokinetics=self.clean_text(row.get('pharmacokinetics')),
+                patent_family=self.clean_text(row.get('patent_family')),
+                data_source='Cortellis',
+                processed_date=self.processed_date
+            )
             patents.append(patent)
 
         # Save processed patents
         output_file = os.path.join(self.output_dir, 'patents_processed.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(patents, f, ensure_ascii=False, indent=2)
+        write_records(patents, output_file)
 
         print(f"✅ Processed {len(patents)} patents")
         print(f"   Saved to: {output_file}")
@@ -131,50 +146,44 @@ class CortellisDataProcessor:
             if idx % 1000 == 0:
                 print(f"  Processing drug {idx}/{len(df)}...")
 
-            # Extract and structure drug data
-            drug = {
-                'id': self.clean_text(row.get('drug_id')),
-                'name': self.clean_text(row.get('drug_name')),
-                'synonyms': self.parse_list_field(row.get('synonyms')),
-                'active_companies': self.parse_list_field(row.get('active_companies')),
-                'inactive_companies': self.parse_list_field(row.get('inactive_companies')),
-                'active_indications': self.parse_list_field(row.get('active_indications')),
-                'inactive_indications': self.parse_list_field(row.get('inactive_indications')),
-                'highest_phase': self.clean_text(row.get('highest_phase_overall')),
-                'mechanism_of_action': self.parse_list_field(row.get('mechanism')),
-                'targets': self.parse_list_field(row.get('target')),
-                'therapeutic_class': self.parse_list_field(row.get('therapeutic_class')),
-                'ephmra_codes': self.parse_list_field(row.get('ephmra_codes')),
-                'first_launched_date': self.parse_date(row.get('first_launched_date')),
-                'first_launched_country': self.clean_text(row.get('first_launched_country/territory')),
-                'first_launched_indication': self.clean_text(row.get('first_launched_indication')),
-                'last_updated': self.parse_date(row.get('last_updated_date')),
-                'added_date': self.parse_date(row.get('added_date')),
-                'summary': self.clean_text(row.get('first_paragraph_of_summary')),
-                'phases': {
-                    'launched': self.clean_text(row.get('phases_launched')),
-                    'phase_3': self.clean_text(row.get('phases_phase_3')),
-                    'phase_2': self.clean_text(row.get('phases_phase_2')),
-                    'phase_1': self.clean_text(row.get('phases_phase_1')),
-                    'preclinical': self.clean_text(row.get('phases_preclinical'))
-                },
-                'data_source': 'Cortellis',
-                'processed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            phases = {
+                'launched': self.clean_text(row.get('phases_launched')),
+                'phase_3': self.clean_text(row.get('phases_phase_3')),
+                'phase_2': self.clean_text(row.get('phases_phase_2')),
+                'phase_1': self.clean_text(row.get('phases_phase_1')),
+                'preclinical': self.clean_text(row.get('phases_preclinical'))
             }
 
-            # Clean phases dictionary
-            drug['phases'] = {k: v for k, v in drug['phases'].items() if v}
-            if not drug['phases']:
-                del drug['phases']
-
-            # Remove None values and empty lists
-            drug = {k: v for k, v in drug.items() if v is not None and v != [] and v != ''}
+            # Extract and structure drug data (empty values are dropped by the record)
+            drug = DrugRecord(
+                id=self.clean_text(row.get('drug_id')),
+                name=self.clean_text(row.get('drug_name')),
+                synonyms=self.parse_list_field(row.get('synonyms')),
+                active_companies=self.parse_list_field(row.get('active_companies')),
+                inactive_companies=self.parse_list_field(row.get('inactive_companies')),
+                active_indications=self.parse_list_field(row.get('active_indications')),
+                inactive_indications=self.parse_list_field(row.get('inactive_indications')),
+                highest_phase=self.clean_text(row.get('highest_phase_overall')),
+                mechanism_of_action=self.parse_list_field(row.get('mechanism')),
+                targets=self.parse_list_field(row.get('target')),
+                therapeutic_class=self.parse_list_field(row.get('therapeutic_class')),
+                ephmra_codes=self.parse_list_field(row.get('ephmra_codes')),
+                first_launched_date=self.parse_date(row.get('first_launched_date')),
+                first_launched_country=self.clean_text(row.get('first_launched_country/territory')),
+                first_launched_indication=self.clean_text(row.get('first_launched_indication')),
+                last_updated=self.parse_date(row.get('last_updated_date')),
+                added_date=self.parse_date(row.get('added_date')),
+                summary=self.clean_text(row.get('first_paragraph_of_summary')),
+                # Clean phases dictionary
+                phases={k: v for k, v in phases.items() if v},
+                data_source='Cortellis',
+                processed_date=self.processed_date
+            )
             drugs.append(drug)
 
         # Save processed drugs
         output_file = os.path.join(self.output_dir, 'drugs_processed.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(drugs, f, ensure_ascii=False, indent=2)
+        write_records(drugs, output_file)
 
         print(f"✅ Processed {len(drugs)} drugs")
         print(f"   Saved to: {output_file}")
@@ -188,31 +197,26 @@ class CortellisDataProcessor:
         """Generate patent statistics"""
         stats = {
             'total_patents': len(patents),
-            'patents_with_drugs': len([p for p in patents if 'drugs' in p]),
-            'unique_compounds': len(set(p.get('compound_name', '') for p in patents if p.get('compound_name'))),
-            'unique_grantees': len(set(g for p in patents for g in p.get('grantees', []))),
+            'patents_with_drugs': sum(1 for p in patents if p.drugs),
+            'unique_compounds': len(set(p.compound_name for p in patents if p.compound_name)),
+            'unique_grantees': len(set(filter(None, (company_key(g) for p in patents for g in p.grantees or ())))),
             'classification_distribution': {},
             'year_distribution': {}
         }
 
         # Classification distribution
-        all_classifications = []
-        for patent in patents:
-            all_classifications.extend(patent.get('classifications', []))
-
-        for cls in set(all_classifications):
-            stats['classification_distribution'][cls] = all_classifications.count(cls)
+        classification_counts = Counter(c for p in patents for c in p.classifications or ())
+        stats['classification_distribution'] = dict(classification_counts)
 
         # Year distribution
         for patent in patents:
-            if 'application_date' in patent:
-                year = patent['application_date'][:4] if patent['application_date'] else 'Unknown'
+            if patent.application_date:
+                year = patent.application_date[:4]
                 stats['year_distribution'][year] = stats['year_distribution'].get(year, 0) + 1
 
         # Save statistics
         stats_file = os.path.join(self.output_dir, 'patent_statistics.json')
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, ensure_ascii=False, indent=2)
+        write_json(stats, stats_file)
 
         print(f"\n📊 Patent Statistics:")
         print(f"   Total Patents: {stats['total_patents']}")
@@ -224,7 +228,7 @@ class CortellisDataProcessor:
         """Generate drug statistics"""
         stats = {
             'total_drugs': len(drugs),
-            'launched_drugs': len([d for d in drugs if d.get('highest_phase') == 'Launched']),
+            'launched_drugs': sum(1 for d in drugs if d.highest_phase == 'Launched'),
             'phase_distribution': {},
             'indication_distribution': {},
             'company_distribution': {}
@@ -232,30 +236,18 @@ class CortellisDataProcessor:
 
         # Phase distribution
         for drug in drugs:
-            phase = drug.get('highest_phase', 'Unknown')
+            phase = drug.highest_phase or 'Unknown'
             stats['phase_distribution'][phase] = stats['phase_distribution'].get(phase, 0) + 1
 
         # Indication distribution (top 20)
-        all_indications = []
-        for drug in drugs:
-            all_indications.extend(drug.get('active_indications', []))
-
-        indication_counts = {}
-        for ind in all_indications:
-            indication_counts[ind] = indication_counts.get(ind, 0) + 1
+        indication_counts = Counter(i for d in drugs for i in d.active_indications or ())
 
         stats['indication_distribution'] = dict(
             sorted(indication_counts.items(), key=lambda x: x[1], reverse=True)[:20]
         )
 
         # Company distribution (top 20)
-        all_companies = []
-        for drug in drugs:
-            all_companies.extend(drug.get('active_companies', []))
-
-        company_counts = {}
-        for company in all_companies:
-            company_counts[company] = company_counts.get(company, 0) + 1
+        company_counts = Counter(c for d in drugs for c in d.active_companies or ())
 
         stats['company_distribution'] = dict(
             sorted(company_counts.items(), key=lambda x: x[1], reverse=True)[:20]
@@ -263,8 +255,7 @@ class CortellisDataProcessor:
 
         # Save statistics
         stats_file = os.path.join(self.output_dir, 'drug_statistics.json')
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, ensure_ascii=False, indent=2)
+        write_json(stats, stats_file)
 
         print(f"\n📊 Drug Statistics:")
         print(f"   Total Drugs: {stats['total_drugs']}")
@@ -279,46 +270,36 @@ class CortellisDataProcessor:
         relationships = []
 
         # Drug-Patent relationships
-        drug_dict = {drug['name'].lower(): drug for drug in drugs if 'name' in drug}
+        drug_dict = {drug.name.lower(): drug for drug in drugs if drug.name}
 
         for patent in patents:
-            patent_drugs = patent.get('drugs', [])
-            for drug_name in patent_drugs:
+            for drug_name in patent.drugs or ():
                 drug_name_lower = drug_name.lower()
                 if drug_name_lower in drug_dict:
-                    relationship = {
-                        'type': 'drug_patent',
-                        'drug_id': drug_dict[drug_name_lower].get('id'),
-                        'drug_name': drug_name,
-                        'patent_id': patent.get('id'),
-                        'patent_number': patent.get('patent_number'),
-                        'relationship_date': patent.get('application_date')
-                    }
+                    relationship = RelationshipRecord(
+                        type='drug_patent',
+                        drug_id=drug_dict[drug_name_lower].id,
+                        drug_name=drug_name,
+                        patent_id=patent.id,
+                        patent_number=patent.patent_number,
+                        relationship_date=patent.application_date
+                    )
                     relationships.append(relationship)
 
         # Save relationships
         rel_file = os.path.join(self.output_dir, 'relationships.json')
-        with open(rel_file, 'w', encoding='utf-8') as f:
-            json.dump(relationships, f, ensure_ascii=False, indent=2)
+        write_records(relationships, rel_file)
 
         print(f"✅ Created {len(relationships)} relationships")
 
         return relationships
 
-    def process_all(self):
-        """Process all Cortellis data"""
-        print("\n" + "=" * 80)
-        print("CORTELLIS DATA PROCESSING SYSTEM")
-        print("=" * 80)
-
-        # Process patents and drugs
-        patents = self.process_patents()
-        drugs = self.process_drugs()
-
-        # Create relationships
-        relationships = self.create_relationships(patents, drugs)
+    def create_master_index(self):
+        """Create the master index from the saved stage outputs"""
+        def read_output(filename):
+            with open(os.path.join(self.output_dir, filename), 'r', encoding='utf-8') as f:
+                return json.load(f)
 
-        # Create master index
         master_index = {
             'metadata': {
                 'source': 'Cortellis',
@@ -326,29 +307,162 @@ class CortellisDataProcessor:
                 'version': '1.0'
             },
             'statistics': {
-                'total_patents': len(patents),
-                'total_drugs': len(drugs),
-                'total_relationships': len(relationships)
+                'total_patents': read_output('patent_statistics.json')['total_patents'],
+                'total_drugs': read_output('drug_statistics.json')['total_drugs'],
+                'total_relationships': len(read_output('relationships.json')),
+                'total_families': read_output('patent_families.json')['total_families'],
+                'total_companies': read_output('company_index.json')['total_companies']
             },
             'files': {
                 'patents': 'patents_processed.json',
                 'drugs': 'drugs_processed.json',
                 'relationships': 'relationships.json',
+                'families': 'patent_families.json',
+                'companies': 'company_index.json',
+                'similar_neighbors': 'similar_patents_neighbors.npy',
+                'similar_scores': 'similar_patents_scores.npy',
+                'similar_ids': 'similar_patents_ids.json',
+                'sort_orders': 'sort_orders.json',
+                'graph': 'knowledge_graph.npz',
+                'graph_nodes': 'knowledge_graph_nodes.json',
                 'patent_stats': 'patent_statistics.json',
                 'drug_stats': 'drug_statistics.json'
-            }
+            },
+            'corpus': CORPUS_FILE
         }
 
         index_file = os.path.join(self.output_dir, 'master_index.json')
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(master_index, f, ensure_ascii=False, indent=2)
+
+        # Pre-compressed variants and content hashes for every output file
+        master_index['artifacts'] = publish_artifacts(
+            self.output_dir, master_index['files'].values(),
+            load_index(index_file)
+        )
+
+        write_json(master_index, index_file)
+
+        return master_index
+
+    def pipeline_stages(self):
+        """Processing stages with their inputs, outputs and dependencies"""
+        def output(filename):
+            return os.path.join(self.output_dir, filename)
+
+        def load_json(filename):
+            with open(output(filename), 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        return [
+            Stage('patents', self.process_patents,
+                  inputs=[self.patents_file],
+                  outputs=[output('patents_processed.json'), output('patent_statistics.json')],
+                  load=lambda: load_records(PatentRecord, output('patents_processed.json'))),
+            Stage('drugs', self.process_drugs,
+                  inputs=[self.drugs_file],
+                  outputs=[output('drugs_processed.json'), output('drug_statistics.json')],
+                  load=lambda: load_records(DrugRecord, output('drugs_processed.json'))),
+            Stage('relationships', self.create_relationships,
+                  deps=['patents', 'drugs'],
+                  outputs=[output('relationships.json')],
+                  load=lambda: load_records(RelationshipRecord, output('relationships.json'))),
+            Stage('families', lambda patents: create_family_index(patents, self.output_dir),
+                  deps=['patents'],
+                  outputs=[output('patent_families.json')],
+                  load=lambda: load_json('patent_families.json')),
+            Stage('companies', lambda patents, drugs: create_company_index(patents, drugs, self.output_dir),
+                  deps=['patents', 'drugs'],
+                  outputs=[output('company_index.json')],
+                  load=lambda: load_json('company_index.json')),
+            Stage('similarity', lambda patents: create_similarity_index(patents, self.output_dir),
+                  deps=['patents'],
+                  outputs=[output('similar_patents_neighbors.npy'), output('similar_patents_scores.npy'),
+                           output('similar_patents_ids.json')]),
+            Stage('sort_orders',
+                  lambda patents, drugs, relationships: create_sort_orders(patents, drugs, relationships,
+                                                                           self.output_dir),
+                  deps=['patents', 'drugs', 'relationships'],
+                  outputs=[output('sort_orders.json')],
+                  load=lambda: load_json('sort_orders.json')),
+            Stage('graph',
+                  lambda patents, drugs, relationships: create_knowledge_graph(patents, drugs, relationships,
+                                                                               self.output_dir),
+                  deps=['patents', 'drugs', 'relationships'],
+                  outputs=[output('knowledge_graph.npz'), output('knowledge_graph_nodes.json')]),
+            Stage('corpus',
+                  lambda patents, drugs, sort_orders: create_corpus(patents, drugs, sort_orders,
+                                                                    self.output_dir),
+                  deps=['patents', 'drugs', 'sort_orders'],
+                  outputs=[output(CORPUS_FILE)]),
+            Stage('master_index', self.create_master_index,
+                  deps=['patents', 'drugs', 'relationships', 'families', 'companies', 'similarity',
+                        'sort_orders', 'graph', 'corpus'], uses=[],
+                  outputs=[output('master_index.json')],
+                  load=lambda: load_json('master_index.json'))
+        ]
+
+    def process_all(self, extra_stages=()):
+        """
+        Process all Cortellis data
+
+        Stages run through the stage scheduler: independent stages run
+        concurrently and stages with unchanged inputs are skipped.
+        extra_stages are appended to the graph (e.g. unified index, Google merge).
+        """
+        print("\n" + "=" * 80)
+        print("CORTELLIS DATA PROCESSING SYSTEM")
+        print("=" * 80)
+
+        scheduler = StageScheduler(
+            self.pipeline_stages() + list(extra_stages),
+            os.path.join(self.output_dir, '.stage_cache.json')
+        )
+        scheduler.run()
+
+        # Publish once every stage has finished, so a generation never mixes
+        # outputs of two runs; processed_data first, since the unified index
+        # refers to it
+        master_index = load_index(os.path.join(self.output_dir, 'master_index.json'))
+        generation = publish_generation(self.output_dir, index_files(master_index))
+        if 'unified_index' in scheduler.stages:
+            publish_unified_generation()
+
+        ran = [name for name, status in scheduler.status.items() if status == 'ran']
+        cached = [name for name, status in scheduler.status.items() if status == 'cached']
 
         print("\n" + "=" * 80)
         print("✅ PROCESSING COMPLETE!")
         print(f"   Output directory: {self.output_dir}")
-        print(f"   Master index: {index_file}")
+        print(f"   Master index: {os.path.join(self.output_dir, 'master_index.json')}")
+        print(f"   Stages run: {', '.join(ran) or 'none'}")
+        print(f"   Stages cached: {', '.join(cached) or 'none'}")
+        print(f"   Generation: {generation}")
         print("=" * 80)
 
 if __name__ == "__main__":
+    # Pass --profile-memory to report the peak Python heap of the run
+    profile_memory = '--profile-memory' in sys.argv[1:]
+    if profile_memory:
+        tracemalloc.start()
+
+    # Pass --merge-memory-mb=N to run the Google Patents merge out of core within N MB
+    merge_memory_limit = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--merge-memory-mb='):
+            merge_memory_limit = int(arg.split('=', 1)[1]) * 1024 * 1024
+
+    extra_stages = []
+    if os.path.exists('cache/google_patents/search_results.json'):
+        # Imported here so the Cortellis pipeline runs without the SerpAPI client installed
+        from google_patents_integration import google_merge_stage
+        extra_stages.append(google_merge_stage(memory_limit=merge_memory_limit))
+        extra_stages.append(unified_index_stage(deps=('master_index', 'google_merge')))
+    else:
+        extra_stages.append(unified_index_stage())
+
     processor = CortellisDataProcessor()
-    processor.process_all()
\ No newline at end of file
+    processor.process_all(extra_stages=extra_stages)
+
+    if profile_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\n🧠 Peak traced memory: {peak / (1024 * 1024):.1f} MB")
\ No newline at end of file
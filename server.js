@@ -6,61 +6,142 @@
 const express = require('express');
 const cors = require('cors');
 const fs = require('fs').promises;
+const fsSync = require('fs');
 const path = require('path');
 const crypto = require('crypto');
+const cluster = require('cluster');
+const os = require('os');
 
 const app = express();
 const PORT = process.env.PORT || 3005;
 
+// CLUSTER_WORKERS=N (or 'auto' for one per CPU) serves from N worker
+// processes that read the pipeline's corpus file instead of each parsing
+// the JSON data files
+const CLUSTER_WORKERS = process.env.CLUSTER_WORKERS === 'auto'
+    ? os.cpus().length
+    : Number(process.env.CLUSTER_WORKERS) || 0;
+
 // Middleware
 app.use(cors());
 app.use(express.json({ limit: '50mb' }));
 
-// Data paths
-const DATA_PATHS = {
+// Data directories written by the Python pipeline. Each one publishes
+// immutable generations under generations/<n>/ and points CURRENT at the
+// newest; directories without CURRENT are read directly.
+const DATA_DIRS = {
+    cortellis: './processed_data',
+    unified: './unified_patent_data'
+};
+
+// Data files, relative to the active generation of their directory
+const DATA_FILES = {
     cortellis: {
-        patents: './processed_data/patents_processed.json',
-        drugs: './processed_data/drugs_processed.json',
-        relationships: './processed_data/relationships.json',
-        patentStats: './processed_data/patent_statistics.json',
-        drugStats: './processed_data/drug_statistics.json'
+        patents: 'patents_processed.json',
+        drugs: 'drugs_processed.json',
+        relationships: 'relationships.json',
+        families: 'patent_families.json',
+        companies: 'company_index.json',
+        similarNeighbors: 'similar_patents_neighbors.npy',
+        similarScores: 'similar_patents_scores.npy',
+        similarIds: 'similar_patents_ids.json',
+        sortOrders: 'sort_orders.json',
+        corpus: 'corpus.bin',
+        patentStats: 'patent_statistics.json',
+        drugStats: 'drug_statistics.json',
+        masterIndex: 'master_index.json'
     },
     unified: {
-        patents: './unified_patent_data/unified_patents.json',
-        drugs: './unified_patent_data/unified_drugs.json',
-        masterIndex: './unified_patent_data/master_index.json'
+        patents: 'unified_patents.json',
+        drugs: 'unified_drugs.json',
+        corpus: 'corpus.bin',
+        masterIndex: 'master_index.json'
     }
 };
 
-// Cache management
-class DataCache {
+async function readGenerations() {
+    const generations = {};
+    for (const [source, dir] of Object.entries(DATA_DIRS)) {
+        try {
+            generations[source] = (await fs.readFile(path.join(dir, 'CURRENT'), 'utf8')).trim() || null;
+        } catch (error) {
+            generations[source] = null;
+        }
+    }
+    return generations;
+}
+
+function resolveDataPaths(generations) {
+    const paths = {};
+    for (const [source, dir] of Object.entries(DATA_DIRS)) {
+        const base = generations[source] ? path.join(dir, 'generations', generations[source]) : dir;
+        paths[source] = Object.fromEntries(
+            Object.entries(DATA_FILES[source]).map(([key, file]) => [key, path.join(base, file)])
+        );
+    }
+    return paths;
+}
+
+// Resident data, swapped in whole when the pipeline publishes a new generation
+class DataStore {
     constructor() {
-        this.cache = new Map();
-        this.cacheTimeout = 5 * 60 * 1000; // 5 minutes
+        this.data = null;
+        this.loading = null;
+        this.reloadQueued = false;
     }
 
-    get(key) {
-        const item = this.cache.get(key);
-        if (item && Date.now() < item.expiry) {
-            return item.data;
-        }
-        this.cache.delete(key);
-        return null;
+    get() {
+        if (this.data) return Promise.resolve(this.data);
+        // Concurrent first requests share one in-flight load
+        return this.loading || this.load();
     }
 
-    set(key, data) {
-        this.cache.set(key, {
-            data,
-            expiry: Date.now() + this.cacheTimeout
+    load() {
+        // this.loading is set synchronously, so at most one load is in flight
+        this.loading = (async () => {
+            const generations = await readGenerations();
+            if (this.data && JSON.stringify(generations) === JSON.stringify(this.data.generations)) {
+                return this.data;
+            }
+            const data = await buildData(generations);
+            const previous = this.data;
+            this.data = data;
+            if (previous?.corpus) {
+                // Requests still holding the old data get time to finish
+                setTimeout(() => previous.corpus.close(), CORPUS_CLOSE_DELAY_MS).unref();
+            }
+            console.log(`Loaded data generation ${JSON.stringify(generations)}`);
+            return data;
+        })().finally(() => {
+            this.loading = null;
+            if (this.reloadQueued) {
+                this.reloadQueued = false;
+                this.checkForNewGeneration();
+            }
         });
+        return this.loading;
     }
 
-    clear() {
-        this.cache.clear();
+    // Build a changed generation in the background; requests keep using
+    // the current data until the new one is fully loaded
+    checkForNewGeneration() {
+        if (this.loading) {
+            this.reloadQueued = true;
+            return;
+        }
+        this.load().catch(error => console.error('Error loading new data generation:', error.message));
+    }
+
+    watch(intervalMs = 2000) {
+        Object.values(DATA_DIRS).forEach(dir => {
+            fsSync.watchFile(path.join(dir, 'CURRENT'), { interval: intervalMs }, () => {
+                this.checkForNewGeneration();
+            });
+        });
     }
 }
 
-const cache = new DataCache();
+const store = new DataStore();
 
 // Data loading functions
 async function loadJsonFile(filePath) {
@@ -73,30 +154,492 @@ async function loadJsonFile(filePath) {
     }
 }
 
+// Minimal reader for the 2-D little-endian .npy arrays written by the pipeline
+const NPY_TYPES = { '<i4': Int32Array, '<f4': Float32Array };
+
+async function loadNpyFile(filePath) {
+    try {
+        const buffer = await fs.readFile(filePath);
+        const major = buffer[6];
+        const headerLength = major === 1 ? buffer.readUInt16LE(8) : buffer.readUInt32LE(8);
+        const dataOffset = (major === 1 ? 10 : 12) + headerLength;
+        const header = buffer.toString('latin1', dataOffset - headerLength, dataOffset);
+
+        const dtype = header.match(/'descr':\s*'([^']+)'/)[1];
+        const shape = header.match(/'shape':\s*\(([^)]*)\)/)[1]
+            .split(',').filter(s => s.trim()).map(Number);
+        const ArrayType = NPY_TYPES[dtype];
+        if (!ArrayType) throw new Error(`Unsupported dtype ${dtype}`);
+
+        const bytes = buffer.buffer.slice(buffer.byteOffset + dataOffset, buffer.byteOffset + buffer.length);
+        return { shape, data: new ArrayType(bytes) };
+    } catch (error) {
+        console.error(`Error loading ${filePath}:`, error.message);
+        return null;
+    }
+}
+
+async function loadSimilarity(paths) {
+    const [neighbors, scores, ids] = await Promise.all([
+        loadNpyFile(paths.cortellis.similarNeighbors),
+        loadNpyFile(paths.cortellis.similarScores),
+        loadJsonFile(paths.cortellis.similarIds)
+    ]);
+    if (!neighbors || !scores || !ids) return null;
+
+    return {
+        k: neighbors.shape[1],
+        neighbors: neighbors.data,
+        scores: scores.data,
+        ids,
+        rowById: new Map(ids.map((id, row) => [id, row]))
+    };
+}
+
+// Precomputed sort orders as arrays of records. Records missing from an
+// order (e.g. Google-only unified patents) are appended at its end.
+function resolveOrders(section, records, byId) {
+    if (!section) return {};
+    const orders = {};
+    Object.entries(section.orders).forEach(([name, rows]) => {
+        const seen = new Set();
+        const order = [];
+        rows.forEach(row => {
+            const record = byId.get(section.ids[row]);
+            if (record && !seen.has(record)) {
+                seen.add(record);
+                order.push(record);
+            }
+        });
+        records.forEach(record => {
+            if (!seen.has(record)) order.push(record);
+        });
+        orders[name] = order;
+    });
+    return orders;
+}
+
+async function loadSortOrders(paths, data) {
+    const sortOrders = await loadJsonFile(paths.cortellis.sortOrders);
+    return {
+        patents: resolveOrders(sortOrders?.patents, data.patents, data.patentsById),
+        drugs: resolveOrders(sortOrders?.drugs, data.drugs, data.drugsById)
+    };
+}
+
+// Columnar corpus file written by the pipeline (corpus_file.py). Cluster
+// workers read it with positional reads through a small page cache instead
+// of holding the parsed JSON, so the file's pages in the OS page cache are
+// shared by every worker. Node has no mmap; the page cache per worker is
+// bounded by CORPUS_CACHE_MB.
+const CORPUS_MAGIC = 'PATCORP1';
+const CORPUS_PAGE_SIZE = 4096;
+const CORPUS_CACHE_BYTES = (Number(process.env.CORPUS_CACHE_MB) || 64) * 1024 * 1024;
+const CORPUS_CLOSE_DELAY_MS = 60 * 1000;
+
+class CorpusFile {
+    constructor(filePath) {
+        this.path = filePath;
+        this.fd = fsSync.openSync(filePath, 'r');
+        this.pages = new Map();
+        this.maxPages = Math.max(1, Math.floor(CORPUS_CACHE_BYTES / CORPUS_PAGE_SIZE));
+
+        if (this.read(0, 8).toString('latin1') !== CORPUS_MAGIC) {
+            this.close();
+            throw new Error(`${filePath} is not a corpus file`);
+        }
+        const headerLength = this.uint64(8);
+        this.header = JSON.parse(this.read(16, headerLength).toString('utf8'));
+        this.base = 16 + headerLength;
+        this.tables = Object.fromEntries(
+            Object.entries(this.header.tables).map(([name, spec]) => [name, new CorpusTable(this, spec)])
+        );
+    }
+
+    // Least recently used pages are evicted first
+    page(index) {
+        let page = this.pages.get(index);
+        if (page) {
+            this.pages.delete(index);
+        } else {
+            page = Buffer.allocUnsafe(CORPUS_PAGE_SIZE);
+            const bytesRead = fsSync.readSync(this.fd, page, 0, CORPUS_PAGE_SIZE, index * CORPUS_PAGE_SIZE);
+            page = page.subarray(0, bytesRead);
+            if (this.pages.size >= this.maxPages) {
+                this.pages.delete(this.pages.keys().next().value);
+            }
+        }
+        this.pages.set(index, page);
+        return page;
+    }
+
+    read(position, length) {
+        // Large sequential reads bypass the page cache
+        if (length > 16 * CORPUS_PAGE_SIZE) {
+            const bytes = Buffer.allocUnsafe(length);
+            fsSync.readSync(this.fd, bytes, 0, length, position);
+            return bytes;
+        }
+        const first = Math.floor(position / CORPUS_PAGE_SIZE);
+        const last = Math.floor((position + length - 1) / CORPUS_PAGE_SIZE);
+        const start = position - first * CORPUS_PAGE_SIZE;
+        if (first === last) {
+            return this.page(first).subarray(start, start + length);
+        }
+        const bytes = Buffer.allocUnsafe(length);
+        let copied = 0;
+        for (let index = first; index <= last; index++) {
+            const page = this.page(index);
+            const from = index === first ? start : 0;
+            copied += page.copy(bytes, copied, from, Math.min(page.length, from + length - copied));
+        }
+        return bytes;
+    }
+
+    uint64(position) {
+        const bytes = this.read(position, 8);
+        return bytes.readUInt32LE(0) + bytes.readUInt32LE(4) * 2 ** 32;
+    }
+
+    uint32(position) {
+        return this.read(position, 4).readUInt32LE(0);
+    }
+
+    close() {
+        if (this.fd !== null) {
+            fsSync.closeSync(this.fd);
+            this.fd = null;
+            this.pages.clear();
+        }
+    }
+}
+
+// Rows decoded together when a table is scanned in storage order
+const CORPUS_BLOCK_ROWS = 1024;
+const BLOCK = Symbol('block');
+const ROW = Symbol('row');
+
+function readOffset(bytes, i) {
+    return bytes.readUInt32LE(8 * i) + bytes.readUInt32LE(8 * i + 4) * 2 ** 32;
+}
+
+// One table of a corpus file. Behaves like the array of records for the
+// routes (length, at, iteration, forEach/map/filter/find/some); records
+// are decoded on access, a block of rows at a time when scanning.
+class CorpusTable {
+    constructor(file, spec) {
+        this.file = file;
+        this.length = spec.rows;
+        this.columns = spec.columns.map((c, index) => ({
+            name: c.name, index, offsets: file.base + c.offsets, data: file.base + c.data
+        }));
+        // Fields of each record layout in their original order
+        this.layouts = spec.layouts.map(layout => layout.map(i => this.columns[i]));
+        this.layoutHas = spec.layouts.map(layout => {
+            const has = new Uint8Array(this.columns.length);
+            layout.forEach(i => { has[i] = 1; });
+            return has;
+        });
+        this.rowLayouts = file.base + spec.row_layouts;
+        this.idIndex = {
+            count: spec.id_index.count,
+            rows: file.base + spec.id_index.rows,
+            offsets: file.base + spec.id_index.offsets,
+            data: file.base + spec.id_index.data
+        };
+        this.rowsById = null;
+        this.orders = Object.fromEntries(
+            Object.entries(spec.orders).map(([name, position]) => [name, new CorpusOrder(this, file.base + position)])
+        );
+
+        // Read-only row views for predicates: each field is decoded, for the
+        // whole block, only when a predicate first reads it
+        this.View = class {
+            constructor(block, row) {
+                this[BLOCK] = block;
+                this[ROW] = row;
+            }
+        };
+        this.columns.forEach(column => {
+            Object.defineProperty(this.View.prototype, column.name, {
+                get() { return this[BLOCK].value(column, this[ROW]); }
+            });
+        });
+    }
+
+    // Values are stored as JSON followed by a comma
+    value(column, row) {
+        const offsets = this.file.read(column.offsets + 8 * row, 16);
+        const start = readOffset(offsets, 0);
+        return JSON.parse(this.file.read(column.data + start, readOffset(offsets, 1) - start - 1).toString('utf8'));
+    }
+
+    // Values of `count` rows of a column, parsed as one JSON array
+    // (null where a record has no such field)
+    columnValues(column, first, count) {
+        const start = readOffset(this.file.read(column.offsets + 8 * first, 8), 0);
+        const end = readOffset(this.file.read(column.offsets + 8 * (first + count), 8), 0);
+        return JSON.parse('[' + this.file.read(column.data + start, end - start - 1).toString('utf8') + ']');
+    }
+
+    layoutIds(first, count) {
+        const bytes = this.file.read(this.rowLayouts + 4 * first, 4 * count);
+        const ids = new Uint32Array(count);
+        for (let i = 0; i < count; i++) ids[i] = bytes.readUInt32LE(4 * i);
+        return ids;
+    }
+
+    at(row) {
+        if (row < 0 || row >= this.length) return undefined;
+        const record = {};
+        for (const column of this.layouts[this.file.uint32(this.rowLayouts + 4 * row)]) {
+            record[column.name] = this.value(column, row);
+        }
+        return record;
+    }
+
+    // Records of rows first .. first + count - 1
+    records(first, count) {
+        const layouts = this.layoutIds(first, count);
+        const values = this.columns.map(column => this.columnValues(column, first, count));
+        const records = new Array(count);
+        for (let i = 0; i < count; i++) {
+            const record = {};
+            for (const column of this.layouts[layouts[i]]) {
+                record[column.name] = values[column.index][i];
+            }
+            records[i] = record;
+        }
+        return records;
+    }
+
+    *[Symbol.iterator]() {
+        for (let first = 0; first < this.length; first += CORPUS_BLOCK_ROWS) {
+            yield* this.records(first, Math.min(CORPUS_BLOCK_ROWS, this.length - first));
+        }
+    }
+
+    map(fn) {
+        const mapped = [];
+        let row = 0;
+        for (const record of this) mapped.push(fn(record, row++));
+        return mapped;
+    }
+
+    // Callbacks of forEach and predicates of filter/find/some/matchMask get
+    // read-only row views, so only the fields they read are decoded;
+    // matching records are then decoded in full
+    *views() {
+        for (let first = 0; first < this.length; first += CORPUS_BLOCK_ROWS) {
+            const block = new CorpusBlock(this, first, Math.min(CORPUS_BLOCK_ROWS, this.length - first));
+            for (let i = 0; i < block.count; i++) yield [new this.View(block, i), block, i];
+        }
+    }
+
+    forEach(fn) {
+        for (const [view, block, i] of this.views()) fn(view, block.first + i);
+    }
+
+    *matching(matches) {
+        for (const [view, block, i] of this.views()) {
+            if (matches(view)) yield block.record(i);
+        }
+    }
+
+    filter(fn) {
+        const matched = [];
+        for (const [view, block, i] of this.views()) {
+            if (fn(view, block.first + i)) matched.push(block.record(i));
+        }
+        return matched;
+    }
+
+    find(fn) {
+        for (const [view, block, i] of this.views()) {
+            if (fn(view, block.first + i)) return block.record(i);
+        }
+        return undefined;
+    }
+
+    some(fn) {
+        return this.find(fn) !== undefined;
+    }
+
+    // 1 for every row whose record satisfies `matches`
+    matchMask(matches) {
+        const mask = new Uint8Array(this.length);
+        for (const [view, block, i] of this.views()) {
+            mask[block.first + i] = matches(view) ? 1 : 0;
+        }
+        return mask;
+    }
+
+    // Storage order as row numbers, for walking a match mask
+    rows() {
+        return { length: this.length, at: i => i };
+    }
+
+    // Row of an id from the id index, read into a Map on first use; a
+    // repeated id resolves to its last row as with a Map built from the records
+    rowOf(id) {
+        if (!this.rowsById) {
+            const { count, rows, offsets, data } = this.idIndex;
+            const ends = this.file.read(offsets, 8 * (count + 1));
+            const ids = this.file.read(data, readOffset(ends, count));
+            const numbers = this.file.read(rows, 4 * count);
+            this.rowsById = new Map();
+            for (let i = 0; i < count; i++) {
+                this.rowsById.set(ids.toString('utf8', readOffset(ends, i), readOffset(ends, i + 1)), numbers.readUInt32LE(4 * i));
+            }
+        }
+        return this.rowsById.get(id);
+    }
+
+    // Records of many ids, in input order. Blocks holding many of the rows
+    // are decoded column-wise, sparse ones record by record.
+    getMany(ids) {
+        const rows = ids.map(id => this.rowOf(id));
+        const perBlock = new Map();
+        rows.forEach(row => {
+            if (row === undefined) return;
+            const first = row - row % CORPUS_BLOCK_ROWS;
+            perBlock.set(first, (perBlock.get(first) || 0) + 1);
+        });
+        const blocks = new Map();
+        perBlock.forEach((hits, first) => {
+            if (hits >= CORPUS_BLOCK_ROWS / 8) {
+                blocks.set(first, new CorpusBlock(this, first, Math.min(CORPUS_BLOCK_ROWS, this.length - first)));
+            }
+        });
+        return rows.map(row => {
+            if (row === undefined) return undefined;
+            const block = blocks.get(row - row % CORPUS_BLOCK_ROWS);
+            return block ? block.record(row - block.first) : this.at(row);
+        });
+    }
+
+    byId() {
+        return { get: id => this.at(this.rowOf(id) ?? -1), getMany: ids => this.getMany(ids) };
+    }
+}
+
+// Column values of a block of rows, decoded per column on first use
+class CorpusBlock {
+    constructor(table, first, count) {
+        this.table = table;
+        this.first = first;
+        this.count = count;
+        this.layouts = table.layoutIds(first, count);
+        this.values = new Array(table.columns.length);
+    }
+
+    value(column, i) {
+        if (!this.table.layoutHas[this.layouts[i]][column.index]) return undefined;
+        if (!this.values[column.index]) {
+            this.values[column.index] = this.table.columnValues(column, this.first, this.count);
+        }
+        return this.values[column.index][i];
+    }
+
+    record(i) {
+        const record = {};
+        for (const column of this.table.layouts[this.layouts[i]]) {
+            record[column.name] = this.value(column, i);
+        }
+        return record;
+    }
+}
+
+// Precomputed sort order: row numbers into a corpus table
+class CorpusOrder {
+    constructor(table, position) {
+        this.table = table;
+        this.position = position;
+        this.length = table.length;
+        this.rowNumbers = null;
+    }
+
+    at(i) {
+        return i >= 0 && i < this.length ? this.table.at(this.table.file.uint32(this.position + 4 * i)) : undefined;
+    }
+
+    // The row numbers, read once (4 bytes per row)
+    rows() {
+        if (!this.rowNumbers) {
+            const bytes = this.table.file.read(this.position, 4 * this.length);
+            this.rowNumbers = new Uint32Array(this.length);
+            for (let i = 0; i < this.length; i++) this.rowNumbers[i] = bytes.readUInt32LE(4 * i);
+        }
+        return this.rowNumbers;
+    }
+}
+
+// The corpus of the data source the JSON loader would pick, or null when
+// that source has no corpus file
+function openCorpus(paths) {
+    for (const source of ['unified', 'cortellis']) {
+        if (fsSync.existsSync(paths[source].corpus)) {
+            const file = new CorpusFile(paths[source].corpus);
+            if (file.tables.patents && file.tables.drugs) return { source, file };
+            file.close();
+        }
+        if (fsSync.existsSync(paths[source].patents)) return null;
+    }
+    return null;
+}
+
+// Pre-compressed artifacts listed in the pipeline master indexes, by file name
+async function loadArtifacts(paths) {
+    const artifacts = new Map();
+    for (const indexPath of [paths.cortellis.masterIndex, paths.unified.masterIndex]) {
+        const index = await loadJsonFile(indexPath);
+        const dir = path.dirname(indexPath);
+        Object.entries(index?.artifacts || {}).forEach(([filename, entry]) => {
+            if (!artifacts.has(filename)) {
+                artifacts.set(filename, { dir, filename, entry });
+            }
+        });
+    }
+    return artifacts;
+}
+
 async function loadAllData() {
-    const cacheKey = 'all_data';
-    const cached = cache.get(cacheKey);
-    if (cached) return cached;
+    return store.get();
+}
 
+async function buildData(generations) {
+    const paths = resolveDataPaths(generations);
     const data = {
+        generations,
         patents: [],
         drugs: [],
         relationships: [],
+        families: null,
         statistics: {}
     };
 
-    // Try to load unified data first
-    const unifiedPatents = await loadJsonFile(DATA_PATHS.unified.patents);
-    const unifiedDrugs = await loadJsonFile(DATA_PATHS.unified.drugs);
+    const corpus = CLUSTER_WORKERS ? openCorpus(paths) : null;
+    if (CLUSTER_WORKERS && !corpus) {
+        console.warn('No corpus file for the current data; this worker loads the JSON data files');
+    }
 
-    if (unifiedPatents && unifiedDrugs) {
+    // Try to load unified data first
+    const unifiedPatents = corpus ? null : await loadJsonFile(paths.unified.patents);
+    const unifiedDrugs = corpus ? null : await loadJsonFile(paths.unified.drugs);
+
+    if (corpus) {
+        data.corpus = corpus.file;
+        data.patents = corpus.file.tables.patents;
+        data.drugs = corpus.file.tables.drugs;
+        data.source = corpus.source;
+    } else if (unifiedPatents && unifiedDrugs) {
         data.patents = unifiedPatents;
         data.drugs = unifiedDrugs;
         data.source = 'unified';
     } else {
         // Fall back to Cortellis data
-        const cortellisPatents = await loadJsonFile(DATA_PATHS.cortellis.patents);
-        const cortellisDrugs = await loadJsonFile(DATA_PATHS.cortellis.drugs);
+        const cortellisPatents = await loadJsonFile(paths.cortellis.patents);
+        const cortellisDrugs = await loadJsonFile(paths.cortellis.drugs);
 
         if (cortellisPatents && cortellisDrugs) {
             data.patents = cortellisPatents;
@@ -106,24 +649,247 @@ async function loadAllData() {
     }
 
     // Load relationships and statistics
-    data.relationships = await loadJsonFile(DATA_PATHS.cortellis.relationships) || [];
+    data.relationships = await loadJsonFile(paths.cortellis.relationships) || [];
+    data.families = await loadJsonFile(paths.cortellis.families);
+    data.similarity = await loadSimilarity(paths);
+    data.artifacts = await loadArtifacts(paths);
+    if (data.corpus) {
+        data.patentsById = data.patents.byId();
+        data.drugsById = data.drugs.byId();
+        data.sortOrders = { patents: data.patents.orders, drugs: data.drugs.orders };
+        data.matchMasks = new Map();
+    } else {
+        data.patentsById = new Map(data.patents.map(patent => [patent.id, patent]));
+        data.drugsById = new Map(data.drugs.map(drug => [drug.id, drug]));
+        data.sortOrders = await loadSortOrders(paths, data);
+    }
+    data.companies = await loadJsonFile(paths.cortellis.companies);
+    data.companyKeys = data.companies ? Object.keys(data.companies.companies) : [];
     data.statistics = {
-        patents: await loadJsonFile(DATA_PATHS.cortellis.patentStats) || {},
-        drugs: await loadJsonFile(DATA_PATHS.cortellis.drugStats) || {}
+        patents: await loadJsonFile(paths.cortellis.patentStats) || {},
+        drugs: await loadJsonFile(paths.cortellis.drugStats) || {}
     };
 
-    cache.set(cacheKey, data);
     return data;
 }
 
-// Search utilities
-function searchPatents(patents, query, filters = {}) {
-    let results = patents;
+// Artifact serving
+const ENCODING_PREFERENCE = ['zstd', 'gzip'];
+
+function negotiateEncoding(acceptEncoding, entry) {
+    const accepted = new Set();
+    (acceptEncoding || '').split(',').forEach(part => {
+        const [name, ...params] = part.trim().toLowerCase().split(';');
+        const rejected = params.some(p => /^\s*q=0(\.0*)?\s*$/.test(p));
+        if (name && !rejected) accepted.add(name);
+    });
+    return ENCODING_PREFERENCE.find(encoding =>
+        entry[encoding] && (accepted.has(encoding) || accepted.has('*'))
+    ) || null;
+}
+
+function sendArtifact(req, res, artifact) {
+    const { dir, filename, entry } = artifact;
+    const encoding = negotiateEncoding(req.headers['accept-encoding'], entry);
+    const etag = `"${entry.sha256}${encoding ? `-${encoding}` : ''}"`;
+
+    res.set({
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'public, max-age=0, must-revalidate',
+        'Content-Type': filename.endsWith('.json') ? 'application/json; charset=utf-8' : 'application/octet-stream'
+    });
+
+    const ifNoneMatch = req.headers['if-none-match'];
+    if (ifNoneMatch && ifNoneMatch.split(',').some(tag => tag.trim() === etag)) {
+        return res.status(304).end();
+    }
+
+    const variant = encoding ? entry[encoding] : entry;
+    if (encoding) res.set('Content-Encoding', encoding);
+    res.set('Content-Length', String(variant.size));
+
+    fsSync.createReadStream(path.join(dir, encoding ? variant.file : filename))
+        .on('error', error => {
+            if (!res.headersSent) {
+                res.status(500).json({ error: error.message });
+            } else {
+                res.destroy(error);
+            }
+        })
+        .pipe(res);
+}
+
+// Company resolution, mirroring normalize_company() in company_index.py
+const COMPANY_SUFFIXES = new Set([
+    'inc', 'incorporated', 'corp', 'corporation', 'ltd', 'limited',
+    'llc', 'llp', 'lp', 'plc', 'ag', 'sa', 'sas', 'se', 'gmbh', 'kg', 'kgaa', 'nv',
+    'bv', 'spa', 'srl', 'kk', 'ab', 'as', 'asa', 'oy', 'oyj', 'pty', 'pte', 'pvt',
+    'bhd', 'sl', 'ulc'
+]);
+const COMPANY_ABBREVIATIONS = new Map([['company', 'co']]);
+const COMPANY_INITIALS = /(?<![a-z0-9])(?:[a-z][./] ?)+[a-z](?![a-z0-9])\.?/g;
+
+function normalizeCompany(name) {
+    const text = name.normalize('NFKD')
+        .replace(/[\u0300-\u036f]/g, '')
+        .toLowerCase()
+        .replace(COMPANY_INITIALS, initials => initials.replace(/[^a-z]/g, ''))
+        .replace(/&/g, ' and ')
+        .replace(/\./g, '');
+    const tokens = text.replace(/[^a-z0-9]+/g, ' ').split(' ').filter(Boolean)
+        .map(token => COMPANY_ABBREVIATIONS.get(token) || token);
+    while (tokens.length > 1 && COMPANY_SUFFIXES.has(tokens[tokens.length - 1])) {
+        tokens.pop();
+    }
+    return tokens.join(' ');
+}
+
+function companyKey(name) {
+    return normalizeCompany(name).replace(/ /g, '');
+}
+
+// Canonical company IDs for a query: exact canonical or variant match, else key substring
+function resolveCompanies(data, query) {
+    const key = companyKey(query);
+    if (!key) return [];
+    if (data.companies.companies[key]) return [key];
+    const variant = data.companies.variants[query.toLowerCase()];
+    if (variant) return [variant];
+    return data.companyKeys.filter(k => k.includes(key));
+}
+
+function companyPostings(data, companyIds, field, byId) {
+    const ids = new Set();
+    companyIds.forEach(key => data.companies.companies[key][field].forEach(id => ids.add(id)));
+    const records = byId.getMany ? byId.getMany([...ids]) : [...ids].map(id => byId.get(id));
+    return records.filter(Boolean);
+}
+
+// Patents and drugs of a company, from the company index when available
+function findCompanyHoldings(data, company) {
+    if (data.companies) {
+        const companyIds = resolveCompanies(data, company);
+        return {
+            companyIds,
+            matchedCompanies: companyIds.map(id => ({ id, name: data.companies.companies[id].name })),
+            patents: companyPostings(data, companyIds, 'patents', data.patentsById),
+            drugs: companyPostings(data, companyIds, 'drugs', data.drugsById)
+        };
+    }
+
+    const term = company.toLowerCase();
+    return {
+        companyIds: null,
+        matchedCompanies: undefined,
+        patents: data.patents.filter(patent =>
+            patent.grantees?.some(g => g.toLowerCase().includes(term)) ||
+            patent.original_applicants?.some(a => a.toLowerCase().includes(term))
+        ),
+        drugs: data.drugs.filter(drug =>
+            drug.active_companies?.some(c => c.toLowerCase().includes(term))
+        )
+    };
+}
+
+// Field projection. Fields are picked from the resident records, so a
+// projected response holds no second copy of the projected fields.
+const PATENT_FIELDS = [
+    'id', 'patent_number', 'application_number', 'title', 'abstract',
+    'classifications', 'advantages', 'application_date', 'grant_date',
+    'expiry_date', 'latest_expiry_date', 'inventors', 'grantees',
+    'original_applicants', 'compound_name', 'drugs', 'chemistry', 'biology',
+    'formulation', 'jurisdiction', 'medical_uses', 'targets', 'mechanisms',
+    'pharmacokinetics', 'patent_family', 'data_source', 'processed_date'
+];
+
+function parseFields(fieldsParam) {
+    if (!fieldsParam) return { fields: null };
+    const fields = ['id', ...fieldsParam.split(',').map(f => f.trim()).filter(f => f && f !== 'id')];
+    const unknown = fields.filter(f => !PATENT_FIELDS.includes(f));
+    return unknown.length ? { error: `Unknown fields: ${unknown.join(', ')}` } : { fields: [...new Set(fields)] };
+}
+
+function patentProjector(fields) {
+    return fields ? patent => pickFields(patent, fields) : patent => patent;
+}
+
+function pickFields(record, fields) {
+    const projected = {};
+    fields.forEach(field => {
+        if (record[field] !== undefined) projected[field] = record[field];
+    });
+    return projected;
+}
+
+// Streamed NDJSON: one record per line, written in chunks as they are
+// produced. The response waits on 'drain' when the socket buffer is full
+// and stops if the client goes away.
+const NDJSON_TYPE = 'application/x-ndjson';
+const NDJSON_CHUNK_SIZE = 64 * 1024;
+
+function wantsNdjson(req) {
+    return req.query.format === 'ndjson' || (req.headers.accept || '').includes(NDJSON_TYPE);
+}
+
+function waitForDrain(res) {
+    return new Promise(resolve => {
+        const done = () => {
+            res.off('drain', done);
+            res.off('close', done);
+            resolve();
+        };
+        res.on('drain', done);
+        res.on('close', done);
+    });
+}
+
+async function streamNdjson(res, records, project) {
+    res.status(200).set('Content-Type', `${NDJSON_TYPE}; charset=utf-8`);
+
+    let closed = false;
+    res.on('close', () => { closed = true; });
+
+    let chunk = '';
+    for (const record of records) {
+        chunk += JSON.stringify(project(record)) + '\n';
+        if (chunk.length >= NDJSON_CHUNK_SIZE) {
+            const flushed = res.write(chunk);
+            chunk = '';
+            if (!flushed) await waitForDrain(res);
+            if (closed) return;
+        }
+    }
+    res.end(chunk);
+}
+
+function* filterRecords(records, matches) {
+    if (records instanceof CorpusTable) {
+        yield* records.matching(matches);
+        return;
+    }
+    for (const record of records) {
+        if (matches(record)) yield record;
+    }
+}
+
+function sendError(res, error) {
+    if (res.headersSent) {
+        res.destroy(error);
+    } else {
+        res.status(500).json({ error: error.message });
+    }
+}
+
+// Search utilities. Each builds a predicate, so a search can stop scanning
+// as soon as a page is full.
+function patentMatcher(query, filters = {}) {
+    const checks = [];
 
     // Text search
     if (query) {
         const searchTerm = query.toLowerCase();
-        results = results.filter(patent => {
+        checks.push(patent => {
             const searchableText = [
                 patent.title,
                 patent.abstract,
@@ -141,62 +907,53 @@ function searchPatents(patents, query, filters = {}) {
 
     // Apply filters
     if (filters.classification) {
-        results = results.filter(patent =>
-            patent.classifications?.some(c =>
-                c.toLowerCase().includes(filters.classification.toLowerCase())
-            )
+        const classification = filters.classification.toLowerCase();
+        checks.push(patent =>
+            patent.classifications?.some(c => c.toLowerCase().includes(classification))
         );
     }
 
     if (filters.drug) {
-        results = results.filter(patent =>
-            patent.drugs?.some(d =>
-                d.toLowerCase().includes(filters.drug.toLowerCase())
-            )
+        const drug = filters.drug.toLowerCase();
+        checks.push(patent =>
+            patent.drugs?.some(d => d.toLowerCase().includes(drug))
         );
     }
 
     if (filters.company) {
-        results = results.filter(patent =>
-            patent.grantees?.some(g =>
-                g.toLowerCase().includes(filters.company.toLowerCase())
-            ) ||
-            patent.original_applicants?.some(a =>
-                a.toLowerCase().includes(filters.company.toLowerCase())
-            )
+        const company = filters.company.toLowerCase();
+        checks.push(patent =>
+            patent.grantees?.some(g => g.toLowerCase().includes(company)) ||
+            patent.original_applicants?.some(a => a.toLowerCase().includes(company))
         );
     }
 
     if (filters.dateFrom) {
-        results = results.filter(patent =>
-            patent.application_date >= filters.dateFrom
-        );
+        checks.push(patent => patent.application_date >= filters.dateFrom);
     }
 
     if (filters.dateTo) {
-        results = results.filter(patent =>
-            patent.application_date <= filters.dateTo
-        );
+        checks.push(patent => patent.application_date <= filters.dateTo);
     }
 
     if (filters.hasExpired !== undefined) {
         const now = new Date().toISOString().split('T')[0];
-        results = results.filter(patent => {
+        checks.push(patent => {
             const isExpired = patent.earliest_expiry_date && patent.earliest_expiry_date < now;
             return filters.hasExpired ? isExpired : !isExpired;
         });
     }
 
-    return results;
+    return patent => checks.every(check => check(patent));
 }
 
-function searchDrugs(drugs, query, filters = {}) {
-    let results = drugs;
+function drugMatcher(query, filters = {}) {
+    const checks = [];
 
     // Text search
     if (query) {
         const searchTerm = query.toLowerCase();
-        results = results.filter(drug => {
+        checks.push(drug => {
             const searchableText = [
                 drug.name,
                 ...(drug.synonyms || []),
@@ -212,42 +969,201 @@ function searchDrugs(drugs, query, filters = {}) {
 
     // Apply filters
     if (filters.phase) {
-        results = results.filter(drug =>
-            drug.highest_phase === filters.phase
-        );
+        checks.push(drug => drug.highest_phase === filters.phase);
     }
 
     if (filters.indication) {
-        results = results.filter(drug =>
-            drug.active_indications?.some(i =>
-                i.toLowerCase().includes(filters.indication.toLowerCase())
-            )
+        const indication = filters.indication.toLowerCase();
+        checks.push(drug =>
+            drug.active_indications?.some(i => i.toLowerCase().includes(indication))
         );
     }
 
     if (filters.company) {
-        results = results.filter(drug =>
-            drug.active_companies?.some(c =>
-                c.toLowerCase().includes(filters.company.toLowerCase())
-            )
+        const company = filters.company.toLowerCase();
+        checks.push(drug =>
+            drug.active_companies?.some(c => c.toLowerCase().includes(company))
         );
     }
 
     if (filters.target) {
-        results = results.filter(drug =>
-            drug.targets?.some(t =>
-                t.toLowerCase().includes(filters.target.toLowerCase())
-            )
+        const target = filters.target.toLowerCase();
+        checks.push(drug =>
+            drug.targets?.some(t => t.toLowerCase().includes(target))
         );
     }
 
     if (filters.launched !== undefined) {
-        results = results.filter(drug =>
+        checks.push(drug =>
             filters.launched ? drug.first_launched_date : !drug.first_launched_date
         );
     }
 
-    return results;
+    return drug => checks.every(check => check(drug));
+}
+
+// Cursor pagination over the precomputed sort orders. A cursor records the
+// sort order, the scan position of the next match, a hash of the query and
+// the data generations, so it cannot be replayed against another search.
+const TOTAL_MODES = ['exact', 'capped', 'estimate', 'none'];
+const TOTAL_CAP = 1000;
+
+function shortHash(value) {
+    return crypto.createHash('sha1').update(JSON.stringify(value)).digest('hex').slice(0, 16);
+}
+
+function encodeCursor(cursor) {
+    return Buffer.from(JSON.stringify(cursor)).toString('base64url');
+}
+
+function decodeCursor(token) {
+    try {
+        const cursor = JSON.parse(Buffer.from(token, 'base64url').toString('utf8'));
+        return Number.isInteger(cursor?.p) && cursor.p >= 0 ? cursor : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+function countMatches(order, matches, from, cap = Infinity) {
+    let count = 0;
+    for (let i = from; i < order.length && count < cap; i++) {
+        if (matches(order.at(i))) count++;
+    }
+    return count;
+}
+
+// Scan `order` from `start`, skipping `offset` matches and collecting up to
+// `limit`. Work is proportional to the records scanned for this page, not to
+// the page number.
+function scanPage(order, matches, { start, offset, limit, totalMode }) {
+    const results = [];
+    let position = start;
+    let skipped = 0;
+    let seen = 0;
+    while (position < order.length && results.length < limit) {
+        const record = order.at(position++);
+        if (!matches(record)) continue;
+        seen++;
+        if (skipped < offset) {
+            skipped++;
+        } else {
+            results.push(record);
+        }
+    }
+
+    // Advance to the next match so the last page never carries a cursor
+    let next = position;
+    while (next < order.length && !matches(order.at(next))) next++;
+    const hasMore = next < order.length;
+    const scannedAll = start === 0 && !hasMore;
+
+    // A first page has counted every match before `next` already
+    const counted = start === 0 ? seen : 0;
+    const countFrom = start === 0 ? next : 0;
+    let total = null;
+    if (totalMode === 'exact') {
+        total = scannedAll ? seen : counted + countMatches(order, matches, countFrom);
+    } else if (totalMode === 'capped') {
+        total = Math.min(TOTAL_CAP, scannedAll ? seen : counted + countMatches(order, matches, countFrom, TOTAL_CAP - counted));
+    } else if (totalMode === 'estimate') {
+        // Extrapolate the match rate of the scanned window to the whole order
+        const scanned = next - start + (hasMore ? 1 : 0);
+        const matched = seen + (hasMore ? 1 : 0);
+        total = scannedAll || scanned === 0 ? seen : Math.round(matched / scanned * order.length);
+    }
+
+    const exact = totalMode === 'exact' || scannedAll || (totalMode === 'capped' && total < TOTAL_CAP);
+    return { results, next: hasMore ? next : null, total, exact };
+}
+
+// Match masks of recent corpus searches (one byte per row), so following a
+// cursor does not evaluate the query over the whole table again
+const MATCH_MASK_CACHE_SIZE = 16;
+
+function corpusMatchMask(data, kind, matches, key) {
+    const cache = data.matchMasks;
+    let mask = cache.get(key);
+    if (mask) {
+        cache.delete(key);
+    } else {
+        mask = data[kind].matchMask(matches);
+        if (cache.size >= MATCH_MASK_CACHE_SIZE) cache.delete(cache.keys().next().value);
+    }
+    cache.set(key, mask);
+    return mask;
+}
+
+function searchPage(req, res, data, kind, matches, queryKey) {
+    const { sort, cursor: token } = req.query;
+    const orders = data.sortOrders[kind];
+    const sortName = sort || 'default';
+
+    const limit = req.query.limit === undefined ? 100 : Number(req.query.limit);
+    const offset = req.query.offset === undefined ? 0 : Number(req.query.offset);
+    if (!Number.isInteger(limit) || limit < 1) {
+        return res.status(400).json({ error: 'limit must be a positive integer' });
+    }
+    if (!Number.isInteger(offset) || offset < 0) {
+        return res.status(400).json({ error: 'offset must be a non-negative integer' });
+    }
+
+    if (sort && !orders[sort]) {
+        return res.status(400).json({
+            error: `Unknown sort '${sort}'`,
+            sorts: ['default', ...Object.keys(orders)]
+        });
+    }
+    const order = sort ? orders[sort] : data[kind];
+
+    const queryHash = shortHash([kind, sortName, queryKey]);
+    const generationHash = shortHash(data.generations);
+    let start = 0;
+    if (token) {
+        const cursor = decodeCursor(token);
+        if (!cursor || cursor.s !== sortName || cursor.q !== queryHash) {
+            return res.status(400).json({ error: 'Invalid cursor for this search' });
+        }
+        if (cursor.g !== generationHash) {
+            return res.status(410).json({ error: 'Cursor is from an older data generation; restart from the first page' });
+        }
+        start = cursor.p;
+    }
+
+    // First pages default to exact totals (offset paging in index.html pages
+    // by them); cursor pages default to an estimate
+    const totalMode = req.query.total || (token ? 'estimate' : 'exact');
+    if (!TOTAL_MODES.includes(totalMode)) {
+        return res.status(400).json({ error: `total must be one of: ${TOTAL_MODES.join(', ')}` });
+    }
+
+    // Corpus data: evaluate the query in storage order first, then walk the
+    // sort order's row numbers over the match mask
+    const mask = data.corpus ? corpusMatchMask(data, kind, matches, shortHash([kind, queryKey])) : null;
+    const page = scanPage(mask ? order.rows() : order, mask ? row => mask[row] === 1 : matches, {
+        start,
+        offset,
+        limit,
+        totalMode
+    });
+    if (mask) {
+        page.results = page.results.map(row => data[kind].at(row));
+    }
+
+    const response = {
+        total: page.total,
+        totalType: page.exact ? 'exact' : totalMode,
+        limit,
+        offset,
+        sort: sortName,
+        nextCursor: page.next === null ? null : encodeCursor({ s: sortName, p: page.next, q: queryHash, g: generationHash }),
+        results: page.results
+    };
+    if (totalMode === 'none') {
+        delete response.total;
+        delete response.totalType;
+    }
+    res.json(response);
 }
 
 // API Routes
@@ -260,9 +1176,14 @@ app.get('/', (req, res) => {
         endpoints: {
             health: '/health',
             statistics: '/api/statistics',
+            patentStatistics: '/api/statistics/patents',
+            drugStatistics: '/api/statistics/drugs',
+            files: '/api/files/:name',
             patents: {
                 search: '/api/patents/search',
                 detail: '/api/patents/:id',
+                family: '/api/patents/:id/family',
+                similar: '/api/patents/:id/similar',
                 byDrug: '/api/patents/drug/:drugName',
                 byCompany: '/api/patents/company/:company',
                 expired: '/api/patents/expired',
@@ -294,6 +1215,8 @@ app.get('/health', async (req, res) => {
         status: 'healthy',
         timestamp: new Date().toISOString(),
         dataSource: data.source || 'none',
+        serving: data.corpus ? 'corpus' : 'memory',
+        generations: data.generations,
         counts: {
             patents: data.patents.length,
             drugs: data.drugs.length,
@@ -321,11 +1244,44 @@ app.get('/api/statistics', async (req, res) => {
     }
 });
 
+// Pre-compressed statistics files
+app.get('/api/statistics/:kind', async (req, res) => {
+    try {
+        const data = await loadAllData();
+        const filename = { patents: 'patent_statistics.json', drugs: 'drug_statistics.json' }[req.params.kind];
+        const artifact = filename && data.artifacts.get(filename);
+
+        if (!artifact) {
+            return res.status(404).json({ error: 'Statistics not found' });
+        }
+
+        sendArtifact(req, res, artifact);
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// Pipeline output files, served from their pre-compressed variants
+app.get('/api/files/:name', async (req, res) => {
+    try {
+        const data = await loadAllData();
+        const artifact = data.artifacts.get(req.params.name);
+
+        if (!artifact) {
+            return res.status(404).json({ error: 'File not found' });
+        }
+
+        sendArtifact(req, res, artifact);
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
 // Patent search
 app.get('/api/patents/search', async (req, res) => {
     try {
         const data = await loadAllData();
-        const { q, classification, drug, company, dateFrom, dateTo, hasExpired, limit = 100, offset = 0 } = req.query;
+        const { q, classification, drug, company, dateFrom, dateTo, hasExpired } = req.query;
 
         const filters = {
             classification,
@@ -336,18 +1292,7 @@ app.get('/api/patents/search', async (req, res) => {
             hasExpired: hasExpired === 'true' ? true : hasExpired === 'false' ? false : undefined
         };
 
-        let results = searchPatents(data.patents, q, filters);
-
-        // Pagination
-        const total = results.length;
-        results = results.slice(Number(offset), Number(offset) + Number(limit));
-
-        res.json({
-            total,
-            limit: Number(limit),
-            offset: Number(offset),
-            results
-        });
+        searchPage(req, res, data, 'patents', patentMatcher(q, filters), [q, filters]);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -386,26 +1331,125 @@ app.get('/api/patents/:id', async (req, res) => {
     }
 });
 
+// Patent family
+app.get('/api/patents/:id/family', async (req, res) => {
+    try {
+        const data = await loadAllData();
+        if (!data.families) {
+            return res.status(503).json({ error: 'Patent family index not available' });
+        }
+
+        const patent = data.patentsById.get(req.params.id) || data.patents.find(p =>
+            p.patent_number === req.params.id ||
+            p.application_number === req.params.id
+        );
+
+        if (!patent) {
+            return res.status(404).json({ error: 'Patent not found' });
+        }
+
+        const familyId = data.families.patent_family_ids[patent.id];
+        const family = data.families.families[familyId];
+        if (!family) {
+            return res.status(404).json({ error: 'Patent not in family index' });
+        }
+
+        // Members that are not in the served data (e.g. dropped by the
+        // unified merge) are listed by id instead of being counted
+        const members = [];
+        const unresolved = [];
+        family.members.forEach(id => {
+            const member = data.patentsById.get(id);
+            if (member) members.push(member); else unresolved.push(id);
+        });
+
+        res.json({
+            familyId,
+            earliestExpiry: family.earliest_expiry,
+            latestExpiry: family.latest_expiry,
+            total: members.length,
+            members,
+            unresolved
+        });
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// Similar patents
+app.get('/api/patents/:id/similar', async (req, res) => {
+    try {
+        const data = await loadAllData();
+        const similarity = data.similarity;
+        if (!similarity) {
+            return res.status(503).json({ error: 'Similar patent index not available' });
+        }
+
+        const patent = data.patentsById.get(req.params.id) || data.patents.find(p =>
+            p.patent_number === req.params.id ||
+            p.application_number === req.params.id
+        );
+        const row = patent ? similarity.rowById.get(patent.id) : undefined;
+
+        if (row === undefined) {
+            return res.status(404).json({ error: 'Patent not found' });
+        }
+
+        const limit = Math.min(Number(req.query.limit) || similarity.k, similarity.k);
+        const similar = [];
+        for (let i = row * similarity.k; i < row * similarity.k + limit; i++) {
+            const neighborRow = similarity.neighbors[i];
+            if (neighborRow < 0) break;
+            const neighbor = data.patentsById.get(similarity.ids[neighborRow]);
+            if (neighbor) {
+                similar.push({
+                    score: similarity.scores[i],
+                    id: neighbor.id,
+                    patentNumber: neighbor.patent_number,
+                    title: neighbor.title
+                });
+            }
+        }
+
+        res.json({
+            id: patent.id,
+            total: similar.length,
+            similar
+        });
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
 // Patents by drug
 app.get('/api/patents/drug/:drugName', async (req, res) => {
     try {
         const data = await loadAllData();
         const drugName = decodeURIComponent(req.params.drugName);
+        const { fields, error } = parseFields(req.query.fields);
+        if (error) {
+            return res.status(400).json({ error, fields: PATENT_FIELDS });
+        }
+        const project = patentProjector(fields);
 
-        const patents = data.patents.filter(patent =>
-            patent.drugs?.some(d =>
-                d.toLowerCase().includes(drugName.toLowerCase())
-            ) ||
-            patent.compound_name?.toLowerCase().includes(drugName.toLowerCase())
-        );
+        const term = drugName.toLowerCase();
+        const matches = patent =>
+            patent.drugs?.some(d => d.toLowerCase().includes(term)) ||
+            patent.compound_name?.toLowerCase().includes(term);
+
+        if (wantsNdjson(req)) {
+            return await streamNdjson(res, filterRecords(data.patents, matches), project);
+        }
+
+        const patents = data.patents.filter(matches);
 
         res.json({
             drug: drugName,
             total: patents.length,
-            patents
+            patents: fields ? patents.map(project) : patents
         });
     } catch (error) {
-        res.status(500).json({ error: error.message });
+        sendError(res, error);
     }
 });
 
@@ -415,22 +1459,26 @@ app.get('/api/patents/company/:company', async (req, res) => {
         const data = await loadAllData();
         const company = decodeURIComponent(req.params.company);
 
-        const patents = data.patents.filter(patent =>
-            patent.grantees?.some(g =>
-                g.toLowerCase().includes(company.toLowerCase())
-            ) ||
-            patent.original_applicants?.some(a =>
-                a.toLowerCase().includes(company.toLowerCase())
-            )
-        );
+        const { fields, error } = parseFields(req.query.fields);
+        if (error) {
+            return res.status(400).json({ error, fields: PATENT_FIELDS });
+        }
+        const project = patentProjector(fields);
+
+        const { matchedCompanies, patents } = findCompanyHoldings(data, company);
+
+        if (wantsNdjson(req)) {
+            return await streamNdjson(res, patents, project);
+        }
 
         res.json({
             company,
+            matchedCompanies,
             total: patents.length,
-            patents
+            patents: fields ? patents.map(project) : patents
         });
     } catch (error) {
-        res.status(500).json({ error: error.message });
+        sendError(res, error);
     }
 });
 
@@ -438,7 +1486,7 @@ app.get('/api/patents/company/:company', async (req, res) => {
 app.get('/api/drugs/search', async (req, res) => {
     try {
         const data = await loadAllData();
-        const { q, phase, indication, company, target, launched, limit = 100, offset = 0 } = req.query;
+        const { q, phase, indication, company, target, launched } = req.query;
 
         const filters = {
             phase,
@@ -448,18 +1496,7 @@ app.get('/api/drugs/search', async (req, res) => {
             launched: launched === 'true' ? true : launched === 'false' ? false : undefined
         };
 
-        let results = searchDrugs(data.drugs, q, filters);
-
-        // Pagination
-        const total = results.length;
-        results = results.slice(Number(offset), Number(offset) + Number(limit));
-
-        res.json({
-            total,
-            limit: Number(limit),
-            offset: Number(offset),
-            results
-        });
+        searchPage(req, res, data, 'drugs', drugMatcher(q, filters), [q, filters]);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -707,26 +1744,19 @@ app.get('/api/analysis/competitive/:company', async (req, res) => {
         const data = await loadAllData();
         const company = decodeURIComponent(req.params.company);
 
-        // Find company's patents
-        const companyPatents = data.patents.filter(patent =>
-            patent.grantees?.some(g =>
-                g.toLowerCase().includes(company.toLowerCase())
-            ) ||
-            patent.original_applicants?.some(a =>
-                a.toLowerCase().includes(company.toLowerCase())
-            )
-        );
-
-        // Find company's drugs
-        const companyDrugs = data.drugs.filter(drug =>
-            drug.active_companies?.some(c =>
-                c.toLowerCase().includes(company.toLowerCase())
-            )
-        );
+        // Find company's patents and drugs
+        const holdings = findCompanyHoldings(data, company);
+        const companyPatents = holdings.patents;
+        const companyDrugs = holdings.drugs;
+        const ownCompanyIds = holdings.companyIds && new Set(holdings.companyIds);
+        const isOwnCompany = comp => ownCompanyIds
+            ? ownCompanyIds.has(companyKey(comp))
+            : comp.toLowerCase().includes(company.toLowerCase());
 
         // Analyze competitive position
         const analysis = {
             company,
+            matchedCompanies: holdings.matchedCompanies,
             overview: {
                 totalPatents: companyPatents.length,
                 totalDrugs: companyDrugs.length,
@@ -815,7 +1845,7 @@ app.get('/api/analysis/competitive/:company', async (req, res) => {
         const competitorScores = {};
         data.drugs.forEach(drug => {
             drug.active_companies?.forEach(comp => {
-                if (!comp.toLowerCase().includes(company.toLowerCase())) {
+                if (!isOwnCompany(comp)) {
                     drug.active_indications?.forEach(ind => {
                         if (companyIndications.has(ind)) {
                             competitorScores[comp] = (competitorScores[comp] || 0) + 1;
@@ -914,13 +1944,41 @@ app.use((err, req, res, next) => {
     });
 });
 
-// Start server
-app.listen(PORT, () => {
+// Start server. In cluster mode the primary only supervises the workers,
+// which share the listening port.
+if (CLUSTER_WORKERS && cluster.isPrimary) {
     console.log(`\n${'='.repeat(80)}`);
     console.log(`PATENT DATABASE BACKEND SERVICE`);
     console.log(`${'='.repeat(80)}`);
-    console.log(`Server running on port ${PORT}`);
-    console.log(`API documentation: http://localhost:${PORT}/`);
-    console.log(`Health check: http://localhost:${PORT}/health`);
+    console.log(`Starting ${CLUSTER_WORKERS} workers on port ${PORT}`);
     console.log(`${'='.repeat(80)}\n`);
-});
\ No newline at end of file
+
+    for (let i = 0; i < CLUSTER_WORKERS; i++) cluster.fork();
+
+    // Replace workers that die after startup; a worker failing before it
+    // listens would fail again, so it is not restarted
+    const listening = new Set();
+    cluster.on('listening', worker => listening.add(worker.id));
+    cluster.on('exit', (worker, code, signal) => {
+        console.error(`Worker ${worker.process.pid} exited (${signal || code})`);
+        if (listening.delete(worker.id)) cluster.fork();
+    });
+} else {
+    app.listen(PORT, () => {
+        if (cluster.isWorker) {
+            console.log(`Worker ${process.pid} listening on port ${PORT}`);
+        } else {
+            console.log(`\n${'='.repeat(80)}`);
+            console.log(`PATENT DATABASE BACKEND SERVICE`);
+            console.log(`${'='.repeat(80)}`);
+            console.log(`Server running on port ${PORT}`);
+            console.log(`API documentation: http://localhost:${PORT}/`);
+            console.log(`Health check: http://localhost:${PORT}/health`);
+            console.log(`${'='.repeat(80)}\n`);
+        }
+
+        // Load data up front and follow new generations published by the pipeline
+        store.get().catch(error => console.error('Error loading data:', error.message));
+        store.watch();
+    });
+}
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Similar Patent Neighbors
+Builds a sparse TF-IDF matrix over the processed Cortellis patents and
+precomputes the top-k most similar patents for every patent
+"""
+import math
+import multiprocessing
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+from pipeline_records import PatentRecord, load_records, write_json
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+TOKEN_PATTERN = re.compile(r'[a-z][a-z0-9\-]{2,}')
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'which', 'are', 'its',
+    'has', 'have', 'was', 'were', 'been', 'being', 'into', 'such', 'use', 'used',
+    'using', 'method', 'methods', 'compound', 'compounds', 'composition',
+    'compositions', 'thereof', 'wherein', 'comprising', 'said', 'also', 'may',
+    'can', 'one', 'more', 'other', 'least', 'new', 'novel'
+}
+
+
+def patent_text(patent):
+    """Text used for similarity: title, abstract, chemistry and mechanisms"""
+    parts = [patent.title, patent.abstract, patent.chemistry]
+    parts.extend(patent.mechanisms or ())
+    return ' '.join(p for p in parts if p)
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def build_tfidf_matrix(patents, min_df=2, max_df=0.2):
+    """
+    Build an L2-normalized CSR TF-IDF matrix, one row per patent
+
+    Terms in fewer than min_df documents or in more than max_df of all
+    documents are dropped. Very common terms add nothing to the ranking
+    and would make the similarity products dense.
+    """
+    term_counts = [Counter(tokenize(patent_text(p))) for p in patents]
+
+    document_frequency = Counter()
+    for counts in term_counts:
+        document_frequency.update(counts.keys())
+
+    n_docs = len(patents)
+    max_count = max_df * n_docs
+    vocabulary = {}
+    for term, df in document_frequency.items():
+        if min_df <= df <= max_count:
+            vocabulary[term] = len(vocabulary)
+
+    idf = np.empty(len(vocabulary), dtype=np.float32)
+    for term, column in vocabulary.items():
+        idf[column] = math.log((1 + n_docs) / (1 + document_frequency[term])) + 1
+
+    indptr = [0]
+    indices = []
+    values = []
+    for counts in term_counts:
+        for term, count in counts.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                values.append((1 + math.log(count)) * idf[column])
+        indptr.append(len(indices))
+
+    matrix = sp.csr_matrix(
+        (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(n_docs, len(vocabulary))
+    )
+
+    # L2-normalize rows so the dot product is the cosine similarity
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sp.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+    return matrix, vocabulary
+
+
+# Worker state, set once per process by _init_worker
+_MATRIX = None
+_MATRIX_T = None
+
+
+def _init_worker(matrix, matrix_t):
+    global _MATRIX, _MATRIX_T
+    _MATRIX = matrix
+    _MATRIX_T = matrix_t
+
+
+def _top_k_block(start, end, k):
+    """Top-k neighbors for rows [start, end) from one sparse block product"""
+    similarities = (_MATRIX[start:end] @ _MATRIX_T).tocsr()
+
+    neighbors = np.full((end - start, k), -1, dtype=np.int32)
+    scores = np.zeros((end - start, k), dtype=np.float32)
+
+    for local_row in range(end - start):
+        lo, hi = similarities.indptr[local_row], similarities.indptr[local_row + 1]
+        columns = similarities.indices[lo:hi]
+        values = similarities.data[lo:hi]
+
+        # Drop the patent itself
+        keep = columns != start + local_row
+        columns, values = columns[keep], values[keep]
+
+        if len(values) > k:
+            # Keep every candidate tied with the k-th score so the tie-break
+            # below does not depend on argpartition's arbitrary choice
+            kth = -np.partition(-values, k - 1)[k - 1]
+            top = values >= kth
+            columns, values = columns[top], values[top]
+
+        # Highest score first, ties broken by the lower row number
+        order = np.lexsort((columns, -values))[:k]
+        count = len(order)
+        neighbors[local_row, :count] = columns[order]
+        scores[local_row, :count] = values[order]
+
+    return start, neighbors, scores
+
+
+def compute_top_k_neighbors(matrix, k=10, block_size=512, workers=None):
+    """
+    Compute the top-k cosine neighbors of every row
+
+    Rows are processed in blocks of block_size, so at most one sparse
+    block product per worker is held in memory at a time. Blocks are
+    spread over a process pool.
+    """
+    n_rows = matrix.shape[0]
+    matrix_t = matrix.T.tocsr()
+
+    neighbors = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+
+    blocks = [(start, min(start + block_size, n_rows)) for start in range(0, n_rows, block_size)]
+    workers = workers or os.cpu_count() or 1
+
+    # Spawned rather than forked: the pipeline calls this from a scheduler
+    # thread, and forking a multi-threaded process can deadlock the child
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(matrix, matrix_t)) as executor:
+        futures = [executor.submit(_top_k_block, start, end, k) for start, end in blocks]
+        for done, future in enumerate(futures, 1):
+            start, block_neighbors, block_scores = future.result()
+            end = start + len(block_neighbors)
+            neighbors[start:end] = block_neighbors
+            scores[start:end] = block_scores
+            if done % 20 == 0 or done == len(futures):
+                print(f"  Processed block {done}/{len(futures)}...")
+
+    return neighbors, scores
+
+
+def save_array(array, file_path):
+    """np.save via a temporary file and an atomic rename"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, file_path)
+
+
+def create_similarity_index(patents, output_dir='processed_data', k=10, block_size=512, workers=None):
+    """Build the TF-IDF matrix, compute neighbors and save the neighbor arrays"""
+    print("\n🧭 COMPUTING SIMILAR PATENTS...")
+    print("-" * 50)
+
+    matrix, vocabulary = build_tfidf_matrix(patents)
+    print(f"TF-IDF matrix: {matrix.shape[0]} patents x {len(vocabulary)} terms, {matrix.nnz} non-zeros")
+
+    neighbors, scores = compute_top_k_neighbors(matrix, k=k, block_size=block_size, workers=workers)
+
+    # Row i of each array belongs to the i-th patent id in similar_patents_ids.json
+    save_array(neighbors, os.path.join(output_dir, 'similar_patents_neighbors.npy'))
+    save_array(scores, os.path.join(output_dir, 'similar_patents_scores.npy'))
+    write_json([p.id for p in patents], os.path.join(output_dir, 'similar_patents_ids.json'), indent=None)
+
+    print(f"✅ Computed top-{k} neighbors for {len(patents)} patents")
+    print(f"   Saved to: {os.path.join(output_dir, 'similar_patents_neighbors.npy')}")
+
+    return neighbors, scores
+
+
+if __name__ == "__main__":
+    create_similarity_index(load_records(PatentRecord, 'processed_data/patents_processed.json'))
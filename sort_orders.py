@@ -0,0 +1,107 @@
+"""
+Precomputed Sort Orders
+Emits patent and drug orderings used by the search endpoints for
+cursor pagination
+"""
+import os
+import sys
+from collections import Counter
+
+from pipeline_records import PatentRecord, DrugRecord, RelationshipRecord, load_records, write_json
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+PHASE_RANKS = [
+    ('launched', 7),
+    ('pre-registration', 5),
+    ('registered', 6),
+    ('phase 3', 4),
+    ('phase 2', 3),
+    ('phase 1', 2),
+    ('preclinical', 1)
+]
+
+
+def phase_rank(phase):
+    """Development stage as a number, higher is further along"""
+    phase = (phase or '').lower()
+    for keyword, rank in PHASE_RANKS:
+        if keyword in phase:
+            return rank
+    return 0
+
+
+def _order(records, key, descending=False):
+    """
+    Row indices of records sorted by key(record)
+
+    Records whose key is None come last, in input order.
+    """
+    keyed = [(key(r), row) for row, r in enumerate(records)]
+    present = sorted((item for item in keyed if item[0] is not None),
+                     key=lambda item: item[0], reverse=descending)
+    missing = [item for item in keyed if item[0] is None]
+    return [row for _, row in present + missing]
+
+
+def build_sort_orders(patents, drugs, relationships):
+    """Patent and drug orderings as row indices into the processed files"""
+    patent_links = Counter(r.patent_id for r in relationships)
+    drug_links = Counter(r.drug_id for r in relationships)
+
+    # Python's sort is stable, so ties keep the earlier (secondary) order
+    by_application = _order(patents, lambda p: p.application_date, descending=True)
+    patent_relevance = sorted(by_application, key=lambda row: patent_links[patents[row].id], reverse=True)
+
+    by_launch = _order(drugs, lambda d: d.first_launched_date, descending=True)
+    drug_relevance = sorted(
+        by_launch,
+        key=lambda row: (phase_rank(drugs[row].highest_phase), drug_links[drugs[row].id]),
+        reverse=True
+    )
+
+    return {
+        'patents': {
+            'ids': [p.id for p in patents],
+            'orders': {
+                'application_date': by_application,
+                'grant_date': _order(patents, lambda p: p.grant_date, descending=True),
+                'expiry_date': _order(patents, lambda p: p.expiry_date),
+                'relevance': patent_relevance
+            }
+        },
+        'drugs': {
+            'ids': [d.id for d in drugs],
+            'orders': {
+                'name': _order(drugs, lambda d: d.name.lower() if d.name else None),
+                'first_launched_date': by_launch,
+                'last_updated': _order(drugs, lambda d: d.last_updated, descending=True),
+                'relevance': drug_relevance
+            }
+        }
+    }
+
+
+def create_sort_orders(patents, drugs, relationships, output_dir='processed_data'):
+    """Compute and save the search sort orders"""
+    print("\n🔢 COMPUTING SORT ORDERS...")
+    print("-" * 50)
+
+    orders = build_sort_orders(patents, drugs, relationships)
+
+    orders_file = os.path.join(output_dir, 'sort_orders.json')
+    write_json(orders, orders_file, indent=None)
+
+    print(f"✅ Patent orders: {', '.join(orders['patents']['orders'])}")
+    print(f"   Drug orders: {', '.join(orders['drugs']['orders'])}")
+    print(f"   Saved to: {orders_file}")
+
+    return orders
+
+
+if __name__ == "__main__":
+    create_sort_orders(
+        load_records(PatentRecord, 'processed_data/patents_processed.json'),
+        load_records(DrugRecord, 'processed_data/drugs_processed.json'),
+        load_records(RelationshipRecord, 'processed_data/relationships.json')
+    )
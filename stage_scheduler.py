@@ -0,0 +1,191 @@
+"""
+Pipeline Stage Scheduler
+Runs pipeline stages as a dependency graph, concurrently where possible,
+and skips stages whose inputs are unchanged since the last run
+
+Stages run on threads and share their in-memory results. The GIL serializes
+pure-Python work, so concurrent stages only overlap on file I/O and native
+code that releases it (numpy/scipy, hashing, compression); a stage that
+needs CPU parallelism brings its own process pool (see similar_patents.py).
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from compressed_artifacts import file_sha256
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+
+class Stage:
+    """
+    One pipeline stage
+
+    name     -- unique stage name; results are passed to dependents under it
+    run      -- callable taking the results of `uses` as keyword arguments
+    inputs   -- external files or directories the stage reads (content-hashed,
+                directories recursively)
+    listings -- external directories of which the stage reads only the
+                top-level file names (keyed by that listing, not by content)
+    outputs  -- files the stage writes
+    deps     -- stages that must finish first; their output hashes are
+                part of this stage's cache key
+    uses     -- subset of deps whose in-memory results `run` needs
+                (defaults to all deps)
+    load     -- rebuilds the result from `outputs` when the stage was
+                skipped but a dependent needs it
+    version  -- bump to invalidate cached outputs after a code change
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), deps=(), uses=None, load=None, version='1',
+                 listings=()):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.listings = list(listings)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.uses = list(self.deps if uses is None else uses)
+        self.load = load
+        self.version = version
+
+
+class StageScheduler:
+    """Executes stages in dependency order with a content-hash cache"""
+
+    def __init__(self, stages, cache_file, max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_file = cache_file
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.cache = self._load_cache()
+
+        self.results = {}
+        self.output_hashes = {}
+        self.status = {}
+        self._load_locks = {name: threading.Lock() for name in self.stages}
+        self._cache_lock = threading.Lock()
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+            if not set(stage.uses) <= set(stage.deps):
+                raise ValueError(f"Stage '{stage.name}' uses results it does not depend on")
+
+    def _load_cache(self):
+        if os.path.exists(self.cache_file):
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save_cache(self):
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_file)
+
+    def _hash_path(self, path):
+        if os.path.isdir(path):
+            # Directories (e.g. API caches) are keyed by the content of every file below them
+            digest = hashlib.sha256()
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    relative = os.path.relpath(file_path, path).replace(os.sep, '/')
+                    digest.update(f"{relative}:{file_sha256(file_path)}\n".encode())
+            return digest.hexdigest()
+        if os.path.exists(path):
+            return file_sha256(path)
+        return None
+
+    @staticmethod
+    def _listing(path):
+        """Sorted names of the regular files directly in a directory, or None"""
+        if not os.path.isdir(path):
+            return None
+        return sorted(entry.name for entry in os.scandir(path) if entry.is_file())
+
+    def _hash_files(self, paths):
+        return {path: self._hash_path(path) for path in paths}
+
+    def _cache_key(self, stage):
+        """Hash of the stage version, its input files and its upstream outputs"""
+        digest = hashlib.sha256()
+        digest.update(f"{stage.name}:{stage.version}".encode())
+        for path, file_hash in sorted(self._hash_files(stage.inputs).items()):
+            digest.update(f"in:{path}:{file_hash}".encode())
+        for path in sorted(stage.listings):
+            digest.update(f"ls:{path}:{json.dumps(self._listing(path))}".encode())
+        for dep in sorted(stage.deps):
+            for path, file_hash in sorted(self.output_hashes[dep].items()):
+                digest.update(f"dep:{path}:{file_hash}".encode())
+        return digest.hexdigest()
+
+    def _is_cached(self, stage, key):
+        entry = self.cache.get(stage.name)
+        if not entry or entry.get('key') != key:
+            return False
+        return self._hash_files(stage.outputs) == entry.get('outputs')
+
+    def _result_of(self, name):
+        """Result of a finished stage, loading it from disk if it was skipped"""
+        with self._load_locks[name]:
+            if name not in self.results:
+                stage = self.stages[name]
+                if stage.load is None:
+                    raise RuntimeError(f"Stage '{name}' was skipped and cannot load its result")
+                self.results[name] = stage.load()
+            return self.results[name]
+
+    def _execute(self, stage, key):
+        kwargs = {dep: self._result_of(dep) for dep in stage.uses}
+        started = time.time()
+        self.results[stage.name] = stage.run(**kwargs)
+
+        outputs = self._hash_files(stage.outputs)
+        with self._cache_lock:
+            self.cache[stage.name] = {'key': key, 'outputs': outputs}
+            self._save_cache()
+        return outputs, time.time() - started
+
+    def run(self):
+        """Run all stages and return their results (skipped stages are omitted)"""
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [
+                    stage for stage in pending.values()
+                    if all(dep in self.output_hashes for dep in stage.deps)
+                ]
+                for stage in ready:
+                    del pending[stage.name]
+                    key = self._cache_key(stage)
+                    if self._is_cached(stage, key):
+                        self.output_hashes[stage.name] = self.cache[stage.name]['outputs']
+                        self.status[stage.name] = 'cached'
+                        print(f"\n⏭️  Stage '{stage.name}' is up to date, skipping")
+                        continue
+                    print(f"\n▶️  Starting stage '{stage.name}'")
+                    running[executor.submit(self._execute, stage, key)] = stage
+
+                if not running:
+                    if pending and not ready:
+                        raise ValueError(f"Dependency cycle among stages: {', '.join(pending)}")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    outputs, elapsed = future.result()
+                    self.output_hashes[stage.name] = outputs
+                    self.status[stage.name] = 'ran'
+                    print(f"\n✔️  Stage '{stage.name}' finished in {elapsed:.1f}s")
+
+        return self.results
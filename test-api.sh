@@ -56,6 +56,8 @@ if test_endpoint "Patent search" "/api/patents/search?q=cancer&limit=5"; then ((
 if test_endpoint "Patent search with filters" "/api/patents/search?q=aspirin&company=pfizer"; then ((PASS++)); else ((FAIL++)); fi
 if test_endpoint "Patents by drug" "/api/patents/drug/remdesivir"; then ((PASS++)); else ((FAIL++)); fi
 if test_endpoint "Patents by company" "/api/patents/company/pfizer"; then ((PASS++)); else ((FAIL++)); fi
+if test_endpoint "Patent search rejects limit=0" "/api/patents/search?limit=0" 400; then ((PASS++)); else ((FAIL++)); fi
+if test_endpoint "Patent search rejects non-numeric limit" "/api/patents/search?limit=ten" 400; then ((PASS++)); else ((FAIL++)); fi
 
 echo ""
 echo "3. Drug Endpoints"
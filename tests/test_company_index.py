@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from company_index import build_company_index, company_key, normalize_company
+from pipeline_records import DrugRecord, PatentRecord
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NAMES = [
+    'Pfizer Inc', 'PFIZER INC.', 'Pfizer, Inc.', 'Merck & Co., Inc.', 'Merck KGaA',
+    'Sun Pharma', 'Sun Pharmaceutical Industries Ltd', 'Novo Nordisk A/S', 'Novo Nordisk',
+    'Roche S.A.', 'Chiesi Farmaceutici S. p. A.', 'Eli Lilly and Company', 'Eli Lilly & Co',
+    'F. Hoffmann-La Roche AG', 'St. Jude Medical', 'Société Générale', 'Inc',
+]
+
+
+@pytest.mark.parametrize('variants', [
+    ['Pfizer Inc', 'PFIZER INC.', 'Pfizer, Inc.', 'Pfizer'],
+    ['Novo Nordisk A/S', 'NOVO NORDISK A/S', 'Novo Nordisk'],
+    ['Roche S.A.', 'Roche SA', 'Roche S. A.'],
+    ['Eli Lilly and Company', 'Eli Lilly & Co'],
+    ['Glaxo Smith Kline', 'GlaxoSmithKline plc'],
+])
+def test_variants_share_a_key(variants):
+    assert len({company_key(name) for name in variants}) == 1
+
+
+@pytest.mark.parametrize('first, second', [
+    ('Merck & Co., Inc.', 'Merck KGaA'),
+    ('Sun Pharma', 'Sun'),
+    ('Sun Pharma', 'Sun Pharmaceutical Industries Ltd'),
+    ('The Medicines Company', 'Medicines'),
+])
+def test_descriptors_keep_companies_apart(first, second):
+    assert company_key(first) != company_key(second)
+
+
+def test_normalize_strips_accents_and_trailing_legal_forms_only():
+    assert normalize_company('Société Générale S.A.') == 'societe generale'
+    assert normalize_company('Chiesi Farmaceutici S.p.A.') == 'chiesi farmaceutici'
+    assert normalize_company('F. Hoffmann-La Roche AG') == 'f hoffmann la roche'
+    # A name made only of a legal form keeps it rather than vanishing
+    assert normalize_company('Inc') == 'inc'
+
+
+def test_company_index_clusters_variants_and_posts_ids():
+    patents = [
+        PatentRecord(id='p1', grantees=['Pfizer Inc'], original_applicants=['PFIZER INC.']),
+        PatentRecord(id='p2', grantees=['Merck KGaA']),
+        PatentRecord(id='p3', original_applicants=['Pfizer, Inc.', 'Merck & Co., Inc.']),
+    ]
+    drugs = [DrugRecord(id='d1', name='Drug', active_companies=['Pfizer Inc', 'Merck & Co'])]
+
+    index = build_company_index(patents, drugs)
+    companies = index['companies']
+
+    assert set(companies) == {'pfizer', 'merck', 'merckandco'}
+    assert companies['pfizer']['patents'] == ['p1', 'p3']
+    assert companies['pfizer']['drugs'] == ['d1']
+    assert companies['pfizer']['name'] == 'Pfizer Inc'
+    assert companies['merckandco']['patents'] == ['p3']
+    assert index['variants']['pfizer, inc.'] == 'pfizer'
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_server_normalization_matches_python():
+    script = """
+        const src = require('fs').readFileSync(process.argv[1], 'utf8');
+        const start = src.indexOf('const COMPANY_SUFFIXES');
+        const end = src.indexOf('function companyKey');
+        const normalize = new Function(src.slice(start, end) + 'return normalizeCompany;')();
+        const names = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+        console.log(JSON.stringify(names.map(normalize)));
+    """
+    result = subprocess.run(['node', '-e', script, os.path.join(REPO_DIR, 'server.js')],
+                            input=json.dumps(NAMES), capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout) == [normalize_company(name) for name in NAMES]
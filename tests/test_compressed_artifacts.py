@@ -0,0 +1,38 @@
+import gzip
+import os
+import subprocess
+import sys
+
+from compressed_artifacts import changed_artifacts, publish_artifacts
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_publish_writes_variants_and_hashes(tmp_path):
+    (tmp_path / 'a.json').write_text('[1, 2, 3]', encoding='utf-8')
+    artifacts = publish_artifacts(str(tmp_path), ['a.json', 'missing.json'])
+
+    assert list(artifacts) == ['a.json']
+    entry = artifacts['a.json']
+    assert entry['size'] == 9
+    assert gzip.decompress((tmp_path / entry['gzip']['file']).read_bytes()) == b'[1, 2, 3]'
+
+
+def test_changed_artifacts_lists_files_and_variants():
+    old = {'artifacts': {'a.json': {'sha256': '1'}, 'b.json': {'sha256': '2'}}}
+    new = {'artifacts': {
+        'a.json': {'sha256': '1', 'gzip': {'file': 'a.json.gz'}},
+        'b.json': {'sha256': '3', 'gzip': {'file': 'b.json.gz'}, 'zstd': {'file': 'b.json.zst'}}
+    }}
+    assert changed_artifacts(old, new) == ['b.json', 'b.json.gz', 'b.json.zst']
+    assert changed_artifacts(None, new) == ['a.json', 'a.json.gz', 'b.json', 'b.json.gz', 'b.json.zst']
+    assert changed_artifacts(old, None) == []
+
+
+def test_cli_treats_missing_indexes_as_empty(tmp_path):
+    result = subprocess.run(
+        [sys.executable, 'compressed_artifacts.py', str(tmp_path / 'deployed.json'), str(tmp_path / 'local.json')],
+        capture_output=True, text=True, cwd=REPO_DIR
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ''
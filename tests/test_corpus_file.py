@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from corpus_file import CORPUS_FILE, CorpusReader, CorpusWriter, create_corpus, resolve_orders
+from pipeline_records import DrugRecord, PatentRecord, RelationshipRecord
+from sort_orders import build_sort_orders
+
+PATENTS = [
+    PatentRecord(id='p1', title='Kinase inhibitor', application_date='2019-01-01', grantees=['Pfizer Inc']),
+    PatentRecord(id='p2', title='Ünïcode "antibody"', application_date='2021-06-30', inventors=['A', 'B']),
+    PatentRecord(id='p3', patent_number='US3', application_date='2020-03-15'),
+]
+DRUGS = [
+    DrugRecord(id='d1', name='Alphanib', highest_phase='Launched', first_launched_date='2015-01-01'),
+    DrugRecord(id='d2', name='Betamab', highest_phase='Phase 2'),
+]
+RELATIONSHIPS = [
+    RelationshipRecord(type='drug_patent', drug_id='d2', patent_id='p3'),
+    RelationshipRecord(type='drug_patent', drug_id='d2', patent_id='p1'),
+]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    # The pipeline passes sort_orders.json as loaded from disk
+    sort_orders = json.loads(json.dumps(build_sort_orders(PATENTS, DRUGS, RELATIONSHIPS)))
+    create_corpus(PATENTS, DRUGS, sort_orders, str(tmp_path))
+    with CorpusReader(os.path.join(str(tmp_path), CORPUS_FILE)) as reader:
+        yield reader
+
+
+def test_records_round_trip_in_order(corpus):
+    assert list(corpus['patents']) == [p.to_dict() for p in PATENTS]
+    assert list(corpus['drugs']) == [d.to_dict() for d in DRUGS]
+    # Fields keep their original order
+    assert list(corpus['patents'].record(0)) == list(PATENTS[0].to_dict())
+
+
+def test_lookup_by_id(corpus):
+    assert corpus['patents'].get('p2') == PATENTS[1].to_dict()
+    assert corpus['drugs'].get('d1')['name'] == 'Alphanib'
+    assert corpus['patents'].get('missing') is None
+    assert corpus['patents'].value('title', 2) is None
+
+
+def test_sort_orders_match_the_sort_orders_stage(corpus):
+    expected = build_sort_orders(PATENTS, DRUGS, RELATIONSHIPS)
+
+    for table in ('patents', 'drugs'):
+        for name, rows in expected[table]['orders'].items():
+            assert list(corpus[table].order(name)) == rows
+    assert list(corpus['patents'].order('application_date')) == [1, 2, 0]
+
+
+def test_duplicate_ids_resolve_to_the_last_row(tmp_path):
+    path = os.path.join(str(tmp_path), CORPUS_FILE)
+    records = [{'id': 'a', 'n': 1}, {'id': 'b', 'n': 2}, {'id': 'a', 'n': 3}]
+    with CorpusWriter(path) as writer:
+        table = writer.table('items', columns=['id', 'n'])
+        for record in records:
+            table.append(record)
+        table.set_orders(resolve_orders({'ids': ['b', 'a'], 'orders': {'n': [1, 0]}}, table.ids))
+
+    with CorpusReader(path) as reader:
+        assert reader['items'].get('a') == {'id': 'a', 'n': 3}
+        # Rows missing from an order are appended at its end
+        assert list(reader['items'].order('n')) == [2, 1, 0]
@@ -0,0 +1,115 @@
+import copy
+import json
+import os
+import random
+
+import pytest
+
+from external_sort import ExternalSorter
+from google_patents_integration import PatentDataMerger, iter_search_results
+from pipeline_records import PatentRecord
+
+
+@pytest.mark.parametrize('memory_limit', [1, 200, 1 << 20])
+def test_sorted_output_is_stable_and_run_files_are_removed(tmp_path, memory_limit):
+    rng = random.Random(7)
+    items = [{'key': rng.choice(['b', 'a', 'c', 'ä']), 'n': n, 'tags': ['x'] * (n % 3)} for n in range(300)]
+    sorter = ExternalSorter(lambda item: item['key'], memory_limit, str(tmp_path))
+    for item in items:
+        sorter.add(item)
+
+    if memory_limit == 1:
+        assert len(sorter.runs) == len(items)
+    assert list(sorter.sorted()) == sorted(items, key=lambda item: item['key'])
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_merge_fan_in_is_bounded(tmp_path, monkeypatch):
+    open_runs = []
+    peak = []
+    read_run = ExternalSorter._read_run
+
+    def tracked(path):
+        open_runs.append(path)
+        peak.append(len(open_runs))
+        try:
+            yield from read_run(path)
+        finally:
+            open_runs.remove(path)
+
+    monkeypatch.setattr(ExternalSorter, '_read_run', staticmethod(tracked))
+    rng = random.Random(3)
+    items = [[rng.randrange(50), n] for n in range(300)]
+    sorter = ExternalSorter(lambda item: item[0], memory_limit=1, tmp_dir=str(tmp_path), fan_in=4)
+    for item in items:
+        sorter.add(item)
+
+    assert len(sorter.runs) == 300
+    assert list(sorter.sorted()) == sorted(items, key=lambda item: item[0])
+    assert max(peak) == 4
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_fan_in_must_merge_at_least_two_runs():
+    with pytest.raises(ValueError):
+        ExternalSorter(lambda item: item, fan_in=1)
+
+
+def test_list_keys_sort_element_wise():
+    sorter = ExternalSorter(lambda item: item[:2], memory_limit=16)
+    for item in ([2, 'a', 'x'], [1, 'b', 'y'], [1, 'a', 'z'], [2, 'a', 'w']):
+        sorter.add(item)
+
+    assert list(sorter.sorted()) == [[1, 'a', 'z'], [1, 'b', 'y'], [2, 'a', 'x'], [2, 'a', 'w']]
+
+
+def merge_inputs():
+    cortellis = [
+        PatentRecord(id='US1', patent_number='US1', application_number='APP1', compound_name='One'),
+        PatentRecord(id='c2', patent_number='US2', application_number='APP2', compound_name='Two'),
+        # Shares its application number with US2; the later record wins the key
+        PatentRecord(id='c3', patent_number='US3', application_number='APP2', compound_name='Three'),
+        PatentRecord(id='c4', patent_number='US4', title='Four'),
+        PatentRecord(id='APP5', application_number='APP5', title='Five'),
+        PatentRecord(id='c6', title='No numbers'),
+    ]
+    google = {
+        'Alphanib': [
+            {'id': 'US1', 'title': 'Google one'},
+            {'id': 'G9', 'application_number': 'APP2', 'title': 'By application number'},
+        ],
+        'Betamab': [
+            {'id': 'G10', 'title': 'Google only'},
+            {'id': 'US4', 'application_number': 'APP1', 'title': 'Id wins over application number'},
+        ],
+    }
+    return cortellis, google
+
+
+@pytest.mark.parametrize('memory_limit', [1, 1 << 20])
+def test_external_merge_matches_in_memory_merge(tmp_path, memory_limit):
+    cortellis, google = merge_inputs()
+    merger = PatentDataMerger()
+
+    expected = merger.merge_patent_data(cortellis, copy.deepcopy(google))
+    pairs = [(category, patent) for category, patents in copy.deepcopy(google).items() for patent in patents]
+    merged = list(merger.merge_patent_data_external(cortellis, pairs, memory_limit, str(tmp_path)))
+
+    assert merged == expected
+    assert [p['data_sources'] for p in merged[:4]] == [
+        ['Cortellis', 'Google Patents'], ['Cortellis', 'Google Patents'],
+        ['Google Patents'], ['Cortellis', 'Google Patents'],
+    ]
+    assert merged[1]['cortellis_data']['compound_name'] == 'Three'
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_search_results_stream_per_category(tmp_path):
+    _, google = merge_inputs()
+    path = str(tmp_path / 'search_results.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(google, f, indent=2)
+
+    assert list(iter_search_results(path)) == [
+        (category, patent) for category, patents in google.items() for patent in patents
+    ]
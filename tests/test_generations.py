@@ -0,0 +1,75 @@
+import os
+import time
+
+from generations import GENERATIONS_DIR, current_generation, prune_generations, publish_generation
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def publish_versions(data_dir, count, **kwargs):
+    generations = []
+    for version in range(count):
+        # Writers replace files, so each version is a new inode
+        write(os.path.join(data_dir, 'tmp.json'), str(version))
+        os.replace(os.path.join(data_dir, 'tmp.json'), os.path.join(data_dir, 'data.json'))
+        generations.append(publish_generation(data_dir, ['data.json'], **kwargs))
+    return generations
+
+
+def age(data_dir, generation, seconds):
+    path = os.path.join(data_dir, GENERATIONS_DIR, generation)
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def listed(data_dir):
+    return sorted(os.listdir(os.path.join(data_dir, GENERATIONS_DIR)))
+
+
+def test_unchanged_files_do_not_publish(tmp_path):
+    data_dir = str(tmp_path)
+    write(os.path.join(data_dir, 'data.json'), '1')
+
+    first = publish_generation(data_dir, ['data.json', 'missing.json'])
+    second = publish_generation(data_dir, ['data.json'])
+
+    assert first == second == current_generation(data_dir) == '000001'
+    assert listed(data_dir) == ['000001']
+
+
+def test_recently_replaced_generations_are_kept(tmp_path):
+    data_dir = str(tmp_path)
+    generations = publish_versions(data_dir, 5)
+
+    # Every replaced generation was replaced moments ago
+    assert listed(data_dir) == generations
+    assert current_generation(data_dir) == '000005'
+
+
+def test_generations_past_the_grace_period_are_pruned(tmp_path):
+    data_dir = str(tmp_path)
+    publish_versions(data_dir, 5)
+    # 000001 was replaced by 000002 an hour ago; 000002 by 000003 just now
+    for generation in ('000001', '000002'):
+        age(data_dir, generation, 3600)
+
+    deleted = prune_generations(data_dir, keep=3, grace=600)
+
+    assert deleted == ['000001']
+    assert listed(data_dir) == ['000002', '000003', '000004', '000005']
+
+    age(data_dir, '000003', 3600)
+    assert prune_generations(data_dir, keep=3, grace=600) == ['000002']
+
+
+def test_current_generation_is_never_pruned(tmp_path):
+    data_dir = str(tmp_path)
+    publish_versions(data_dir, 4)
+    write(os.path.join(data_dir, 'CURRENT'), '000001\n')
+    for generation in ('000001', '000002', '000003', '000004'):
+        age(data_dir, generation, 3600)
+
+    assert prune_generations(data_dir, keep=1, grace=0) == ['000002', '000003']
@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+import requests
+
+from google_patents_backfill import (JOURNAL_FILE, PAGE_SIZE, BackfillJournal, ShardWriter,
+                                     export_search_results, iter_backfill_results, run_backfill)
+from google_patents_integration import serpapi_api_key
+
+DRUGS = ['Alphanib', 'Betamab', 'Gammavir']
+
+
+class FakeAPI:
+    """Two full pages and one short page per query; fails after `fail_after` calls"""
+
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def fetch_page(self, query, offset, num_results):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise requests.exceptions.ConnectionError('connection reset')
+        self.calls += 1
+        count = PAGE_SIZE if offset < 2 * PAGE_SIZE else 3
+        return [{'id': f"{query}#{offset + i}"} for i in range(count)]
+
+
+def results(backfill_dir):
+    return [(r['search_category'], r['id']) for r in iter_backfill_results(backfill_dir)]
+
+
+def reference(tmp_path):
+    backfill_dir = str(tmp_path / 'reference')
+    assert run_backfill(FakeAPI(), DRUGS, backfill_dir, pages=3)
+    return results(backfill_dir)
+
+
+def test_interrupted_backfill_resumes_without_refetching(tmp_path):
+    backfill_dir = str(tmp_path / 'backfill')
+
+    first = FakeAPI(fail_after=7)
+    assert not run_backfill(first, DRUGS, backfill_dir, pages=3, retries=1)
+    second = FakeAPI()
+    assert run_backfill(second, DRUGS, backfill_dir, pages=3, retries=1)
+
+    expected = reference(tmp_path)
+    assert results(backfill_dir) == expected
+    # Every unit is fetched exactly once across both runs
+    assert first.calls + second.calls == len(DRUGS) * 4 * 3
+    assert len(expected) == len(DRUGS) * 4 * (2 * PAGE_SIZE + 3)
+
+
+def test_torn_journal_line_and_unjournaled_results_are_dropped(tmp_path):
+    backfill_dir = str(tmp_path / 'backfill')
+    assert not run_backfill(FakeAPI(fail_after=5), DRUGS, backfill_dir, pages=3, retries=1)
+
+    # A crash between writing a unit's results and journaling it, mid-line
+    journal_path = os.path.join(backfill_dir, JOURNAL_FILE)
+    journal = BackfillJournal(journal_path)
+    shards = ShardWriter(backfill_dir, journal.last_entry)
+    shard, offset = shards.write([{'id': 'orphan', 'search_category': 'Alphanib'}])
+    shards.close()
+    journal.close()
+    with open(journal_path, 'ab') as f:
+        f.write(json.dumps({'drug': 'Alphanib', 'shard': shard, 'offset': offset})[:20].encode())
+
+    assert run_backfill(FakeAPI(), DRUGS, backfill_dir, pages=3, retries=1)
+
+    assert results(backfill_dir) == reference(tmp_path)
+    with open(journal_path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    assert lines[-1] == b''
+    assert all(json.loads(line) for line in lines[:-1])
+
+
+def test_shards_roll_over_and_resume_from_the_journaled_shard(tmp_path):
+    backfill_dir = str(tmp_path / 'backfill')
+    os.makedirs(backfill_dir)
+    shards = ShardWriter(backfill_dir, max_bytes=1)
+    first = shards.write([{'id': 1}])
+    second = shards.write([{'id': 2}])
+    shards.write([{'id': 3}])
+    shards.close()
+    assert first[0] != second[0]
+
+    # Resuming from the second write drops the third shard
+    ShardWriter(backfill_dir, {'shard': second[0], 'offset': second[1]}, max_bytes=1).close()
+    assert [r['id'] for r in iter_backfill_results(backfill_dir)] == [1, 2]
+
+
+def test_export_groups_results_per_drug(tmp_path):
+    backfill_dir = str(tmp_path / 'backfill')
+    output_file = str(tmp_path / 'search_results.json')
+    run_backfill(FakeAPI(), DRUGS[:2], backfill_dir, pages=1)
+
+    assert export_search_results(backfill_dir, output_file) == 2
+    with open(output_file, 'r', encoding='utf-8') as f:
+        exported = json.load(f)
+    assert list(exported) == DRUGS[:2]
+    assert len(exported['Alphanib']) == 4 * PAGE_SIZE
+    assert 'query' not in exported['Alphanib'][0]
+
+
+def test_api_key_comes_from_the_environment_only(monkeypatch, capsys):
+    monkeypatch.setenv('SERPAPI_API_KEY', ' secret ')
+    assert serpapi_api_key() == 'secret'
+
+    monkeypatch.delenv('SERPAPI_API_KEY')
+    with pytest.raises(SystemExit) as exit_info:
+        serpapi_api_key()
+    assert exit_info.value.code == 1
+    assert 'SERPAPI_API_KEY is not set' in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import numpy as np
+
+from knowledge_graph import KnowledgeGraph
+from pipeline_records import DrugRecord, PatentRecord, RelationshipRecord
+
+
+def build():
+    patents = [
+        PatentRecord(id='p1', patent_number='US1', targets=['EGFR'], mechanisms=['Kinase inhibitor'],
+                     grantees=['Pfizer Inc']),
+        PatentRecord(id='p2', patent_number='US2', targets=['EGFR', 'HER2'], original_applicants=['Pfizer']),
+        PatentRecord(id='p3', patent_number='US3', targets=['PD-1'], grantees=['Novartis AG']),
+    ]
+    drugs = [
+        DrugRecord(id='d1', name='Alphanib', targets=['egfr'], highest_phase='Launched',
+                   active_companies=['Novartis AG']),
+        DrugRecord(id='d2', name='Betamab', targets=['PD-1'], highest_phase='Phase 2'),
+        DrugRecord(name='Gammastat', targets=['HER2'], highest_phase='Launched'),
+        DrugRecord(targets=['HER2']),
+    ]
+    relationships = [
+        RelationshipRecord(type='patent_drug', drug_id='d1', patent_id='p1'),
+        RelationshipRecord(type='patent_drug', drug_id='d2', patent_id='p3'),
+        RelationshipRecord(type='patent_drug', drug_id=None, patent_id='p2'),
+    ]
+    return KnowledgeGraph.build(patents, drugs, relationships)
+
+
+def names(graph, node_type, nodes):
+    return sorted(graph.describe(node_type, nodes))
+
+
+def test_drugs_without_id_are_keyed_by_name():
+    graph = build()
+    assert graph.keys['drug'] == ['d1', 'd2', 'Gammastat']
+    assert graph.drug_phases == ['Launched', 'Phase 2', 'Launched']
+    assert names(graph, 'target', graph.walk('drug', 'Gammastat', ['target'])) == ['HER2']
+
+
+def test_forward_and_reverse_csr_agree():
+    graph = build()
+    for name, parts in graph.edges.items():
+        n_src = len(parts['indptr']) - 1
+        forward = {(s, int(d)) for s in range(n_src)
+                   for d in parts['indices'][parts['indptr'][s]:parts['indptr'][s + 1]]}
+        n_dst = len(parts['rev_indptr']) - 1
+        reverse = {(int(s), d) for d in range(n_dst)
+                   for s in parts['rev_indices'][parts['rev_indptr'][d]:parts['rev_indptr'][d + 1]]}
+        assert forward == reverse, name
+        assert np.all(np.diff(parts['indptr']) >= 0)
+
+
+def test_walks_and_company_overlap():
+    graph = build()
+    assert names(graph, 'target', graph.walk('company', 'PFIZER, INC.', ['patent', 'target'])) == ['EGFR', 'HER2']
+    assert names(graph, 'patent', graph.walk('drug', 'Alphanib', ['patent'])) == ['US1']
+
+    targets, drugs = graph.company_target_overlap('Pfizer')
+    assert names(graph, 'drug', drugs) == ['Alphanib', 'Gammastat']
+
+
+def test_k_hop_and_intersect():
+    graph = build()
+    reached = graph.k_hop('patent', 'p3', k=2)
+    # Betamab via the relationship, Alphanib via the shared company
+    assert names(graph, 'drug', reached['drug']) == ['Alphanib', 'Betamab']
+    assert names(graph, 'patent', reached.get('patent', [])) == []
+
+    pfizer = graph.walk('company', 'Pfizer', ['patent'])
+    egfr = graph.walk('target', 'EGFR', ['patent'])
+    assert names(graph, 'patent', KnowledgeGraph.intersect(pfizer, egfr)) == ['US1', 'US2']
+
+
+def test_save_and_load_round_trip(tmp_path):
+    graph = build()
+    graph.save(str(tmp_path))
+    loaded = KnowledgeGraph.load(str(tmp_path))
+
+    assert loaded.keys == graph.keys
+    assert loaded.drug_phases == graph.drug_phases
+    for name, parts in graph.edges.items():
+        for part, array in parts.items():
+            assert np.array_equal(loaded.edges[name][part], array)
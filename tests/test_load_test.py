@@ -0,0 +1,24 @@
+import pytest
+
+from load_test import percentile
+
+
+@pytest.mark.parametrize('fraction, expected', [
+    (0.5, 10),    # 0.5 * 20 = 10 exactly: rank 10, not 11
+    (0.55, 11),   # 11 exactly: round(11.5) used to give 12
+    (0.95, 19),
+    (0.99, 20),
+    (1.0, 20),
+    (0.01, 1),
+    (0.0, 1),
+])
+def test_nearest_rank(fraction, expected):
+    assert percentile(list(range(1, 21)), fraction) == expected
+
+
+def test_float_products_do_not_bump_the_rank():
+    assert percentile(list(range(1, 101)), 0.07) == 7
+
+
+def test_empty():
+    assert percentile([], 0.5) is None
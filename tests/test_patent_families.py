@@ -0,0 +1,53 @@
+from patent_families import UnionFind, build_family_index, family_keys, resolve_families
+from pipeline_records import PatentRecord
+
+
+def patent(id, **fields):
+    return PatentRecord(id=id, **fields)
+
+
+def test_union_find_merges_sets():
+    forest = UnionFind()
+    nodes = [forest.add() for _ in range(5)]
+    forest.union(nodes[0], nodes[1])
+    forest.union(nodes[3], nodes[4])
+    forest.union(nodes[1], nodes[4])
+
+    assert len({forest.find(n) for n in nodes[:2] + nodes[3:]}) == 1
+    assert forest.find(nodes[2]) == nodes[2]
+    assert forest.size[forest.find(nodes[0])] == 4
+
+
+def test_family_keys_normalize_and_skip_short_identifiers():
+    keys = family_keys(patent('a', patent_number='us 8,000,000 b2', application_number='X1',
+                              patent_family='WO2010/000001; EP 1234567'))
+    assert keys == {'US8000000B2', 'WO2010000001', 'EP1234567'}
+
+
+def test_families_link_transitively_through_shared_identifiers():
+    patents = [
+        patent('a', patent_number='US1000', patent_family='WO2010000001'),
+        patent('b', patent_number='EP2000', patent_family='WO2010000001; US3000'),
+        patent('c', patent_number='US3000'),
+        patent('d', patent_number='JP4000'),
+        patent('e', application_number='US1000'),
+    ]
+    assert resolve_families(patents) == [0, 0, 0, 1, 0]
+
+
+def test_family_index_expiry_range():
+    patents = [
+        patent('a', patent_family='WO2010000001', expiry_date='2031-01-01', latest_expiry_date='2035-01-01'),
+        patent('b', patent_family='WO2010000001', expiry_date='2029-06-01'),
+        patent('c', patent_number='US5000'),
+    ]
+    index = build_family_index(patents, resolve_families(patents))
+
+    assert index['total_families'] == 2
+    assert index['patent_family_ids'] == {'a': 0, 'b': 0, 'c': 1}
+    assert index['families'][0] == {
+        'members': ['a', 'b'],
+        'earliest_expiry': '2029-06-01',
+        'latest_expiry': '2035-01-01'
+    }
+    assert index['families'][1]['earliest_expiry'] is None
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from pipeline_records import DrugRecord, PatentRecord, RelationshipRecord, load_records, write_records
+
+
+def test_empty_fields_are_dropped_and_lists_round_trip():
+    patent = PatentRecord(id='p1', title='Kinase inhibitor', abstract='', grantees=['Pfizer Inc'],
+                          classifications=[], drugs=None)
+
+    assert patent.grantees == ('Pfizer Inc',)
+    assert patent.to_dict() == {'id': 'p1', 'title': 'Kinase inhibitor', 'grantees': ['Pfizer Inc']}
+
+
+def test_categorical_values_are_interned():
+    first = DrugRecord(id='d1', highest_phase=''.join(['Laun', 'ched']))
+    second = DrugRecord(id='d2', highest_phase=''.join(['Launc', 'hed']))
+
+    assert first.highest_phase is second.highest_phase
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(TypeError, match='Unknown PatentRecord fields: colour'):
+        PatentRecord(id='p1', colour='blue')
+
+
+def test_relationships_keep_every_key():
+    relationship = RelationshipRecord(type='drug_patent', drug_id='d1', patent_id='p1')
+
+    assert relationship.to_dict() == {
+        'type': 'drug_patent', 'drug_id': 'd1', 'drug_name': None,
+        'patent_id': 'p1', 'patent_number': None, 'relationship_date': None
+    }
+
+
+@pytest.mark.parametrize('records', [
+    [],
+    [PatentRecord(id='p1', title='Ünïcode "quoted"\nline', inventors=['A', 'B']),
+     PatentRecord(id='p2', patent_number='US1')],
+])
+def test_write_records_matches_json_dump(tmp_path, records):
+    streamed = tmp_path / 'streamed.json'
+    dumped = tmp_path / 'dumped.json'
+    write_records(records, str(streamed))
+    with open(dumped, 'w', encoding='utf-8') as f:
+        json.dump([record.to_dict() for record in records], f, ensure_ascii=False, indent=2)
+
+    assert streamed.read_bytes() == dumped.read_bytes()
+    assert load_records(PatentRecord, str(streamed)) == records
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import similar_patents
+from pipeline_records import PatentRecord
+from similar_patents import build_tfidf_matrix, compute_top_k_neighbors
+
+PATENTS = [
+    PatentRecord(id='p0', title='Kinase inhibitor', abstract='Treats solid tumours'),
+    PatentRecord(id='p1', title='Kinase antibody'),
+    PatentRecord(id='p2', title='Kinase inhibitor', abstract='Treats solid tumours'),
+    PatentRecord(id='p3'),
+    PatentRecord(id='p4', title='Antibody vaccine', mechanisms=['Vaccine adjuvant']),
+    PatentRecord(id='p5', title='Kinase inhibitor', abstract='Treats solid tumours'),
+]
+EMPTY = 3
+
+
+@pytest.fixture
+def matrix():
+    # Keep every term: the default document-frequency cut-offs empty a corpus this small
+    matrix, _ = build_tfidf_matrix(PATENTS, min_df=1, max_df=1.0)
+    return matrix
+
+
+def top_k(matrix, k):
+    """Run the per-block worker in-process over the whole matrix"""
+    similar_patents._init_worker(matrix, matrix.T.tocsr())
+    _, neighbors, scores = similar_patents._top_k_block(0, matrix.shape[0], k)
+    return neighbors, scores
+
+
+def test_rows_are_l2_normalized_and_empty_text_has_no_terms(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+    assert matrix.shape[0] == len(PATENTS)
+    assert norms[EMPTY] == 0
+    np.testing.assert_allclose(np.delete(norms, EMPTY), 1, rtol=1e-6)
+
+
+def test_neighbors_are_ordered_by_descending_score(matrix):
+    neighbors, scores = top_k(matrix, k=3)
+    similarities = (matrix @ matrix.T).toarray()
+
+    for row in range(len(PATENTS)):
+        found = neighbors[row][neighbors[row] >= 0]
+        assert row not in found
+        assert list(scores[row]) == sorted(scores[row], reverse=True)
+        np.testing.assert_allclose(scores[row][:len(found)], similarities[row, found], rtol=1e-6)
+
+    # The rarer shared term "antibody" outweighs "kinase"
+    assert list(neighbors[1]) == [4, 0, 2]
+
+
+def test_ties_break_by_the_lower_row(matrix):
+    # p0, p2 and p5 have identical text; with k=1 only one tied neighbor fits
+    for k in (1, 2):
+        neighbors, scores = top_k(matrix, k)
+        assert list(neighbors[0]) == [2, 5][:k]
+        assert list(neighbors[5]) == [0, 2][:k]
+        np.testing.assert_allclose(scores[0], 1, rtol=1e-6)
+
+
+def test_k_larger_than_the_corpus_pads_missing_slots(matrix):
+    neighbors, scores = top_k(matrix, k=10)
+
+    assert neighbors.shape == scores.shape == (len(PATENTS), 10)
+    # p4 only shares "antibody" with p1
+    assert list(neighbors[4]) == [1] + [-1] * 9
+    assert list(scores[4][1:]) == [0] * 9
+
+
+def test_empty_text_patent_has_no_neighbors_and_is_nobody_s_neighbor(matrix):
+    neighbors, scores = top_k(matrix, k=10)
+
+    assert list(neighbors[EMPTY]) == [-1] * 10
+    assert not scores[EMPTY].any()
+    assert EMPTY not in neighbors
+
+
+def test_process_pool_matches_the_worker(matrix):
+    expected = top_k(matrix, k=4)
+    neighbors, scores = compute_top_k_neighbors(matrix, k=4, block_size=4, workers=1)
+
+    np.testing.assert_array_equal(neighbors, expected[0])
+    np.testing.assert_array_equal(scores, expected[1])
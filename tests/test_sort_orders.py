@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from pipeline_records import DrugRecord, PatentRecord, RelationshipRecord
+from sort_orders import build_sort_orders, create_sort_orders, phase_rank
+
+PATENTS = [
+    PatentRecord(id='p0', application_date='2019-01-01', grant_date='2021-01-01', expiry_date='2039-01-01'),
+    PatentRecord(id='p1', application_date='2021-06-30', expiry_date='2035-01-01'),
+    PatentRecord(id='p2'),
+    PatentRecord(id='p3', application_date='2021-06-30', grant_date='2022-01-01', expiry_date='2035-01-01'),
+]
+DRUGS = [
+    DrugRecord(id='d0', name='betamab', highest_phase='Phase 2', first_launched_date=None),
+    DrugRecord(id='d1', name='Alphanib', highest_phase='Launched', first_launched_date='2015-01-01'),
+    DrugRecord(id='d2', highest_phase='Phase 3 Clinical', last_updated='2024-05-01'),
+    DrugRecord(id='d3', name='Gammavir', highest_phase='Launched', first_launched_date='2018-01-01'),
+]
+RELATIONSHIPS = [
+    RelationshipRecord(type='drug_patent', drug_id='d1', patent_id='p0'),
+    RelationshipRecord(type='drug_patent', drug_id='d1', patent_id='p2'),
+    RelationshipRecord(type='drug_patent', drug_id='d3', patent_id='p2'),
+]
+
+
+@pytest.fixture
+def orders():
+    return build_sort_orders(PATENTS, DRUGS, RELATIONSHIPS)
+
+
+@pytest.mark.parametrize('phase, rank', [
+    ('Launched', 7), ('Registered', 6), ('Pre-registration', 5), ('Phase 3 Clinical', 4),
+    ('phase 1', 2), ('Preclinical', 1), ('Discontinued', 0), (None, 0),
+])
+def test_phase_rank(phase, rank):
+    assert phase_rank(phase) == rank
+
+
+def test_patent_orders(orders):
+    patents = orders['patents']
+    assert patents['ids'] == ['p0', 'p1', 'p2', 'p3']
+    # Newest first, ties keep input order, missing dates last
+    assert patents['orders']['application_date'] == [1, 3, 0, 2]
+    assert patents['orders']['grant_date'] == [3, 0, 1, 2]
+    # Expiry is ascending
+    assert patents['orders']['expiry_date'] == [1, 3, 0, 2]
+    # Most linked drugs first, then by application date
+    assert patents['orders']['relevance'] == [2, 0, 1, 3]
+
+
+def test_drug_orders(orders):
+    drugs = orders['drugs']['orders']
+    # Case-insensitive names, nameless drugs last
+    assert drugs['name'] == [1, 0, 3, 2]
+    assert drugs['first_launched_date'] == [3, 1, 0, 2]
+    assert drugs['last_updated'] == [2, 0, 1, 3]
+    # Phase first, then patent links, then launch date
+    assert drugs['relevance'] == [1, 3, 2, 0]
+
+
+def test_every_order_is_a_permutation(orders):
+    for table, count in (('patents', len(PATENTS)), ('drugs', len(DRUGS))):
+        for rows in orders[table]['orders'].values():
+            assert sorted(rows) == list(range(count))
+
+
+def test_create_sort_orders_writes_the_orders(tmp_path, orders):
+    create_sort_orders(PATENTS, DRUGS, RELATIONSHIPS, str(tmp_path))
+
+    with open(os.path.join(str(tmp_path), 'sort_orders.json'), 'r', encoding='utf-8') as f:
+        assert json.load(f) == orders
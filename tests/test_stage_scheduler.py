@@ -0,0 +1,107 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from similar_patents import compute_top_k_neighbors
+from stage_scheduler import Stage, StageScheduler
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def counting_scheduler(tmp_path, calls):
+    source = str(tmp_path / 'cache')
+    output = str(tmp_path / 'out.txt')
+
+    def build():
+        calls.append('build')
+        write(output, 'built')
+        return 'built'
+
+    stages = [
+        Stage('build', build, inputs=[source], outputs=[output]),
+        Stage('use', lambda build: calls.append(('use', build)), deps=['build'],
+              load=lambda: None),
+    ]
+    return StageScheduler(stages, str(tmp_path / '.stage_cache.json'))
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    write(str(tmp_path / 'cache' / 'a.json'), '{"a": 1}')
+    calls = []
+    counting_scheduler(tmp_path, calls).run()
+
+    calls.clear()
+    scheduler = counting_scheduler(tmp_path, calls)
+    scheduler.run()
+
+    assert calls == []
+    assert scheduler.status == {'build': 'cached', 'use': 'cached'}
+
+
+@pytest.mark.parametrize('change', [
+    # Same file name and size, different bytes
+    lambda cache: write(os.path.join(cache, 'a.json'), '{"a": 2}'),
+    # New file in a nested directory
+    lambda cache: write(os.path.join(cache, 'details', 'p1.json'), '{}'),
+])
+def test_directory_input_is_keyed_by_content(tmp_path, change):
+    write(str(tmp_path / 'cache' / 'a.json'), '{"a": 1}')
+    calls = []
+    counting_scheduler(tmp_path, calls).run()
+
+    change(str(tmp_path / 'cache'))
+    calls.clear()
+    counting_scheduler(tmp_path, calls).run()
+
+    # The rebuilt output is identical, so the dependent stays cached
+    assert calls == ['build']
+
+
+def test_dependency_cycle_is_reported(tmp_path):
+    stages = [Stage('a', lambda b: None, deps=['b']), Stage('b', lambda a: None, deps=['a'])]
+    with pytest.raises(ValueError, match='Dependency cycle'):
+        StageScheduler(stages, str(tmp_path / '.stage_cache.json')).run()
+
+
+def test_neighbor_pool_can_start_from_a_worker_thread():
+    rows = np.array([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0], [0, 0.8, 0.2]], dtype=np.float32)
+    matrix = sp.csr_matrix(rows / np.linalg.norm(rows, axis=1)[:, None])
+    result = {}
+
+    def run():
+        result['neighbors'], _ = compute_top_k_neighbors(matrix, k=1, block_size=2, workers=2)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(timeout=120)
+
+    assert not thread.is_alive()
+    assert result['neighbors'][:, 0].tolist() == [1, 0, 3, 2]
+
+
+def test_listing_input_is_keyed_by_top_level_names(tmp_path):
+    cache = str(tmp_path / 'cache')
+    write(os.path.join(cache, 'a.json'), '{"a": 1}')
+    calls = []
+
+    def scheduler():
+        stage = Stage('count', lambda: calls.append(len(os.listdir(cache))), listings=[cache])
+        return StageScheduler([stage], str(tmp_path / '.stage_cache.json'))
+
+    scheduler().run()
+    # Rewritten pages and files below subdirectories do not invalidate the stage
+    write(os.path.join(cache, 'a.json'), '{"a": 2}')
+    write(os.path.join(cache, 'backfill', 'shard-00000.jsonl'), '{}\n')
+    scheduler().run()
+    assert calls == [1]
+
+    write(os.path.join(cache, 'b.json'), '{}')
+    scheduler().run()
+    assert calls == [1, 3]